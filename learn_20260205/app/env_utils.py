@@ -1,7 +1,3 @@
-from __future__ import annotations
-
-import os
-
 """
 简单的环境变量工具模块。
 
@@ -9,13 +5,45 @@ import os
 
     from env_utils import API_KEY, BASE_URL
 
-你可以在运行前设置环境变量，或者直接修改下面的默认值：
+你可以在运行前设置环境变量：
 
     export API_KEY="your_api_key"
     export BASE_URL="https://api.xxx.com"
+
+环境变量在首次读取后会被缓存，后续访问不再查询 `os.environ`。
+其他变量可通过 `env_utils.XXX` 按需读取（同样带缓存）。
 """
 
-API_KEY: str = os.getenv("API_KEY", "")
-BASE_URL: str = os.getenv("BASE_URL", "")
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _env(name: str, default: str = "") -> str:
+    """读取并缓存环境变量。"""
+    return os.environ.get(name, default)
+
+
+def get_api_key() -> str:
+    """获取 API 密钥。"""
+    return _env("API_KEY")
+
+
+def get_base_url() -> str:
+    """获取 API 基础 URL。"""
+    return _env("BASE_URL")
+
+
+API_KEY: str = get_api_key()
+BASE_URL: str = get_base_url()
 
 
+def __getattr__(name: str) -> str:
+    """按需读取其他环境变量，例如 `env_utils.MODEL_NAME`。"""
+    if name.startswith("_") or not name.isupper():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = _env(name)
+    globals()[name] = value
+    return value
@@ -1,10 +1,55 @@
+"""
+简单的环境变量工具模块。
+
+在 `src/agent/my_llm.py` 中会从这里导入 `API_KEY` 和 `BASE_URL`：
+
+    from env_utils import API_KEY, BASE_URL
+
+你可以在运行前设置环境变量，或者写入 `.env` 文件：
+
+    export API_KEY="your_api_key"
+    export BASE_URL="https://api.xxx.com"
+
+环境变量在首次读取后会被缓存，后续访问不再查询 `os.environ`。
+其他变量可通过 `env_utils.XXX` 按需读取（同样带缓存）。
+"""
+
+from __future__ import annotations
+
 import os
+from functools import lru_cache
+
 from dotenv import load_dotenv
 
 
+# 先加载 .env，保证首次读取（随后被缓存）时能拿到文件中的配置
 load_dotenv(override=True)
 
-API_KEY = os.getenv('API_KEY')
 
-BASE_URL = os.getenv('BASE_URL')
+@lru_cache(maxsize=None)
+def _env(name: str, default: str = "") -> str:
+    """读取并缓存环境变量。"""
+    return os.environ.get(name, default)
+
+
+def get_api_key() -> str:
+    """获取 API 密钥。"""
+    return _env("API_KEY")
+
+
+def get_base_url() -> str:
+    """获取 API 基础 URL。"""
+    return _env("BASE_URL")
+
+
+API_KEY: str = get_api_key()
+BASE_URL: str = get_base_url()
+
 
+def __getattr__(name: str) -> str:
+    """按需读取其他环境变量，例如 `env_utils.MODEL_NAME`。"""
+    if name.startswith("_") or not name.isupper():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = _env(name)
+    globals()[name] = value
+    return value
@@ -1,8 +1,16 @@
-from langchain.agents import create_agent
-from agent.my_llm import llm
+import operator
+from functools import lru_cache
 
 from langchain.tools import tool
 
+# 运算类型 -> 运算函数
+_OPS = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": operator.truediv,
+}
+
 @tool("calculateAdd", parse_docstring=True, description="计算两个数的和")
 def calculateAdd(
     a: float,
@@ -21,23 +29,12 @@ def calculateAdd(
         float: 两个数的和
     """
     print(f"调用calculateAdd工具函数，第一个数：{a}，第二个数：{b}，运算类型：{operation}")
-    result = 0.0
-    match operation:
-        case "add":
-            result = a + b
-        case "sub":
-            result = a - b
-        case "mul":
-            result = a * b
-        case "div":
-            if b != 0:
-                result = a / b
-            else:
-                raise ValueError("除数不能为零")
-        case _:
-            raise ValueError("运算类型错误")
-
-    return result
+    fn = _OPS.get(operation)
+    if fn is None:
+        raise ValueError("运算类型错误")
+    if operation == "div" and b == 0:
+        raise ValueError("除数不能为零")
+    return fn(a, b)
 
 
 
@@ -57,8 +54,21 @@ def send_email(
 
     return f"邮件已发送至{to}"
 
-agent = create_agent(
-    model=llm,
-    tools=[send_email, calculateAdd],
-    system_prompt="你是一个个人辅助助手。请合理使用工具函数，完成用户的需求。"
-)
+@lru_cache(maxsize=1)
+def get_agent():
+    """创建并缓存 Agent，首次调用时才加载 LLM 与 Agent 运行时"""
+    from langchain.agents import create_agent
+    from agent.my_llm import get_llm
+
+    return create_agent(
+        model=get_llm(),
+        tools=[send_email, calculateAdd],
+        system_prompt="你是一个个人辅助助手。请合理使用工具函数，完成用户的需求。"
+    )
+
+
+def __getattr__(name: str):
+    # langgraph.json 通过 `my_agent.py:agent` 引用图对象
+    if name == "agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
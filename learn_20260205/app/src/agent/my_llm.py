@@ -1,7 +1,12 @@
-from pydantic import SecretStr
-from langchain_deepseek import ChatDeepSeek
-from langchain_openai import ChatOpenAI
-from env_utils import API_KEY, BASE_URL 
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+# LangChain / OpenAI 等依赖较重，延迟到首次调用 get_llm() 时再导入
 
 # 调用硅基流动api
 # llm = ChatOpenAI(
@@ -30,8 +35,100 @@ from env_utils import API_KEY, BASE_URL
 #     reasoning_steps = [r for r in chunk.content_blocks if r["type"] == "reasoning"]
 #     print(reasoning_steps if reasoning_steps else chunk.text)
 
-llm = ChatOpenAI(
-    model="qwen/Qwen3-30B-A3B-Thinking-2507",
-    api_key=SecretStr(API_KEY),
-    base_url=BASE_URL,
-)
+@lru_cache(maxsize=1)
+def get_llm():
+    """创建并缓存默认的 LLM 实例"""
+    from pydantic import SecretStr
+    from langchain_openai import ChatOpenAI
+    from env_utils import API_KEY, BASE_URL
+
+    return ChatOpenAI(
+        model="qwen/Qwen3-30B-A3B-Thinking-2507",
+        api_key=SecretStr(API_KEY),
+        base_url=BASE_URL,
+    )
+
+
+# 结构化输出的磁盘缓存目录（跨进程复用相同 prompt 的结果）
+_CACHE_DIR = Path.home() / ".cache" / "my_llm"
+# 进程内缓存的最大条目数，超出后淘汰最久未使用的结果
+_CACHE_MAX_SIZE = 256
+_structured_cache: "OrderedDict[str, object]" = OrderedDict()
+
+
+def _write_atomic(path: Path, data: str):
+    """先写临时文件再原子替换，避免并发或中断时留下不完整的 JSON"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _dump_structured(result, include_raw: bool) -> str:
+    """把结构化输出结果序列化为 JSON，include_raw 时连同原始消息一起保存"""
+    if not include_raw:
+        return result.model_dump_json()
+    return json.dumps({
+        "raw": result["raw"].model_dump(mode="json"),
+        "parsed": result["parsed"].model_dump(mode="json"),
+    }, ensure_ascii=False)
+
+
+def _load_structured(data: bytes, schema, include_raw: bool):
+    """从缓存的 JSON 还原结构化输出结果，格式与 invoke() 的返回值一致"""
+    if not include_raw:
+        return schema.model_validate_json(data)
+    from langchain_core.messages import AIMessage
+
+    payload = json.loads(data)
+    return {
+        "raw": AIMessage.model_validate(payload["raw"]),
+        "parsed": schema.model_validate(payload["parsed"]),
+        "parsing_error": None,
+    }
+
+
+def cached_structured_invoke(prompt: str, schema, include_raw: bool = False):
+    """
+    带内存 + 磁盘缓存的结构化输出调用
+
+    缓存键由模型名、温度、prompt、include_raw 和 Pydantic 模型的 JSON Schema 共同决定，
+    结果以 JSON 形式落盘，读取时还原成与 with_structured_output(...).invoke() 相同的返回值。
+    include_raw=True 时解析失败的结果不会被缓存。
+    """
+    llm = get_llm()
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    key_src = "\x00".join(
+        (llm.model_name, str(llm.temperature), str(include_raw), prompt, schema_json)
+    )
+    key = hashlib.blake2b(key_src.encode("utf-8")).hexdigest()
+
+    if key in _structured_cache:
+        _structured_cache.move_to_end(key)
+        return _structured_cache[key]
+
+    path = _CACHE_DIR / f"{key}.json"
+    if path.exists():
+        result = _load_structured(path.read_bytes(), schema, include_raw)
+    else:
+        result = llm.with_structured_output(schema, include_raw=include_raw).invoke(prompt)
+        if include_raw and result["parsed"] is None:
+            return result
+        _write_atomic(path, _dump_structured(result, include_raw))
+
+    _structured_cache[key] = result
+    if len(_structured_cache) > _CACHE_MAX_SIZE:
+        _structured_cache.popitem(last=False)
+    return result
+
+
+def __getattr__(name: str):
+    # 兼容 `from my_llm import llm` 的旧写法
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from my_llm import llm
+from my_llm import cached_structured_invoke
 
 class Movie(BaseModel):
     title: str = Field(description="The title of the movie")
@@ -7,6 +7,5 @@ class Movie(BaseModel):
     year: int = Field(description="The year the movie was released")
     rating: float = Field(description="The rating of the movie(0-10)")
 
-model_with_structured_output = llm.with_structured_output(Movie, include_raw=True)
-response = model_with_structured_output.invoke("提供《黑客帝国》 的详细信息")
-print(response)
\ No newline at end of file
+response = cached_structured_invoke("提供《黑客帝国》 的详细信息", Movie, include_raw=True)
+print(response)
@@ -7,10 +7,18 @@ from .routers import (
     script_recommender_router,
     quality_inspector_router
 )
-from .models import *
 
 __all__ = [
     "knowledge_base_router",
     "script_recommender_router",
     "quality_inspector_router"
 ]
+
+
+def __getattr__(name: str):
+    """按需从api.models导出数据模型，兼容 `from api import XxxRequest` 的写法"""
+    from . import models
+    
+    if name in models.__all__:
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
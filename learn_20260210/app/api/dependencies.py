@@ -0,0 +1,17 @@
+"""
+API公共依赖
+"""
+
+from fastapi import HTTPException
+
+from core.llm_client import llm_overloaded
+
+
+def check_llm_capacity():
+    """大模型调用排队已满时直接拒绝请求，避免队列无限堆积"""
+    if llm_overloaded():
+        raise HTTPException(
+            status_code=429,
+            detail="请求过多，请稍后重试",
+            headers={"Retry-After": "1"}
+        )
@@ -26,7 +26,7 @@ from .script_recommender import (
 
 from .quality_inspector import (
     ParseConversationRequest,
-    ParseConversationResponse,
+    ParsedConversationResponse,
     TranscribeRequest,
     TranscribeResponse,
     InspectRequest,
@@ -56,7 +56,7 @@ __all__ = [
     "PersonalizeScriptResponse",
     # 质检助手
     "ParseConversationRequest",
-    "ParseConversationResponse",
+    "ParsedConversationResponse",
     "TranscribeRequest",
     "TranscribeResponse",
     "InspectRequest",
@@ -2,13 +2,28 @@
 质检助手API数据模型
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+from typing_extensions import TypedDict
+
+
+# 问题严重程度（与 config.constants.IssueSeverity 保持一致）
+Severity = Literal["低", "中", "高", "严重"]
+
+
+class PendingReview(TypedDict):
+    """待复核项"""
+    review_id: str
+    session_id: str
+    score: float
+    reviewer: str
+    submitted_at: str
 
 
 class DialogueTurnItem(BaseModel):
     """对话轮次项"""
+    model_config = ConfigDict(frozen=True)
+
     speaker: str = Field(..., description="发言者")
     content: str = Field(..., description="发言内容")
     timestamp: Optional[str] = Field(None, description="时间戳")
@@ -16,8 +31,20 @@ class DialogueTurnItem(BaseModel):
     intent: Optional[str] = Field(None, description="意图标签")
 
 
+class ConversationPayload(BaseModel):
+    """质检请求中的对话内容"""
+    model_config = ConfigDict(extra="allow", frozen=True)
+
+    session_id: Optional[str] = Field(None, description="会话ID")
+    participants: List[str] = Field(default_factory=list, description="参与者列表")
+    turns: List[DialogueTurnItem] = Field(default_factory=list, description="对话轮次")
+    metadata: dict = Field(default_factory=dict, description="元数据")
+
+
 class ParseConversationRequest(BaseModel):
     """对话解析请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     content: str = Field(..., description="对话内容")
     format: str = Field("text", description="内容格式: text/json")
     session_id: Optional[str] = Field(None, description="会话ID")
@@ -25,15 +52,19 @@ class ParseConversationRequest(BaseModel):
 
 class ParsedConversationResponse(BaseModel):
     """对话解析响应"""
+    model_config = ConfigDict(frozen=True)
+
     session_id: str = Field(..., description="会话ID")
     participants: List[str] = Field(..., description="参与者列表")
     turns: List[DialogueTurnItem] = Field(..., description="对话轮次")
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="元数据")
+    metadata: dict = Field(default_factory=dict, description="元数据")
     format_detected: str = Field(..., description="检测到的格式")
 
 
 class TranscribeRequest(BaseModel):
     """语音转文字请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     audio_file: str = Field(..., description="音频文件路径或base64编码")
     language: str = Field("zh-CN", description="语言代码")
     format: Optional[str] = Field(None, description="音频格式")
@@ -41,6 +72,8 @@ class TranscribeRequest(BaseModel):
 
 class AudioSegmentItem(BaseModel):
     """音频片段项"""
+    model_config = ConfigDict(frozen=True)
+
     text: str = Field(..., description="文本内容")
     start_time: float = Field(0.0, description="开始时间")
     end_time: float = Field(0.0, description="结束时间")
@@ -49,6 +82,8 @@ class AudioSegmentItem(BaseModel):
 
 class TranscribeResponse(BaseModel):
     """语音转文字响应"""
+    model_config = ConfigDict(frozen=True)
+
     text: str = Field(..., description="转录文本")
     confidence: float = Field(..., description="置信度")
     language: str = Field(..., description="语言")
@@ -58,7 +93,9 @@ class TranscribeResponse(BaseModel):
 
 class InspectRequest(BaseModel):
     """自动质检请求"""
-    conversation: Dict[str, Any] = Field(..., description="对话内容")
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    conversation: ConversationPayload = Field(..., description="对话内容")
     session_id: Optional[str] = Field(None, description="会话ID")
     check_compliance: bool = Field(True, description="是否检查合规性")
     detailed: bool = Field(True, description="是否返回详细信息")
@@ -66,9 +103,11 @@ class InspectRequest(BaseModel):
 
 class QualityIssueItem(BaseModel):
     """质量问题项"""
+    model_config = ConfigDict(frozen=True)
+
     issue_type: str = Field(..., description="问题类型")
     description: str = Field(..., description="问题描述")
-    severity: str = Field("中", description="严重程度")
+    severity: Severity = Field("中", description="严重程度")
     location: Optional[str] = Field(None, description="问题位置")
     suggestion: Optional[str] = Field(None, description="改进建议")
     evidence: Optional[str] = Field(None, description="证据")
@@ -76,6 +115,8 @@ class QualityIssueItem(BaseModel):
 
 class InspectResponse(BaseModel):
     """自动质检响应"""
+    model_config = ConfigDict(frozen=True)
+
     session_id: str = Field(..., description="会话ID")
     overall_score: float = Field(..., description="总体评分")
     attitude_score: float = Field(..., description="态度评分")
@@ -88,13 +129,17 @@ class InspectResponse(BaseModel):
 
 class GenerateReportRequest(BaseModel):
     """生成报告请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     report_id: str = Field(..., description="报告ID或会话ID")
-    format: str = Field("json", description="导出格式: json/text/html")
-    report_type: str = Field("detailed", description="报告类型: detailed/summary")
+    format: Literal["json", "text", "html"] = Field("json", description="导出格式: json/text/html")
+    report_type: Literal["detailed", "summary"] = Field("detailed", description="报告类型: detailed/summary")
 
 
 class GenerateReportResponse(BaseModel):
     """生成报告响应"""
+    model_config = ConfigDict(frozen=True)
+
     report_id: str = Field(..., description="报告ID")
     content: str = Field(..., description="报告内容")
     format: str = Field(..., description="报告格式")
@@ -103,6 +148,8 @@ class GenerateReportResponse(BaseModel):
 
 class SubmitReviewRequest(BaseModel):
     """提交复核请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     report_id: str = Field(..., description="报告ID")
     reviewer: str = Field(..., description="复核人")
     comments: Optional[str] = Field(None, description="复核意见")
@@ -110,6 +157,8 @@ class SubmitReviewRequest(BaseModel):
 
 class SubmitReviewResponse(BaseModel):
     """提交复核响应"""
+    model_config = ConfigDict(frozen=True)
+
     review_id: str = Field(..., description="复核ID")
     status: str = Field(..., description="状态")
     submitted_at: str = Field(..., description="提交时间")
@@ -117,6 +166,8 @@ class SubmitReviewResponse(BaseModel):
 
 class ApproveRejectRequest(BaseModel):
     """批准/拒绝请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     review_id: str = Field(..., description="复核ID")
     approver: str = Field(..., description="操作人")
     comments: Optional[str] = Field(None, description="意见")
@@ -125,6 +176,8 @@ class ApproveRejectRequest(BaseModel):
 
 class ApproveRejectResponse(BaseModel):
     """批准/拒绝响应"""
+    model_config = ConfigDict(frozen=True)
+
     review_id: str = Field(..., description="复核ID")
     status: str = Field(..., description="状态")
     updated_at: str = Field(..., description="更新时间")
@@ -132,5 +185,7 @@ class ApproveRejectResponse(BaseModel):
 
 class PendingReviewsResponse(BaseModel):
     """待复核列表响应"""
+    model_config = ConfigDict(frozen=True)
+
     count: int = Field(..., description="数量")
-    reviews: List[Dict[str, Any]] = Field(default_factory=list, description="复核列表")
+    reviews: List[PendingReview] = Field(default_factory=list, description="复核列表")
@@ -2,25 +2,78 @@
 话术推荐API数据模型
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Any, List, Optional
+from typing_extensions import Annotated, TypedDict
+
+
+def _id_to_str(value: Any) -> Any:
+    """数字形式的ID统一转为字符串"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+# 兼容客户端以数字传入的ID
+IdStr = Annotated[str, BeforeValidator(_id_to_str)]
+
+
+class ContextPayload(TypedDict, total=False):
+    """请求中的对话情境，允许携带额外字段"""
+    __pydantic_config__ = ConfigDict(extra="allow")
+
+    topic: str
+    stage: str
+    complexity: str
+    customer_satisfaction: float
+    key_points: List[str]
+    emotion: str
+
+
+class IntentPayload(TypedDict, total=False):
+    """请求中的用户意图，可直接传入意图识别接口的响应"""
+    __pydantic_config__ = ConfigDict(extra="allow")
+
+    intent_type: str
+    sub_intent: Optional[str]
+    confidence: float
+    required_info: List[str]
+    suggested_actions: List[str]
+
+
+class CustomerProfilePayload(TypedDict, total=False):
+    """请求中的客户画像，允许携带额外字段"""
+    __pydantic_config__ = ConfigDict(extra="allow")
+
+    customer_id: IdStr
+    name: Optional[str]
+    age: Optional[int]
+    gender: Optional[str]
+    customer_type: Optional[str]
+    risk_level: Optional[str]
+    preference: Optional[dict]
 
 
 class ConversationMessage(BaseModel):
     """对话消息"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     role: str = Field(..., description="角色: customer/agent")
     content: str = Field(..., description="消息内容")
 
 
 class AnalyzeContextRequest(BaseModel):
     """情境分析请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     conversation_history: List[ConversationMessage] = Field(..., description="对话历史")
     session_id: Optional[str] = Field(None, description="会话ID")
 
 
 class AnalyzeContextResponse(BaseModel):
     """情境分析响应"""
+    model_config = ConfigDict(frozen=True)
+
     topic: str = Field(..., description="对话主题")
     stage: str = Field(..., description="对话阶段")
     complexity: str = Field("中等", description="复杂度")
@@ -31,12 +84,16 @@ class AnalyzeContextResponse(BaseModel):
 
 class RecognizeIntentRequest(BaseModel):
     """意图识别请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     current_query: str = Field(..., description="当前用户查询")
-    context: Optional[Dict[str, Any]] = Field(None, description="对话情境")
+    context: Optional[ContextPayload] = Field(None, description="对话情境")
 
 
 class RecognizeIntentResponse(BaseModel):
     """意图识别响应"""
+    model_config = ConfigDict(frozen=True)
+
     intent_type: str = Field(..., description="意图类型")
     sub_intent: Optional[str] = Field(None, description="子意图")
     confidence: float = Field(..., description="置信度")
@@ -46,14 +103,18 @@ class RecognizeIntentResponse(BaseModel):
 
 class RecommendScriptsRequest(BaseModel):
     """话术推荐请求"""
-    context: Dict[str, Any] = Field(..., description="对话情境")
-    intent: Dict[str, Any] = Field(..., description="用户意图")
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    context: ContextPayload = Field(..., description="对话情境")
+    intent: IntentPayload = Field(..., description="用户意图")
     count: int = Field(3, description="推荐数量")
-    filters: Optional[Dict[str, Any]] = Field(None, description="过滤条件")
+    filters: Optional[dict] = Field(None, description="过滤条件")
 
 
 class RecommendedScriptItem(BaseModel):
     """推荐话术项"""
+    model_config = ConfigDict(frozen=True)
+
     script_id: str = Field(..., description="话术ID")
     content: str = Field(..., description="话术内容")
     title: Optional[str] = Field(None, description="话术标题")
@@ -64,6 +125,8 @@ class RecommendedScriptItem(BaseModel):
 
 class RecommendScriptsResponse(BaseModel):
     """话术推荐响应"""
+    model_config = ConfigDict(frozen=True)
+
     scripts: List[RecommendedScriptItem] = Field(..., description="推荐的话术列表")
     context_summary: str = Field(..., description="情境摘要")
     intent_summary: str = Field(..., description="意图摘要")
@@ -71,13 +134,17 @@ class RecommendScriptsResponse(BaseModel):
 
 class PersonalizeScriptRequest(BaseModel):
     """个性化适配请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     script: str = Field(..., description="原始话术内容")
-    customer_profile: Dict[str, Any] = Field(..., description="客户画像")
-    context: Optional[Dict[str, Any]] = Field(None, description="对话情境")
+    customer_profile: CustomerProfilePayload = Field(..., description="客户画像")
+    context: Optional[ContextPayload] = Field(None, description="对话情境")
 
 
 class PersonalizeScriptResponse(BaseModel):
     """个性化适配响应"""
+    model_config = ConfigDict(frozen=True)
+
     personalized_script: str = Field(..., description="个性化后的话术")
     original_script: str = Field(..., description="原始话术")
     customer_id: Optional[str] = Field(None, description="客户ID")
@@ -85,18 +152,22 @@ class PersonalizeScriptResponse(BaseModel):
 
 class CustomerProfileRequest(BaseModel):
     """客户画像请求"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     customer_id: str = Field(..., description="客户ID")
     name: Optional[str] = Field(None, description="客户姓名")
     age: Optional[int] = Field(None, description="年龄")
     gender: Optional[str] = Field(None, description="性别")
     customer_type: Optional[str] = Field(None, description="客户类型")
     risk_level: Optional[str] = Field(None, description="风险等级")
-    preference: Optional[Dict[str, Any]] = Field(None, description="偏好设置")
+    preference: Optional[dict] = Field(None, description="偏好设置")
 
 
 class CustomerProfileResponse(BaseModel):
     """客户画像响应"""
+    model_config = ConfigDict(frozen=True)
+
     customer_id: str = Field(..., description="客户ID")
-    profile: Dict[str, Any] = Field(..., description="客户画像详情")
+    profile: dict = Field(..., description="客户画像详情")
     interaction_count: int = Field(0, description="交互次数")
     last_updated: Optional[str] = Field(None, description="最后更新时间")
@@ -0,0 +1,50 @@
+"""
+API响应构建工具
+"""
+
+from typing import Any, Dict, Iterable
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def json_response(adapter: TypeAdapter, data: Dict[str, Any]) -> Response:
+    """用预先构建的TypeAdapter校验并序列化响应，跳过FastAPI对response_model的二次校验"""
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(data)),
+        media_type="application/json"
+    )
+
+
+def model_response(model: BaseModel) -> Response:
+    """
+    直接序列化已构建的响应模型，不做任何校验
+
+    仅用于由内部数据通过 model_construct 构建的响应，字段类型需由调用方保证
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def wants_ndjson(request: Request) -> bool:
+    """客户端是否通过Accept头请求NDJSON流式响应"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(adapter: TypeAdapter, items: Iterable[Any]) -> StreamingResponse:
+    """
+    以NDJSON格式逐条流式输出列表元素，每个元素序列化为一行JSON
+
+    Args:
+        adapter (TypeAdapter): 元素类型的TypeAdapter，只用于序列化，不做校验
+        items (Iterable[Any]): 要输出的元素
+
+    Returns:
+        StreamingResponse: 流式响应
+    """
+    return StreamingResponse(
+        (adapter.dump_json(item) + b"\n" for item in items),
+        media_type=NDJSON_MEDIA_TYPE
+    )
@@ -2,15 +2,23 @@
 客服知识库助手API路由
 """
 
+import asyncio
 import logging
+from functools import lru_cache
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from pydantic import TypeAdapter
+from typing import List, Dict, Any
 
-from core.llm_client import get_llm_client, LLMClient
+from core.llm_client import get_llm_client, LLMClient, run_blocking_llm_call
 from core.vector_db import get_vector_db_client, VectorDBClient
+from config.constants import VECTOR_DB_COLLECTION
+from api.dependencies import check_llm_capacity
+from api.responses import json_response
 from api.models.knowledge_base import (
     ExtractQuestionsRequest,
     ExtractQuestionsResponse,
+    ExtractQuestionsBulkRequest,
+    ExtractQuestionsBulkResponse,
     ClassifyIntentRequest,
     ClassifyIntentResponse,
     GenerateQuestionsRequest,
@@ -31,35 +39,115 @@ from assistants.knowledge_base import (
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/knowledge-base", tags=["客服知识库助手"])
+router = APIRouter(
+    prefix="/knowledge-base",
+    tags=["客服知识库助手"]
+)
+
+# 每个响应模型只构建一次校验器/序列化器，各请求复用
+_EXTRACT_RESP_TA = TypeAdapter(ExtractQuestionsResponse)
+_EXTRACT_BULK_RESP_TA = TypeAdapter(ExtractQuestionsBulkResponse)
+_CLASSIFY_RESP_TA = TypeAdapter(ClassifyIntentResponse)
+_GENERATE_QUESTIONS_RESP_TA = TypeAdapter(GenerateQuestionsResponse)
+_GENERATE_SCRIPTS_RESP_TA = TypeAdapter(GenerateScriptsResponse)
+_ADD_KNOWLEDGE_RESP_TA = TypeAdapter(AddKnowledgeResponse)
+_SEARCH_RESP_TA = TypeAdapter(SearchKnowledgeResponse)
+
+
+def get_knowledge_vector_db() -> VectorDBClient:
+    """获取默认知识库集合的向量数据库客户端"""
+    return get_vector_db_client(VECTOR_DB_COLLECTION)
 
 
+@lru_cache(maxsize=1)
 def get_question_extractor() -> QuestionExtractor:
     """获取问题抽取器"""
     llm_client = get_llm_client()
     return QuestionExtractor(llm_client)
 
 
+@lru_cache(maxsize=1)
 def get_intent_classifier() -> IntentClassifier:
     """获取意图分类器"""
     llm_client = get_llm_client()
     return IntentClassifier(llm_client)
 
 
+@lru_cache(maxsize=1)
 def get_question_generator() -> QuestionGenerator:
     """获取问题生成器"""
     llm_client = get_llm_client()
-    vector_db = get_vector_db_client()
+    vector_db = get_knowledge_vector_db()
     return QuestionGenerator(llm_client, vector_db)
 
 
+@lru_cache(maxsize=1)
 def get_script_generator() -> ScriptGenerator:
     """获取话术生成器"""
     llm_client = get_llm_client()
     return ScriptGenerator(llm_client)
 
 
-@router.post("/extract-questions", response_model=ExtractQuestionsResponse)
+# 问题类型 -> 生成方法；标准问题及未知类型走生成与评分合并的路径，不在此表中
+_QUESTION_GENERATORS = {
+    "faq": QuestionGenerator.generate_faq_questions,
+    "similar": QuestionGenerator.generate_similar_questions,
+}
+
+
+def _generate_collection_scripts(generator: ScriptGenerator, request: GenerateScriptsRequest):
+    """生成电催话术"""
+    params = request.parameters
+    return generator.generate_collection_scripts(
+        overdue_days=params.get("overdue_days", 30),
+        customer_risk=params.get("customer_risk", "低风险"),
+        count=request.count
+    )
+
+
+def _generate_call_scripts(generator: ScriptGenerator, request: GenerateScriptsRequest):
+    """生成电话话术"""
+    params = request.parameters
+    return generator.generate_call_scripts(
+        scenario=params.get("scenario", ""),
+        customer_type=params.get("customer_type", "普通客户"),
+        count=request.count,
+        tone=request.tone
+    )
+
+
+def _collection_script_item(s) -> Dict[str, Any]:
+    """电催话术响应项"""
+    return {
+        "opening": s.opening,
+        "negotiation": s.negotiation,
+        "commitment_request": s.commitment_request,
+        "risk_level": s.risk_level
+    }
+
+
+def _call_script_item(s) -> Dict[str, Any]:
+    """电话话术响应项"""
+    return {
+        "greeting": s.greeting,
+        "main_content": s.main_content,
+        "closing": s.closing,
+        "scenario": s.scenario
+    }
+
+
+# 话术类型 -> (生成函数, 响应项构建函数)，未知类型按电话话术处理
+_SCRIPT_GENERATORS = {
+    "collection": (_generate_collection_scripts, _collection_script_item),
+    "call": (_generate_call_scripts, _call_script_item),
+}
+
+
+@router.post(
+    "/extract-questions",
+    response_model=ExtractQuestionsResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def extract_questions(
     request: ExtractQuestionsRequest,
     extractor: QuestionExtractor = Depends(get_question_extractor)
@@ -72,15 +160,18 @@ async def extract_questions(
     - max_questions: 最大抽取问题数量（默认5）
     """
     try:
-        questions = extractor.extract_questions(
-            request.conversation,
-            request.max_questions
+        # 问题抽取与关键信息提取相互独立，并发执行
+        questions, key_info = await asyncio.gather(
+            run_blocking_llm_call(
+                extractor.extract_questions,
+                request.conversation,
+                request.max_questions
+            ),
+            run_blocking_llm_call(extractor.extract_key_info, request.conversation)
         )
         
-        key_info = extractor.extract_key_info(request.conversation)
-        
-        return ExtractQuestionsResponse(
-            questions=[
+        return json_response(_EXTRACT_RESP_TA, {
+            "questions": [
                 {
                     "question": q.question,
                     "context": q.context,
@@ -89,16 +180,63 @@ async def extract_questions(
                 }
                 for q in questions
             ],
-            key_info=key_info,
-            session_id=request.session_id
-        )
+            "key_info": key_info,
+            "session_id": request.session_id
+        })
         
     except Exception as e:
         logger.error(f"问题抽取失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/classify-intent", response_model=ClassifyIntentResponse)
+@router.post(
+    "/extract-questions/bulk",
+    response_model=ExtractQuestionsBulkResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
+async def extract_questions_bulk(
+    request: ExtractQuestionsBulkRequest,
+    extractor: QuestionExtractor = Depends(get_question_extractor)
+):
+    """
+    批量抽取客户对话中的关键问题（多段对话合并为一次大模型调用）
+    
+    - conversations: 客户对话内容列表
+    - max_questions: 每段对话最大抽取问题数量（默认5）
+    """
+    try:
+        results = await run_blocking_llm_call(
+            extractor.extract_questions_bulk,
+            request.conversations,
+            request.max_questions
+        )
+        
+        return json_response(_EXTRACT_BULK_RESP_TA, {
+            "results": [
+                [
+                    {
+                        "question": q.question,
+                        "context": q.context,
+                        "emotion": q.emotion,
+                        "priority": q.priority
+                    }
+                    for q in questions
+                ]
+                for questions in results
+            ],
+            "count": len(results)
+        })
+        
+    except Exception as e:
+        logger.error(f"批量问题抽取失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/classify-intent",
+    response_model=ClassifyIntentResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def classify_intent(
     request: ClassifyIntentRequest,
     classifier: IntentClassifier = Depends(get_intent_classifier)
@@ -110,24 +248,29 @@ async def classify_intent(
     - categories: 意图分类列表（可选）
     """
     try:
-        result = classifier.classify_intent(
+        result = await run_blocking_llm_call(
+            classifier.classify_intent,
             request.query,
             request.categories
         )
         
-        return ClassifyIntentResponse(
-            primary_intent=result.primary_intent,
-            secondary_intent=result.secondary_intent,
-            confidence=result.confidence,
-            rewritten_query=result.rewritten_query
-        )
+        return json_response(_CLASSIFY_RESP_TA, {
+            "primary_intent": result.primary_intent,
+            "secondary_intent": result.secondary_intent,
+            "confidence": result.confidence,
+            "rewritten_query": result.rewritten_query
+        })
         
     except Exception as e:
         logger.error(f"意图分类失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/generate-questions", response_model=GenerateQuestionsResponse)
+@router.post(
+    "/generate-questions",
+    response_model=GenerateQuestionsResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def generate_questions(
     request: GenerateQuestionsRequest,
     generator: QuestionGenerator = Depends(get_question_generator)
@@ -141,28 +284,33 @@ async def generate_questions(
     - category: 分类（可选）
     """
     try:
-        if request.question_type == "faq":
-            questions = generator.generate_faq_questions(
-                request.topic,
-                request.count
-            )
-        elif request.question_type == "similar":
-            questions = generator.generate_similar_questions(
+        generate = _QUESTION_GENERATORS.get(request.question_type)
+        if generate is None:
+            # 标准问题：生成与质量评估合并为一次大模型调用
+            validations = await run_blocking_llm_call(
+                generator.generate_standard_questions_with_scores,
                 request.topic,
                 request.count
             )
+            questions = [v.question for v in validations]
         else:
-            questions = generator.generate_standard_questions(
+            questions = await run_blocking_llm_call(
+                generate,
+                generator,
                 request.topic,
                 request.count
             )
+            
+            # 验证问题
+            validations = await run_blocking_llm_call(
+                generator.validate_questions,
+                questions,
+                request.topic
+            )
         
-        # 验证问题
-        validations = generator.validate_questions(questions, request.topic)
-        
-        return GenerateQuestionsResponse(
-            questions=questions,
-            validations=[
+        return json_response(_GENERATE_QUESTIONS_RESP_TA, {
+            "questions": questions,
+            "validations": [
                 {
                     "question": v.question,
                     "is_valid": v.is_valid,
@@ -171,15 +319,19 @@ async def generate_questions(
                 }
                 for v in validations
             ],
-            topic=request.topic
-        )
+            "topic": request.topic
+        })
         
     except Exception as e:
         logger.error(f"问题生成失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/generate-scripts", response_model=GenerateScriptsResponse)
+@router.post(
+    "/generate-scripts",
+    response_model=GenerateScriptsResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def generate_scripts(
     request: GenerateScriptsRequest,
     generator: ScriptGenerator = Depends(get_script_generator)
@@ -193,45 +345,18 @@ async def generate_scripts(
     - tone: 话术风格（可选）
     """
     try:
-        params = request.parameters
-        
-        if request.script_type == "collection":
-            scripts = generator.generate_collection_scripts(
-                overdue_days=params.get("overdue_days", 30),
-                customer_risk=params.get("customer_risk", "低风险"),
-                count=request.count
-            )
-            response_scripts = [
-                {
-                    "opening": s.opening,
-                    "negotiation": s.negotiation,
-                    "commitment_request": s.commitment_request,
-                    "risk_level": s.risk_level
-                }
-                for s in scripts
-            ]
-        else:
-            scripts = generator.generate_call_scripts(
-                scenario=params.get("scenario", ""),
-                customer_type=params.get("customer_type", "普通客户"),
-                count=request.count,
-                tone=request.tone
-            )
-            response_scripts = [
-                {
-                    "greeting": s.greeting,
-                    "main_content": s.main_content,
-                    "closing": s.closing,
-                    "scenario": s.scenario
-                }
-                for s in scripts
-            ]
-        
-        return GenerateScriptsResponse(
-            scripts=response_scripts,
-            script_type=request.script_type,
-            count=len(response_scripts)
+        generate, to_item = _SCRIPT_GENERATORS.get(
+            request.script_type,
+            _SCRIPT_GENERATORS["call"]
         )
+        scripts = await run_blocking_llm_call(generate, generator, request)
+        response_scripts = [to_item(s) for s in scripts]
+        
+        return json_response(_GENERATE_SCRIPTS_RESP_TA, {
+            "scripts": response_scripts,
+            "script_type": request.script_type,
+            "count": len(response_scripts)
+        })
         
     except Exception as e:
         logger.error(f"话术生成失败: {str(e)}")
@@ -241,7 +366,7 @@ async def generate_scripts(
 @router.post("/add-knowledge", response_model=AddKnowledgeResponse)
 async def add_knowledge(
     request: AddKnowledgeRequest,
-    vector_db: VectorDBClient = Depends(get_vector_db_client)
+    vector_db: VectorDBClient = Depends(get_knowledge_vector_db)
 ):
     """
     添加知识库文档
@@ -259,10 +384,10 @@ async def add_knowledge(
             metadatas=request.metadatas
         )
         
-        return AddKnowledgeResponse(
-            ids=ids,
-            count=len(ids)
-        )
+        return json_response(_ADD_KNOWLEDGE_RESP_TA, {
+            "ids": ids,
+            "count": len(ids)
+        })
         
     except Exception as e:
         logger.error(f"添加知识失败: {str(e)}")
@@ -272,7 +397,7 @@ async def add_knowledge(
 @router.post("/search-knowledge", response_model=SearchKnowledgeResponse)
 async def search_knowledge(
     request: SearchKnowledgeRequest,
-    vector_db: VectorDBClient = Depends(get_vector_db_client)
+    vector_db: VectorDBClient = Depends(get_knowledge_vector_db)
 ):
     """
     搜索知识库
@@ -288,12 +413,16 @@ async def search_knowledge(
             where=request.filters
         )
         
-        return SearchKnowledgeResponse(
-            documents=results.get("documents", [[]])[0] if results.get("documents") else [],
-            metadatas=results.get("metadatas", [[]])[0] if results.get("metadatas") else [],
-            distances=results.get("distances", [[]])[0] if results.get("distances") else [],
-            count=len(results.get("documents", [[]])[0]) if results.get("documents") else 0
-        )
+        documents = (results.get("documents") or [[]])[0]
+        metadatas = (results.get("metadatas") or [[]])[0]
+        distances = (results.get("distances") or [[]])[0]
+        
+        return json_response(_SEARCH_RESP_TA, {
+            "documents": documents,
+            "metadatas": metadatas,
+            "distances": distances,
+            "count": len(documents)
+        })
         
     except Exception as e:
         logger.error(f"知识搜索失败: {str(e)}")
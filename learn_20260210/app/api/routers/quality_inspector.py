@@ -3,10 +3,13 @@
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from typing import List
 
-from core.llm_client import get_llm_client, LLMClient
+from core.llm_client import get_llm_client, LLMClient, run_blocking_llm_call
 from api.models.quality_inspector import (
     ParseConversationRequest,
     ParsedConversationResponse,
@@ -20,43 +23,62 @@ from api.models.quality_inspector import (
     SubmitReviewResponse,
     ApproveRejectRequest,
     ApproveRejectResponse,
-    PendingReviewsResponse
+    PendingReviewsResponse,
+    PendingReview
 )
+from api.dependencies import check_llm_capacity
+from api.responses import json_response, model_response, ndjson_response, wants_ndjson
 from assistants.quality_inspector import (
     ConversationParser,
     SpeechToTextProcessor,
     AutoInspector,
     ReportGenerator,
     ReviewWorkflow,
-    ParsedConversation
+    ParsedConversation,
+    DialogueTurn,
+    InspectionReport
 )
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/quality-inspector", tags=["质检助手"])
+router = APIRouter(
+    prefix="/quality-inspector",
+    tags=["质检助手"]
+)
+
+_PENDING_REVIEW_TA = TypeAdapter(PendingReview)
+# 含客户端输入或模型输出的响应，序列化前用预先构建的TypeAdapter校验
+_PARSED_CONVERSATION_RESP_TA = TypeAdapter(ParsedConversationResponse)
+_TRANSCRIBE_RESP_TA = TypeAdapter(TranscribeResponse)
+_INSPECT_RESP_TA = TypeAdapter(InspectResponse)
 
 
+@lru_cache(maxsize=1)
 def get_conversation_parser() -> ConversationParser:
     """获取对话解析器"""
     return ConversationParser()
 
 
+@lru_cache(maxsize=1)
 def get_speech_to_text_processor() -> SpeechToTextProcessor:
     """获取语音转文字处理器"""
     return SpeechToTextProcessor()
 
 
+@lru_cache(maxsize=1)
 def get_auto_inspector() -> AutoInspector:
     """获取自动化质检器"""
     llm_client = get_llm_client()
     return AutoInspector(llm_client)
 
 
+@lru_cache(maxsize=1)
 def get_report_generator() -> ReportGenerator:
     """获取报告生成器"""
     return ReportGenerator()
 
 
+@lru_cache(maxsize=1)
 def get_review_workflow() -> ReviewWorkflow:
     """获取复核工作流"""
     return ReviewWorkflow()
@@ -82,29 +104,25 @@ async def parse_conversation(
         
         format_detected = parser.detect_format(request.content)
         
-        return ParsedConversationResponse(
-            session_id=parsed.session_id,
-            participants=parsed.participants,
-            turns=[
-                {
-                    "speaker": turn.speaker,
-                    "content": turn.content,
-                    "timestamp": turn.timestamp.isoformat() if turn.timestamp else None,
-                    "emotion": turn.emotion,
-                    "intent": turn.intent
-                }
-                for turn in parsed.turns
-            ],
-            metadata=parsed.metadata,
-            format_detected=format_detected
-        )
+        # 轮次内容来自客户端输入，需校验后再序列化
+        return json_response(_PARSED_CONVERSATION_RESP_TA, {
+            "session_id": parsed.session_id,
+            "participants": parsed.participants,
+            "turns": [turn.to_dict() for turn in parsed.turns],
+            "metadata": parsed.metadata,
+            "format_detected": format_detected
+        })
         
     except Exception as e:
         logger.error(f"对话解析失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/transcribe", response_model=TranscribeResponse)
+@router.post(
+    "/transcribe",
+    response_model=TranscribeResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def transcribe_audio(
     request: TranscribeRequest,
     processor: SpeechToTextProcessor = Depends(get_speech_to_text_processor)
@@ -117,16 +135,17 @@ async def transcribe_audio(
     - format: 音频格式（可选）
     """
     try:
-        result = processor.transcribe_audio(
+        result = await run_blocking_llm_call(
+            processor.transcribe_audio,
             request.audio_file,
             request.language
         )
         
-        return TranscribeResponse(
-            text=result.text,
-            confidence=result.confidence,
-            language=result.language,
-            segments=[
+        return json_response(_TRANSCRIBE_RESP_TA, {
+            "text": result.text,
+            "confidence": result.confidence,
+            "language": result.language,
+            "segments": [
                 {
                     "text": seg.text,
                     "start_time": seg.start_time,
@@ -135,15 +154,19 @@ async def transcribe_audio(
                 }
                 for seg in result.segments
             ],
-            duration=result.duration
-        )
+            "duration": result.duration
+        })
         
     except Exception as e:
         logger.error(f"语音转文字失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/inspect", response_model=InspectResponse)
+@router.post(
+    "/inspect",
+    response_model=InspectResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def inspect_conversation(
     request: InspectRequest,
     inspector: AutoInspector = Depends(get_auto_inspector)
@@ -157,32 +180,38 @@ async def inspect_conversation(
     - detailed: 是否返回详细信息
     """
     try:
-        from assistants.quality_inspector import DialogueTurn, ParsedConversation
-        
-        # 构建对话对象
+        # 对话内容已由请求模型校验，直接构建对话对象
+        conversation = request.conversation
         turns = [
             DialogueTurn(
-                speaker=turn.get("speaker", "未知"),
-                content=turn.get("content", "")
+                speaker=turn.speaker,
+                content=turn.content,
+                emotion=turn.emotion,
+                intent=turn.intent
             )
-            for turn in request.conversation.get("turns", [])
+            for turn in conversation.turns
         ]
         
         parsed_conversation = ParsedConversation(
-            session_id=request.session_id or request.conversation.get("session_id", "unknown"),
-            participants=request.conversation.get("participants", []),
-            turns=turns
+            session_id=request.session_id or conversation.session_id or "unknown",
+            participants=conversation.participants,
+            turns=turns,
+            metadata=conversation.metadata
         )
         
-        report = inspector.inspect_conversation(parsed_conversation)
+        report = await run_blocking_llm_call(
+            inspector.inspect_conversation,
+            parsed_conversation
+        )
         
-        return InspectResponse(
-            session_id=report.session_id,
-            overall_score=report.overall_score,
-            attitude_score=report.attitude_score,
-            professionalism_score=report.professionalism_score,
-            compliance_score=report.compliance_score,
-            issues=[
+        # 问题项来自模型输出，需校验后再序列化
+        return json_response(_INSPECT_RESP_TA, {
+            "session_id": report.session_id,
+            "overall_score": report.overall_score,
+            "attitude_score": report.attitude_score,
+            "professionalism_score": report.professionalism_score,
+            "compliance_score": report.compliance_score,
+            "issues": [
                 {
                     "issue_type": issue.issue_type,
                     "description": issue.description,
@@ -192,20 +221,59 @@ async def inspect_conversation(
                 }
                 for issue in report.issues
             ],
-            summary=report.summary,
-            generated_at=report.generated_at.isoformat()
-        )
+            "summary": report.summary,
+            "generated_at": report.generated_at.isoformat()
+        })
         
     except Exception as e:
         logger.error(f"质检失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 报告格式 -> 保存的文件扩展名
+_REPORT_EXTENSIONS = {"json": "json", "text": "txt", "html": "html"}
+
+
+@lru_cache(maxsize=1024)
+def _render_report(
+    generator: ReportGenerator,
+    report_id: str,
+    format_type: str,
+    report_type: str
+) -> str:
+    """按报告ID、格式和类型渲染报告内容，相同请求直接复用结果"""
+    # 这里需要从数据库获取质检结果
+    # 模拟返回
+    mock_report = InspectionReport(
+        session_id=report_id,
+        overall_score=85.0,
+        attitude_score=90.0,
+        professionalism_score=85.0,
+        compliance_score=95.0,
+        summary="客服表现良好"
+    )
+    
+    if report_type == "summary":
+        summary = generator.build_summary_report([mock_report])
+        return generator.render_summary_report(summary, format_type)
+    return generator.render_report(mock_report, format_type)
+
+
+def _generate_report(generator: ReportGenerator, request: GenerateReportRequest) -> str:
+    """渲染报告（命中缓存时跳过渲染）并保存到输出目录"""
+    content = _render_report(generator, request.report_id, request.format, request.report_type)
+    prefix = "summary" if request.report_type == "summary" else "report"
+    generator.save_report(
+        f"{prefix}_{request.report_id}.{_REPORT_EXTENSIONS[request.format]}",
+        content
+    )
+    return content
+
+
 @router.post("/generate-report", response_model=GenerateReportResponse)
 async def generate_report(
     request: GenerateReportRequest,
-    inspector: AutoInspector = Depends(get_auto_inspector),
-    report_generator: ReportGenerator = Depends(get_report_generator)
+    generator: ReportGenerator = Depends(get_report_generator)
 ):
     """
     生成质检报告
@@ -215,27 +283,15 @@ async def generate_report(
     - report_type: 报告类型（detailed/summary）
     """
     try:
-        # 这里需要从数据库获取质检结果
-        # 模拟返回
-        from assistants.quality_inspector import InspectionReport
-        
-        mock_report = InspectionReport(
-            session_id=request.report_id,
-            overall_score=85.0,
-            attitude_score=90.0,
-            professionalism_score=85.0,
-            compliance_score=95.0,
-            summary="客服表现良好"
-        )
-        
-        content = report_generator.generate_detailed_report(mock_report)
+        # 报告保存会写文件，放到线程池中执行
+        content = await run_in_threadpool(_generate_report, generator, request)
         
-        return GenerateReportResponse(
+        return model_response(GenerateReportResponse.model_construct(
             report_id=request.report_id,
             content=content,
             format=request.format,
             size=len(content)
-        )
+        ))
         
     except Exception as e:
         logger.error(f"报告生成失败: {str(e)}")
@@ -255,19 +311,17 @@ async def submit_for_review(
     - comments: 复核意见（可选）
     """
     try:
-        from assistants.quality_inspector import InspectionReport
-        
         # 模拟报告对象
         mock_report = InspectionReport(
             session_id=request.report_id,
             overall_score=85.0
         )
         
-        success = workflow.submit_for_review(mock_report, request.reviewer)
+        review_id = workflow.submit_for_review(mock_report, request.reviewer)
         
-        if success:
+        if review_id:
             return SubmitReviewResponse(
-                review_id=f"review_{request.report_id}",
+                review_id=review_id,
                 status="pending",
                 submitted_at="2024-01-01T00:00:00"
             )
@@ -348,14 +402,20 @@ async def reject_report(
 
 @router.get("/pending-reviews", response_model=PendingReviewsResponse)
 async def get_pending_reviews(
+    http_request: Request,
     workflow: ReviewWorkflow = Depends(get_review_workflow)
 ):
     """
     获取待复核列表
+    
+    请求头 Accept 包含 application/x-ndjson 时，逐行流式返回复核项
     """
     try:
         reviews = workflow.get_pending_reviews()
         
+        if wants_ndjson(http_request):
+            return ndjson_response(_PENDING_REVIEW_TA, reviews)
+        
         return PendingReviewsResponse(
             count=len(reviews),
             reviews=reviews
@@ -3,10 +3,12 @@
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import TypeAdapter
 from typing import List
 
-from core.llm_client import get_llm_client, LLMClient
+from core.llm_client import get_llm_client, LLMClient, run_blocking_llm_call
 from core.vector_db import get_vector_db_client, VectorDBClient
 from api.models.script_recommender import (
     AnalyzeContextRequest,
@@ -15,11 +17,14 @@ from api.models.script_recommender import (
     RecognizeIntentResponse,
     RecommendScriptsRequest,
     RecommendScriptsResponse,
+    RecommendedScriptItem,
     PersonalizeScriptRequest,
     PersonalizeScriptResponse,
     CustomerProfileRequest,
     CustomerProfileResponse
 )
+from api.dependencies import check_llm_capacity
+from api.responses import json_response, ndjson_response, wants_ndjson
 from assistants.script_recommender import (
     ContextAnalyzer,
     IntentRecognizer,
@@ -32,21 +37,30 @@ from assistants.script_recommender import (
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/script-recommender", tags=["话术推荐助手"])
+router = APIRouter(
+    prefix="/script-recommender",
+    tags=["话术推荐助手"]
+)
+
+_RECOMMENDED_SCRIPT_TA = TypeAdapter(RecommendedScriptItem)
+_RECOMMEND_SCRIPTS_RESP_TA = TypeAdapter(RecommendScriptsResponse)
 
 
+@lru_cache(maxsize=1)
 def get_context_analyzer() -> ContextAnalyzer:
     """获取情境分析器"""
     llm_client = get_llm_client()
     return ContextAnalyzer(llm_client)
 
 
+@lru_cache(maxsize=1)
 def get_intent_recognizer() -> IntentRecognizer:
     """获取意图识别器"""
     llm_client = get_llm_client()
     return IntentRecognizer(llm_client)
 
 
+@lru_cache(maxsize=1)
 def get_script_recommender() -> ScriptRecommender:
     """获取话术推荐器"""
     llm_client = get_llm_client()
@@ -54,13 +68,18 @@ def get_script_recommender() -> ScriptRecommender:
     return ScriptRecommender(llm_client, vector_db)
 
 
+@lru_cache(maxsize=1)
 def get_personalization_adapter() -> PersonalizationAdapter:
     """获取个性化适配器"""
     llm_client = get_llm_client()
     return PersonalizationAdapter(llm_client)
 
 
-@router.post("/analyze-context", response_model=AnalyzeContextResponse)
+@router.post(
+    "/analyze-context",
+    response_model=AnalyzeContextResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def analyze_context(
     request: AnalyzeContextRequest,
     analyzer: ContextAnalyzer = Depends(get_context_analyzer)
@@ -77,7 +96,7 @@ async def analyze_context(
             for msg in request.conversation_history
         ]
         
-        context = analyzer.analyze_context(conversation_history)
+        context = await analyzer.aanalyze_context(conversation_history)
         
         return AnalyzeContextResponse(
             topic=context.topic,
@@ -93,7 +112,11 @@ async def analyze_context(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/recognize-intent", response_model=RecognizeIntentResponse)
+@router.post(
+    "/recognize-intent",
+    response_model=RecognizeIntentResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def recognize_intent(
     request: RecognizeIntentRequest,
     recognizer: IntentRecognizer = Depends(get_intent_recognizer)
@@ -105,7 +128,7 @@ async def recognize_intent(
     - context: 对话情境（可选）
     """
     try:
-        result = recognizer.recognize_intent(
+        result = await recognizer.arecognize_intent(
             request.current_query,
             None  # 可以传入ConversationContext对象
         )
@@ -123,9 +146,14 @@ async def recognize_intent(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/recommend-scripts", response_model=RecommendScriptsResponse)
+@router.post(
+    "/recommend-scripts",
+    response_model=RecommendScriptsResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def recommend_scripts(
     request: RecommendScriptsRequest,
+    http_request: Request,
     recommender: ScriptRecommender = Depends(get_script_recommender)
 ):
     """
@@ -135,6 +163,8 @@ async def recommend_scripts(
     - intent: 用户意图
     - count: 推荐数量
     - filters: 过滤条件（可选）
+    
+    请求头 Accept 包含 application/x-ndjson 时，逐行流式返回推荐话术（不含摘要字段）
     """
     try:
         context = ConversationContext(
@@ -150,34 +180,45 @@ async def recommend_scripts(
             confidence=request.intent.get("confidence", 0.0)
         )
         
-        scripts = recommender.recommend_scripts(
+        scripts = await run_blocking_llm_call(
+            recommender.recommend_scripts,
             context=context,
             intent=intent,
             count=request.count
         )
         
-        return RecommendScriptsResponse(
-            scripts=[
-                {
-                    "script_id": s.script_id,
-                    "content": s.content,
-                    "title": s.title,
-                    "relevance_score": s.relevance_score,
-                    "usage_count": s.usage_count,
-                    "success_rate": s.success_rate
-                }
-                for s in scripts
-            ],
-            context_summary=f"主题: {context.topic}, 阶段: {context.stage}",
-            intent_summary=f"意图: {intent.intent_type}, 置信度: {intent.confidence:.2f}"
-        )
+        # 话术字段来自知识库和模型输出，逐项校验
+        items = [
+            RecommendedScriptItem(
+                script_id=s.script_id,
+                content=s.content,
+                title=s.title,
+                relevance_score=s.relevance_score,
+                usage_count=s.usage_count,
+                success_rate=s.success_rate
+            )
+            for s in scripts
+        ]
+        
+        if wants_ndjson(http_request):
+            return ndjson_response(_RECOMMENDED_SCRIPT_TA, items)
+        
+        return json_response(_RECOMMEND_SCRIPTS_RESP_TA, {
+            "scripts": items,
+            "context_summary": f"主题: {context.topic}, 阶段: {context.stage}",
+            "intent_summary": f"意图: {intent.intent_type}, 置信度: {intent.confidence:.2f}"
+        })
         
     except Exception as e:
         logger.error(f"话术推荐失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/personalize-script", response_model=PersonalizeScriptResponse)
+@router.post(
+    "/personalize-script",
+    response_model=PersonalizeScriptResponse,
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def personalize_script(
     request: PersonalizeScriptRequest,
     adapter: PersonalizationAdapter = Depends(get_personalization_adapter)
@@ -200,7 +241,8 @@ async def personalize_script(
             preference=request.customer_profile.get("preference")
         )
         
-        personalized = adapter.adapt_script(
+        personalized = await run_blocking_llm_call(
+            adapter.adapt_script,
             script=request.script,
             customer_profile=customer_profile
         )
@@ -216,7 +258,10 @@ async def personalize_script(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/generate-greeting")
+@router.post(
+    "/generate-greeting",
+    dependencies=[Depends(check_llm_capacity)]
+)
 async def generate_greeting(
     request: CustomerProfileRequest,
     adapter: PersonalizationAdapter = Depends(get_personalization_adapter)
@@ -239,7 +284,10 @@ async def generate_greeting(
             preference=request.preference
         )
         
-        greeting = adapter.generate_personalized_greeting(customer_profile)
+        greeting = await run_blocking_llm_call(
+            adapter.generate_personalized_greeting,
+            customer_profile
+        )
         
         return {"greeting": greeting}
         
@@ -4,6 +4,7 @@
 
 from .question_extractor import QuestionExtractor, ExtractedQuestion
 from .intent_classifier import IntentClassifier, IntentClassification
+from .intent_cache import IntentCache
 from .question_generator import QuestionGenerator, QuestionValidation
 from .script_generator import ScriptGenerator, CallScript, CollectionScript
 
@@ -12,6 +13,7 @@ __all__ = [
     "ExtractedQuestion",
     "IntentClassifier",
     "IntentClassification",
+    "IntentCache",
     "QuestionGenerator",
     "QuestionValidation",
     "ScriptGenerator",
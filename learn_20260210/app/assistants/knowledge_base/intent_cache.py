@@ -0,0 +1,210 @@
+"""
+意图分类语义缓存
+精确匹配 + 向量相似度匹配，命中时跳过大模型调用，也用于问题/话术生成结果的缓存
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from config.settings import settings
+from utils.logger import LoggerMixin
+
+T = TypeVar("T")
+
+
+class IntentCache(LoggerMixin):
+    """
+    意图分类语义缓存
+
+    先按查询文本哈希精确匹配；未命中时用查询向量在同一作用域内做余弦相似度检索，
+    相似度不低于阈值即视为命中。条目按TTL过期，超出容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]] = None,
+        embed_batch_fn: Callable[[List[str]], List[List[float]]] = None,
+        similarity_threshold: float = None,
+        ttl: int = None,
+        max_size: int = None
+    ):
+        """
+        初始化意图缓存
+
+        Args:
+            embed_fn (Callable[[str], List[float]]): 文本向量化函数，为空时仅做精确匹配
+            embed_batch_fn (Callable[[List[str]], List[List[float]]]): 批量向量化函数，供embed_many使用
+            similarity_threshold (float): 语义命中的余弦相似度阈值
+            ttl (int): 条目有效期（秒）
+            max_size (int): 最大条目数
+        """
+        self.embed_fn = embed_fn
+        self.embed_batch_fn = embed_batch_fn
+        self.similarity_threshold = (
+            settings.INTENT_CACHE_SIMILARITY if similarity_threshold is None else similarity_threshold
+        )
+        self.ttl = settings.INTENT_CACHE_TTL if ttl is None else ttl
+        self.max_size = settings.INTENT_CACHE_MAX_SIZE if max_size is None else max_size
+
+        # key -> (过期时间, 作用域, 归一化向量, 缓存值)
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[np.ndarray], Any]]" = OrderedDict()
+        # 作用域 -> (条目key列表, 向量矩阵)，条目变化时失效
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        # 查询文本 -> 由embed_many预先计算的归一化向量，取用后即移除
+        self._prefetched: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str, scope: str) -> str:
+        """生成精确匹配键"""
+        return hashlib.blake2b(f"{scope}\x1f{query}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_or_compute(
+        self,
+        query: str,
+        scope: str,
+        compute: Callable[[], T],
+        semantic: bool = True,
+        similarity_threshold: float = None,
+        should_cache: Callable[[T], bool] = None
+    ) -> T:
+        """
+        读取缓存，未命中时调用compute计算并写入缓存
+
+        Args:
+            query (str): 查询文本
+            scope (str): 缓存作用域（如分类列表），仅在同一作用域内匹配
+            compute (Callable[[], T]): 未命中时的计算函数，抛出异常时不写入缓存
+            semantic (bool): 是否启用相似度匹配
+            similarity_threshold (float): 本次匹配使用的相似度阈值，为空时使用缓存默认阈值
+            should_cache (Callable[[T], bool]): 判断计算结果是否写入缓存，为空时总是写入
+
+        Returns:
+            T: 缓存值或新计算的结果
+        """
+        key = self._key(query, scope)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[3]
+            if entry is not None:
+                self._discard(key)
+
+        vector = self._embed(query) if semantic else None
+        if vector is not None:
+            with self._lock:
+                value = self._search(vector, scope, now, similarity_threshold)
+            if value is not None:
+                return value
+
+        value = compute()
+        if should_cache is not None and not should_cache(value):
+            return value
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, scope, vector, value)
+            self._entries.move_to_end(key)
+            self._matrices.pop(scope, None)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+        return value
+
+    def embed_many(self, queries: List[str]):
+        """
+        批量预计算查询向量，随后对这些查询的get_or_compute直接复用，不再逐条向量化
+
+        Args:
+            queries (List[str]): 查询文本列表
+        """
+        if self.embed_batch_fn is None or not queries:
+            return
+        try:
+            matrix = np.asarray(self.embed_batch_fn(queries), dtype=np.float32)
+        except Exception as e:
+            self.logger.warning(f"批量向量化失败，退化为逐条向量化: {str(e)}")
+            return
+        if matrix.ndim != 2 or matrix.shape[0] != len(queries):
+            self.logger.warning("批量向量化结果与查询数量不一致，退化为逐条向量化")
+            return
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        with self._lock:
+            for query, vector, norm in zip(queries, matrix, norms[:, 0]):
+                if norm > 0:
+                    self._prefetched[query] = vector
+                    self._prefetched.move_to_end(query)
+            while len(self._prefetched) > self.max_size:
+                self._prefetched.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+            self._prefetched.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        """计算归一化查询向量，失败时退化为仅精确匹配"""
+        with self._lock:
+            vector = self._prefetched.pop(query, None)
+        if vector is not None:
+            return vector
+        if self.embed_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(query), dtype=np.float32)
+        except Exception as e:
+            self.logger.warning(f"查询向量化失败，跳过语义缓存: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _search(
+        self,
+        vector: np.ndarray,
+        scope: str,
+        now: float,
+        similarity_threshold: float = None
+    ) -> Optional[Any]:
+        """在作用域内检索最相似的条目（需持有锁）"""
+        if scope not in self._matrices:
+            keys = [
+                key for key, (_, entry_scope, entry_vector, _) in self._entries.items()
+                if entry_scope == scope and entry_vector is not None
+            ]
+            if not keys:
+                return None
+            self._matrices[scope] = (keys, np.stack([self._entries[key][2] for key in keys]))
+
+        keys, matrix = self._matrices[scope]
+        if matrix.shape[1] != vector.shape[0]:
+            return None
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        threshold = self.similarity_threshold if similarity_threshold is None else similarity_threshold
+        if scores[best] < threshold:
+            return None
+
+        key = keys[best]
+        if self._entries[key][0] <= now:
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][3]
+
+    def _discard(self, key: str):
+        """移除条目并使其作用域的向量矩阵失效（需持有锁）"""
+        _, scope, _, _ = self._entries.pop(key)
+        self._matrices.pop(scope, None)
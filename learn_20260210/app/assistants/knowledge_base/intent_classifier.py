@@ -3,36 +3,73 @@
 识别和改写客户意图
 """
 
+import asyncio
+import copy
 import logging
-from typing import List, Dict, Any, Optional
+import sys
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
+from assistants.knowledge_base.intent_cache import IntentCache
 from utils.logger import LoggerMixin
+from utils.helpers import JSONUtils
 from config.constants import PromptTemplates, IntentCategories
 
 logger = logging.getLogger(__name__)
 
+# 默认意图分类
+_DEFAULT_CATEGORIES = (
+    IntentCategories.ACCOUNT_QUERY,
+    IntentCategories.BUSINESS办理,
+    IntentCategories.COMPLAINT,
+    IntentCategories.FEEDBACK,
+    IntentCategories.TECHNICAL_SUPPORT,
+    IntentCategories.OTHER
+)
+
+
+def _category_scope(categories: Sequence[str]) -> str:
+    """分类列表对应的意图缓存作用域"""
+    return "intent:" + "\x1f".join(categories)
+
+
+# 查询改写提示词的固定前缀，动态查询拼接在末尾以便命中服务端前缀缓存
+_REWRITE_PREFIX = """请将以下客户查询改写为更清晰、更准确的表达。
+
+要求：
+1. 保持原意不变
+2. 使表达更加简洁明确
+3. 去除口语化和无关内容
+
+原始查询："""
+
 
 class IntentClassification:
     """
     意图分类结果数据模型
     """
     
+    __slots__ = (
+        "primary_intent", "secondary_intent", "confidence",
+        "categories", "rewritten_query", "timestamp"
+    )
+    
     def __init__(
         self,
         primary_intent: str,
         secondary_intent: str = None,
         confidence: float = 0.0,
         categories: List[str] = None,
-        rewritten_query: str = None
+        rewritten_query: str = None,
+        timestamp: datetime = None
     ):
         self.primary_intent = primary_intent        # 主要意图
         self.secondary_intent = secondary_intent    # 次要意图
         self.confidence = confidence                # 置信度
         self.categories = categories or []          # 意图分类列表
         self.rewritten_query = rewritten_query      # 改写后的查询
-        self.timestamp = datetime.now()             # 时间戳
+        self.timestamp = timestamp or datetime.now()  # 时间戳
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -55,7 +92,8 @@ class IntentClassifier(LoggerMixin):
     def __init__(
         self,
         llm_client: LLMClient,
-        categories: List[str] = None
+        categories: List[str] = None,
+        cache: IntentCache = None
     ):
         """
         初始化意图分类器
@@ -63,50 +101,60 @@ class IntentClassifier(LoggerMixin):
         Args:
             llm_client (LLMClient): 大模型客户端
             categories (List[str]): 意图分类列表
+            cache (IntentCache): 意图缓存，默认使用大模型客户端的向量化接口做语义匹配
         """
         self.llm_client = llm_client
-        self.categories = categories or [
-            IntentCategories.ACCOUNT_QUERY,
-            IntentCategories.BUSINESS办理,
-            IntentCategories.COMPLAINT,
-            IntentCategories.FEEDBACK,
-            IntentCategories.TECHNICAL_SUPPORT,
-            IntentCategories.OTHER
-        ]
+        self.cache = cache if cache is not None else IntentCache(
+            embed_fn=llm_client.embedding,
+            embed_batch_fn=llm_client.batch_embedding
+        )
+        self._set_categories(categories or _DEFAULT_CATEGORIES)
         self.logger.info("意图分类器初始化完成")
     
+    def _set_categories(self, categories: Sequence[str]):
+        """更新分类列表，同时刷新成员集合与缓存作用域"""
+        self.categories: Tuple[str, ...] = tuple(sys.intern(c) for c in categories)
+        self._category_set = frozenset(self.categories)
+        self._category_scope = _category_scope(self.categories)
+    
     def classify_intent(
         self,
         query: str,
-        categories: List[str] = None
+        categories: Optional[Sequence[str]] = None
     ) -> IntentClassification:
         """
         分类客户意图
         
         Args:
             query (str): 客户查询
-            categories (List[str]): 意图分类列表
+            categories (Optional[Sequence[str]]): 意图分类列表，为空时使用分类器默认分类
             
         Returns:
             IntentClassification: 意图分类结果
         """
         try:
-            categories = categories or self.categories
-            
-            result = self.llm_client.classify_intent(
-                text=query,
-                categories=categories
-            )
+            if categories:
+                scope = _category_scope(categories)
+            else:
+                categories, scope = self.categories, self._category_scope
             
-            # 改写查询
-            rewritten_query = self.rewrite_query(query)
+            def compute() -> Tuple[str, IntentClassification, bool]:
+                result, complete = self._classify_uncached(query, categories)
+                return query, result, complete
             
-            return IntentClassification(
-                primary_intent=result.get("intent", categories[0]),
-                confidence=result.get("confidence", 0.0),
-                categories=categories,
-                rewritten_query=rewritten_query
+            # 相同或语义相近的查询直接复用缓存的分类结果；降级得到的结果不写入缓存
+            source_query, cached, _ = self.cache.get_or_compute(
+                query,
+                scope,
+                compute,
+                should_cache=lambda entry: entry[2]
             )
+            result = copy.deepcopy(cached)
+            if source_query != query:
+                # 语义命中只复用意图标签，改写结果必须针对本次查询
+                result.rewritten_query = self.rewrite_query(query)
+            result.timestamp = datetime.now()
+            return result
             
         except Exception as e:
             self.logger.error(f"意图分类失败: {str(e)}")
@@ -116,6 +164,77 @@ class IntentClassifier(LoggerMixin):
                 categories=categories or self.categories
             )
     
+    async def aclassify_intent(
+        self,
+        query: str,
+        categories: Optional[Sequence[str]] = None
+    ) -> IntentClassification:
+        """
+        异步分类客户意图，在线程池中执行且受全局大模型并发数限制
+        
+        Args:
+            query (str): 客户查询
+            categories (Optional[Sequence[str]]): 意图分类列表
+            
+        Returns:
+            IntentClassification: 意图分类结果
+        """
+        return await run_blocking_llm_call(self.classify_intent, query, categories)
+    
+    def _classify_uncached(
+        self,
+        query: str,
+        categories: Sequence[str]
+    ) -> Tuple[IntentClassification, bool]:
+        """
+        调用大模型分类并改写查询（不经过意图缓存）
+        
+        Returns:
+            Tuple[IntentClassification, bool]: 分类结果，以及结果是否完整（改写降级为原查询时为False）
+        """
+        # 分类与改写合并为一次调用
+        prompt = PromptTemplates.INTENT_CLASSIFY_REWRITE.format(
+            query=query,
+            categories="、".join(categories)
+        )
+        data = self._parse_json_response(self.llm_client.generate_text(prompt))
+        
+        if data.get("intent") in categories:
+            try:
+                confidence = float(data.get("confidence", 0.0))
+            except (TypeError, ValueError):
+                confidence = 0.0
+            rewritten = str(data.get("rewritten") or "").strip()
+            if rewritten:
+                # 顺带写入改写缓存，之后语义命中该查询时不必再次改写
+                self.cache.get_or_compute(query, "rewrite", lambda: rewritten, semantic=False)
+            return IntentClassification(
+                primary_intent=data["intent"],
+                confidence=confidence,
+                categories=categories,
+                rewritten_query=rewritten or query
+            ), bool(rewritten)
+        
+        # 返回格式无法解析时，分别调用分类和改写
+        self.logger.warning("合并分类结果解析失败，改为分别分类和改写")
+        result = self.llm_client.classify_intent(
+            text=query,
+            categories=categories
+        )
+        
+        try:
+            rewritten, complete = self._cached_rewrite(query), True
+        except Exception as e:
+            self.logger.error(f"查询改写失败: {str(e)}")
+            rewritten, complete = query, False
+        
+        return IntentClassification(
+            primary_intent=result.get("intent", categories[0]),
+            confidence=result.get("confidence", 0.0),
+            categories=categories,
+            rewritten_query=rewritten
+        ), complete
+    
     def rewrite_query(self, query: str) -> str:
         """
         改写客户查询，使其更准确
@@ -124,29 +243,33 @@ class IntentClassifier(LoggerMixin):
             query (str): 原始查询
             
         Returns:
-            str: 改写后的查询
+            str: 改写后的查询，改写失败时返回原查询
         """
         try:
-            prompt = f"""
-请将以下客户查询改写为更清晰、更准确的表达：
-
-原始查询：{query}
-
-要求：
-1. 保持原意不变
-2. 使表达更加简洁明确
-3. 去除口语化和无关内容
-
-改写后的查询：
-            """
-            
-            response = self.llm_client.generate_text(prompt)
-            return response.strip()
+            return self._cached_rewrite(query)
             
         except Exception as e:
             self.logger.error(f"查询改写失败: {str(e)}")
             return query
     
+    def _cached_rewrite(self, query: str) -> str:
+        """按查询文本精确缓存的改写，失败时抛出异常且不写入缓存"""
+        return self.cache.get_or_compute(
+            query,
+            "rewrite",
+            lambda: self._rewrite_uncached(query),
+            semantic=False
+        )
+    
+    def _rewrite_uncached(self, query: str) -> str:
+        """调用大模型改写查询（不经过缓存）"""
+        prompt = _REWRITE_PREFIX + query + "\n\n改写后的查询："
+        
+        rewritten = self.llm_client.generate_text(prompt).strip()
+        if not rewritten:
+            raise ValueError("改写结果为空")
+        return rewritten
+    
     def batch_classify(
         self,
         queries: List[str]
@@ -160,11 +283,46 @@ class IntentClassifier(LoggerMixin):
         Returns:
             List[IntentClassification]: 分类结果列表
         """
+        # 重复查询只分类一次，并一次性批量向量化供语义缓存检索
+        unique_queries = list(dict.fromkeys(queries))
+        self.cache.embed_many(unique_queries)
+        unique_results = {}
+        for i, query in enumerate(unique_queries):
+            self.logger.info(f"处理第 {i+1}/{len(unique_queries)} 个查询")
+            unique_results[query] = self.classify_intent(query)
+        return self._scatter_results(queries, unique_results)
+    
+    async def abatch_classify(
+        self,
+        queries: List[str]
+    ) -> List[IntentClassification]:
+        """
+        异步批量分类意图，各查询并发执行
+        
+        Args:
+            queries (List[str]): 查询列表
+            
+        Returns:
+            List[IntentClassification]: 与输入顺序一致的分类结果列表
+        """
+        # 重复查询只分类一次，并一次性批量向量化供语义缓存检索
+        unique_queries = list(dict.fromkeys(queries))
+        await run_blocking_llm_call(self.cache.embed_many, unique_queries)
+        results = await asyncio.gather(*(self.aclassify_intent(q) for q in unique_queries))
+        return self._scatter_results(queries, dict(zip(unique_queries, results)))
+    
+    @staticmethod
+    def _scatter_results(
+        queries: List[str],
+        unique_results: Dict[str, IntentClassification]
+    ) -> List[IntentClassification]:
+        """按原始顺序展开去重后的结果，重复查询得到独立的副本"""
         results = []
-        for i, query in enumerate(queries):
-            self.logger.info(f"处理第 {i+1}/{len(queries)} 个查询")
-            result = self.classify_intent(query)
-            results.append(result)
+        seen = set()
+        for query in queries:
+            result = unique_results[query]
+            results.append(copy.deepcopy(result) if query in seen else result)
+            seen.add(query)
         return results
     
     def add_category(self, category: str):
@@ -174,8 +332,8 @@ class IntentClassifier(LoggerMixin):
         Args:
             category (str): 新分类名称
         """
-        if category not in self.categories:
-            self.categories.append(category)
+        if category not in self._category_set:
+            self._set_categories(self.categories + (category,))
             self.logger.info(f"添加新分类: {category}")
     
     def remove_category(self, category: str):
@@ -185,10 +343,14 @@ class IntentClassifier(LoggerMixin):
         Args:
             category (str): 要移除的分类名称
         """
-        if category in self.categories:
-            self.categories.remove(category)
+        if category in self._category_set:
+            self._set_categories(c for c in self.categories if c != category)
             self.logger.info(f"移除分类: {category}")
     
     def get_categories(self) -> List[str]:
         """获取所有意图分类"""
-        return self.categories.copy()
+        return list(self.categories)
+    
+    def _parse_json_response(self, response: str) -> Dict[str, Any]:
+        """解析JSON响应"""
+        return JSONUtils.extract(response) or {}
@@ -3,34 +3,67 @@
 从客户对话中自动抽取关键问题
 """
 
+import asyncio
 import logging
+import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
 from utils.logger import LoggerMixin
-from config.constants import PromptTemplates, CustomerEmotions
+from utils.helpers import JSONUtils
+from config.constants import PromptTemplates, CustomerEmotions, BULK_EXTRACT_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 
+# 抽取结果格式：每个问题为"1. 主要问题：…"行，后跟可选的"2. 相关信息：…"和"3. 客户情绪：…"行
+_FIELD_SEP = r'[ \t]*[:：]?[ \t]*'
+_EXTRACT_RE = re.compile(
+    rf'^[ \t]*(?:1\.[ \t]*(?:主要问题)?|主要问题){_FIELD_SEP}(?P<q>[^\n]*?)[ \t]*$'
+    rf'(?:\s*^[ \t]*(?:2\.[ \t]*(?:相关信息)?|相关信息){_FIELD_SEP}(?P<ctx>[^\n]*?)[ \t]*$)?'
+    rf'(?:\s*^[ \t]*(?:3\.[ \t]*(?:客户情绪)?|客户情绪){_FIELD_SEP}(?P<emo>[^\n]*?)[ \t]*$)?',
+    re.M
+)
+
+# 问题抽取提示词在导入时按占位符拆分，调用时直接拼接，避免每次解析格式字符串
+_EXTRACT_PROMPT_PREFIX, _, _EXTRACT_PROMPT_SUFFIX = (
+    PromptTemplates.KNOWLEDGE_BASE_EXTRACT.partition("{conversation}")
+)
+
+# 关键信息提取提示词的固定前缀，动态对话内容拼接在末尾以便命中服务端前缀缓存
+_KEY_INFO_PREFIX = """请从客户对话中提取关键信息，按照以下JSON格式输出：
+{
+    "customer_id": "客户ID（如果有）",
+    "product": "涉及的产品类型",
+    "main_topic": "主要话题",
+    "key_entities": ["关键实体列表"],
+    "emotion": "客户情绪"
+}
+
+对话内容：
+"""
+
 
 class ExtractedQuestion:
     """
     抽取的问题数据模型
     """
     
+    __slots__ = ("question", "context", "emotion", "priority", "timestamp")
+    
     def __init__(
         self,
         question: str,
         context: str = "",
         emotion: str = CustomerEmotions.NEUTRAL,
-        priority: int = 1
+        priority: int = 1,
+        timestamp: datetime = None
     ):
         self.question = question          # 问题内容
         self.context = context            # 问题上下文
         self.emotion = emotion            # 客户情绪
         self.priority = priority          # 问题优先级
-        self.timestamp = datetime.now()    # 时间戳
+        self.timestamp = timestamp or datetime.now()  # 时间戳
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -75,9 +108,7 @@ class QuestionExtractor(LoggerMixin):
             List[ExtractedQuestion]: 抽取的问题列表
         """
         try:
-            prompt = PromptTemplates.KNOWLEDGE_BASE_EXTRACT.format(
-                conversation=conversation
-            )
+            prompt = "".join((_EXTRACT_PROMPT_PREFIX, conversation, _EXTRACT_PROMPT_SUFFIX))
             
             response = self.llm_client.generate_text(prompt)
             
@@ -102,21 +133,7 @@ class QuestionExtractor(LoggerMixin):
             Dict[str, Any]: 关键信息字典
         """
         try:
-            prompt = f"""
-请从以下客户对话中提取关键信息：
-
-对话内容：
-{conversation}
-
-请按照以下JSON格式输出：
-{{
-    "customer_id": "客户ID（如果有）",
-    "product": "涉及的产品类型",
-    "main_topic": "主要话题",
-    "key_entities": ["关键实体列表"],
-    "emotion": "客户情绪"
-}}
-            """
+            prompt = _KEY_INFO_PREFIX + conversation
             
             response = self.llm_client.generate_text(prompt)
             
@@ -149,62 +166,146 @@ class QuestionExtractor(LoggerMixin):
             results.append(questions)
         return results
     
-    def _parse_extraction_response(
+    async def aextract_questions(
         self,
-        response: str
+        conversation: str,
+        max_questions: int = 5
     ) -> List[ExtractedQuestion]:
-        """解析抽取响应"""
-        questions = []
-        lines = response.strip().split('\n')
+        """
+        异步抽取问题，在线程池中执行且受全局大模型并发数限制
         
-        current_question = None
-        current_context = ""
+        Args:
+            conversation (str): 对话内容
+            max_questions (int): 最大抽取问题数量
+            
+        Returns:
+            List[ExtractedQuestion]: 抽取的问题列表
+        """
+        return await run_blocking_llm_call(self.extract_questions, conversation, max_questions)
+    
+    async def abatch_extract(
+        self,
+        conversations: List[str],
+        max_questions: int = 5
+    ) -> List[List[ExtractedQuestion]]:
+        """
+        异步批量处理对话，各对话并发抽取
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
+        Args:
+            conversations (List[str]): 对话列表
+            max_questions (int): 最大抽取问题数量
             
-            if line.startswith('1.') or line.startswith('主要问题'):
-                if current_question:
-                    questions.append(ExtractedQuestion(
-                        question=current_question,
-                        context=current_context
-                    ))
-                current_question = line.split(':', 1)[1].strip() if ':' in line else line
-                current_context = ""
-            elif line.startswith('2.') or line.startswith('相关信息'):
-                current_context = line.split(':', 1)[1].strip() if ':' in line else ""
-            elif line.startswith('3.') or line.startswith('客户情绪'):
-                emotion = line.split(':', 1)[1].strip() if ':' in line else ""
-                if current_question:
-                    questions.append(ExtractedQuestion(
-                        question=current_question,
-                        context=current_context,
-                        emotion=emotion
-                    ))
-                    current_question = None
-                    current_context = ""
+        Returns:
+            List[List[ExtractedQuestion]]: 与输入顺序一致的问题列表
+        """
+        return list(await asyncio.gather(
+            *(self.aextract_questions(c, max_questions) for c in conversations)
+        ))
+    
+    def extract_questions_bulk(
+        self,
+        conversations: List[str],
+        max_questions: int = 5,
+        batch_size: int = BULK_EXTRACT_BATCH_SIZE
+    ) -> List[List[ExtractedQuestion]]:
+        """
+        批量抽取问题，将多段对话合并到同一个提示词中
+        
+        Args:
+            conversations (List[str]): 对话列表
+            max_questions (int): 每段对话最大抽取问题数量
+            batch_size (int): 单个提示词最多合并的对话数
+            
+        Returns:
+            List[List[ExtractedQuestion]]: 与输入顺序一致的问题列表
+        """
+        if len(conversations) == 1:
+            return [self.extract_questions(conversations[0], max_questions)]
+        
+        results = []
+        for start in range(0, len(conversations), batch_size):
+            chunk = conversations[start:start + batch_size]
+            results.extend(self._extract_chunk(chunk, max_questions))
+        return results
+    
+    def _extract_chunk(
+        self,
+        conversations: List[str],
+        max_questions: int
+    ) -> List[List[ExtractedQuestion]]:
+        """用一次大模型调用抽取一组对话的问题"""
+        try:
+            prompt = PromptTemplates.KNOWLEDGE_BASE_EXTRACT_BULK.format(
+                count=len(conversations),
+                max_questions=max_questions,
+                last_index=len(conversations) - 1,
+                conversations="\n\n".join(
+                    f"[{i}]:\n{conversation}"
+                    for i, conversation in enumerate(conversations)
+                )
+            )
+            
+            response = self.llm_client.generate_text(prompt)
+            rows = self._parse_bulk_response(response, len(conversations), max_questions)
+            
+        except Exception as e:
+            self.logger.error(f"批量问题抽取失败: {str(e)}")
+            return [[] for _ in conversations]
         
-        # 添加最后一个问题
-        if current_question:
-            questions.append(ExtractedQuestion(
-                question=current_question,
-                context=current_context
-            ))
+        if rows is None:
+            # 返回格式无法解析时，逐条抽取
+            self.logger.warning("批量抽取结果解析失败，改为逐条抽取")
+            return [self.extract_questions(c, max_questions) for c in conversations]
         
-        return questions
+        self.logger.info(f"批量抽取完成，共 {len(conversations)} 段对话")
+        return rows
+    
+    def _parse_bulk_response(
+        self,
+        response: str,
+        count: int,
+        max_questions: int
+    ) -> Optional[List[List[ExtractedQuestion]]]:
+        """解析批量抽取响应，无法解析时返回None"""
+        data = JSONUtils.extract(response, list)
+        if data is None:
+            return None
+        
+        timestamp = datetime.now()
+        rows = [[] for _ in range(count)]
+        for position, row in enumerate(data):
+            if not isinstance(row, dict):
+                continue
+            index = row.get("index", position)
+            if not isinstance(index, int) or not 0 <= index < count:
+                continue
+            for item in row.get("questions", [])[:max_questions]:
+                if isinstance(item, dict) and item.get("question"):
+                    rows[index].append(ExtractedQuestion(
+                        question=item["question"],
+                        context=item.get("context", ""),
+                        emotion=item.get("emotion") or CustomerEmotions.NEUTRAL,
+                        timestamp=timestamp
+                    ))
+        return rows
+    
+    def _parse_extraction_response(
+        self,
+        response: str
+    ) -> List[ExtractedQuestion]:
+        """解析抽取响应"""
+        timestamp = datetime.now()
+        return [
+            ExtractedQuestion(
+                question=m["q"],
+                context=m["ctx"] or "",
+                emotion=m["emo"] or CustomerEmotions.NEUTRAL,
+                timestamp=timestamp
+            )
+            for m in _EXTRACT_RE.finditer(response)
+            if m["q"]
+        ]
     
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """解析JSON响应"""
-        import re
-        import json as json_lib
-        
-        # 提取JSON内容
-        json_match = re.search(r'\{[\s\S]*\}', response)
-        if json_match:
-            try:
-                return json_lib.loads(json_match.group())
-            except json_lib.JSONDecodeError:
-                pass
-        return {}
+        return JSONUtils.extract(response) or {}
@@ -3,23 +3,68 @@
 自动生成标准问题和相似问题
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
 from core.vector_db import VectorDBClient
 from utils.logger import LoggerMixin
-from config.constants import PromptTemplates, QuestionTypes
+from utils.helpers import JSONUtils
+from config.settings import settings
+from config.constants import PromptTemplates, QuestionTypes, VALIDATE_QUESTIONS_BATCH_SIZE
+from .intent_cache import IntentCache
 
 logger = logging.getLogger(__name__)
 
+# 列表项：可选的 "1." / "1)" 序号或 "-" / "*" 列表符号，捕获其后的内容
+_LIST_ITEM_RE = re.compile(r"^[ \t]*(?:\d+[.)](?!\d)|[-*])?[ \t]*(.*?)\s*$", re.M)
+
+# 评分响应中的第一个数字
+_SCORE_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+@lru_cache(maxsize=1024)
+def _build_question_prompt(topic: str, count: int) -> str:
+    """构建标准问题生成提示词，热门主题直接复用格式化结果"""
+    return PromptTemplates.QUESTION_GENERATE.format(topic=topic, count=count)
+
+
+@lru_cache(maxsize=1024)
+def _build_scored_question_prompt(topic: str, count: int) -> str:
+    """构建带评分的标准问题生成提示词"""
+    return PromptTemplates.QUESTION_GENERATE_SCORED.format(topic=topic, count=count)
+
+
+@lru_cache(maxsize=1024)
+def _build_faq_prompt(topic: str, count: int) -> str:
+    """构建FAQ问题生成提示词"""
+    return f"""
+请生成关于"{topic}"的{count}个常见问题（FAQ）。
+
+要求：
+1. 问题应覆盖该主题的各个方面
+2. 问题应简洁明了
+3. 问题应具有代表性
+
+FAQ问题列表：
+            """
+
+
+# 相似问生成以原问题为缓存键，措辞差异即可能改变语义，使用更严格的阈值
+_SIMILAR_QUESTION_SIMILARITY = 0.97
+
 
 class QuestionValidation:
     """
     问题验证结果数据模型
     """
     
+    __slots__ = ("question", "is_valid", "reason", "score")
+    
     def __init__(
         self,
         question: str,
@@ -51,7 +96,8 @@ class QuestionGenerator(LoggerMixin):
     def __init__(
         self,
         llm_client: LLMClient,
-        vector_db: VectorDBClient = None
+        vector_db: VectorDBClient = None,
+        cache: IntentCache = None
     ):
         """
         初始化问题生成器
@@ -59,9 +105,15 @@ class QuestionGenerator(LoggerMixin):
         Args:
             llm_client (LLMClient): 大模型客户端
             vector_db (VectorDBClient): 向量数据库客户端
+            cache (IntentCache): 生成结果缓存，默认使用大模型客户端的向量化接口做语义匹配
         """
         self.llm_client = llm_client
         self.vector_db = vector_db
+        self.cache = cache if cache is not None else IntentCache(
+            embed_fn=llm_client.embedding,
+            similarity_threshold=settings.GENERATION_CACHE_SIMILARITY,
+            ttl=settings.GENERATION_CACHE_TTL
+        )
         self.logger.info("问题生成器初始化完成")
     
     def generate_standard_questions(
@@ -82,12 +134,9 @@ class QuestionGenerator(LoggerMixin):
             List[str]: 标准问题列表
         """
         try:
-            prompt = PromptTemplates.QUESTION_GENERATE.format(
-                topic=topic,
-                count=count
-            )
+            prompt = _build_question_prompt(topic, count)
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(topic, f"question:standard:{count}", prompt)
             
             # 解析返回结果
             questions = self._parse_questions(response)
@@ -130,7 +179,12 @@ class QuestionGenerator(LoggerMixin):
 相似问题：
             """
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(
+                question,
+                f"question:similar:{count}",
+                prompt,
+                similarity_threshold=_SIMILAR_QUESTION_SIMILARITY
+            )
             
             # 解析返回结果
             questions = self._parse_questions(response)
@@ -138,7 +192,7 @@ class QuestionGenerator(LoggerMixin):
             # 如果有向量数据库，可以进行相似性验证
             if self.vector_db:
                 questions = self._filter_similar_questions(
-                    question, questions, count
+                    question, questions, count, category
                 )
             
             self.logger.info(f"生成了 {len(questions)} 个相似问题")
@@ -164,18 +218,9 @@ class QuestionGenerator(LoggerMixin):
             List[str]: FAQ问题列表
         """
         try:
-            prompt = f"""
-请生成关于"{topic}"的{count}个常见问题（FAQ）。
-
-要求：
-1. 问题应覆盖该主题的各个方面
-2. 问题应简洁明了
-3. 问题应具有代表性
-
-FAQ问题列表：
-            """
+            prompt = _build_faq_prompt(topic, count)
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(topic, f"question:faq:{count}", prompt)
             questions = self._parse_questions(response)
             
             self.logger.info(f"生成了 {len(questions)} 个FAQ问题")
@@ -185,6 +230,75 @@ FAQ问题列表：
             self.logger.error(f"FAQ问题生成失败: {str(e)}")
             return []
     
+    def iter_faq_questions(
+        self,
+        topic: str,
+        count: int = 10
+    ) -> Iterator[str]:
+        """
+        流式生成FAQ问题，每生成完一行即返回一个问题（不经过生成结果缓存）
+        
+        Args:
+            topic (str): 主题
+            count (int): 生成数量
+            
+        Yields:
+            str: FAQ问题
+        """
+        try:
+            yield from self._iter_questions(
+                self.llm_client.stream_text(_build_faq_prompt(topic, count))
+            )
+        except Exception as e:
+            self.logger.error(f"FAQ问题流式生成失败: {str(e)}")
+    
+    async def agenerate_standard_questions(
+        self,
+        topic: str,
+        count: int = 5,
+        category: str = None
+    ) -> List[str]:
+        """异步生成标准问题，在线程池中执行且受全局大模型并发数限制"""
+        return await run_blocking_llm_call(self.generate_standard_questions, topic, count, category)
+    
+    async def agenerate_similar_questions(
+        self,
+        question: str,
+        count: int = 5,
+        category: str = None
+    ) -> List[str]:
+        """异步生成相似问题"""
+        return await run_blocking_llm_call(self.generate_similar_questions, question, count, category)
+    
+    async def agenerate_faq_questions(
+        self,
+        topic: str,
+        count: int = 10
+    ) -> List[str]:
+        """异步生成FAQ问题"""
+        return await run_blocking_llm_call(self.generate_faq_questions, topic, count)
+    
+    async def agenerate_question_set(
+        self,
+        topic: str,
+        count: int = 5
+    ) -> Dict[str, List[str]]:
+        """
+        并发生成同一主题的标准问题和FAQ问题
+        
+        Args:
+            topic (str): 主题
+            count (int): 每类生成数量
+            
+        Returns:
+            Dict[str, List[str]]: 按问题类型分组的问题列表
+        """
+        standard, faq = await asyncio.gather(
+            self.agenerate_standard_questions(topic, count),
+            self.agenerate_faq_questions(topic, count)
+        )
+        return {QuestionTypes.STANDARD: standard, QuestionTypes.FAQ: faq}
+    
     def validate_questions(
         self,
         questions: List[str],
@@ -200,24 +314,114 @@ FAQ问题列表：
         Returns:
             List[QuestionValidation]: 验证结果列表
         """
-        validations = []
+        validations = [self._check_question(question) for question in questions]
         
-        for question in questions:
-            validation = QuestionValidation(question=question)
+        # 未通过基本验证的问题无需评估，其余问题分批合并为一次大模型调用评分
+        pending = [v for v in validations if v.is_valid]
+        for start in range(0, len(pending), VALIDATE_QUESTIONS_BATCH_SIZE):
+            chunk = pending[start:start + VALIDATE_QUESTIONS_BATCH_SIZE]
+            scores = self._score_chunk([v.question for v in chunk], topic)
             
-            # 基本验证
-            if not question or len(question.strip()) == 0:
-                validation.is_valid = False
-                validation.reason = "问题为空"
-                validation.score = 0.0
-            elif len(question) > 200:
+            for validation, score in zip(chunk, scores):
+                self._apply_score(validation, score)
+        
+        self.logger.info(f"验证了 {len(validations)} 个问题")
+        return validations
+    
+    def generate_standard_questions_with_scores(
+        self,
+        topic: str,
+        count: int = 5
+    ) -> List[QuestionValidation]:
+        """
+        生成标准问题并同时评估质量，一次大模型调用完成生成和验证
+        
+        返回格式无法解析时，退化为 generate_standard_questions + validate_questions
+        
+        Args:
+            topic (str): 主题
+            count (int): 生成数量
+            
+        Returns:
+            List[QuestionValidation]: 带评分的问题列表
+        """
+        try:
+            prompt = _build_scored_question_prompt(topic, count)
+            
+            response = self._cached_generate(topic, f"question:standard_scored:{count}", prompt)
+            data = JSONUtils.extract(response, list)
+            
+        except Exception as e:
+            self.logger.error(f"标准问题生成失败: {str(e)}")
+            return []
+        
+        if data is None:
+            self.logger.warning("带评分的问题生成结果解析失败，改为先生成后验证")
+            questions = self.generate_standard_questions(topic, count)
+            return self.validate_questions(questions, topic)
+        
+        validations = []
+        for item in data:
+            if not isinstance(item, dict) or not isinstance(item.get("question"), str):
+                continue
+            validation = self._check_question(item["question"].strip())
+            if validation.is_valid:
+                score = item.get("score")
+                valid_score = isinstance(score, (int, float)) and not isinstance(score, bool) and 0 <= score <= 1
+                self._apply_score(validation, float(score) if valid_score else None)
+            validations.append(validation)
+        
+        self.logger.info(f"生成了 {len(validations)} 个带评分的标准问题")
+        return validations
+    
+    def _check_question(self, question: str) -> QuestionValidation:
+        """基本验证（无需大模型）"""
+        if not question or not question.strip():
+            return QuestionValidation(question, False, "问题为空", 0.0)
+        if len(question) > 200:
+            return QuestionValidation(question, False, "问题过长", 0.5)
+        return QuestionValidation(question)
+    
+    def _apply_score(self, validation: QuestionValidation, score: Optional[float]):
+        """写入大模型评分，评分过低时标记为无效"""
+        if score is not None:
+            validation.score = score
+            if score < 0.6:
                 validation.is_valid = False
-                validation.reason = "问题过长"
-                validation.score = 0.5
+                validation.reason = f"质量评分过低 ({score:.2f})"
+    
+    def _score_chunk(
+        self,
+        questions: List[str],
+        topic: str = None
+    ) -> List[Optional[float]]:
+        """用一次大模型调用评估一组问题的质量，单项无法解析时为None"""
+        try:
+            prompt = PromptTemplates.QUESTION_VALIDATE_BATCH.format(
+                count=len(questions),
+                topic=topic or "未指定",
+                last_index=len(questions) - 1,
+                questions="\n".join(f"[{i}] {question}" for i, question in enumerate(questions))
+            )
+            
+            response = self.llm_client.generate_text(prompt)
+            scores = self._parse_batch_scores(response, len(questions))
             
-            # 使用LLM进行质量评估
-            try:
-                prompt = f"""
+        except Exception as e:
+            self.logger.warning(f"问题质量批量评估失败: {str(e)}")
+            return [None] * len(questions)
+        
+        if scores is None:
+            # 返回格式无法解析时，逐条评估
+            self.logger.warning("批量评估结果解析失败，改为逐条评估")
+            return [self._score_question(question, topic) for question in questions]
+        
+        return scores
+    
+    def _score_question(self, question: str, topic: str = None) -> Optional[float]:
+        """评估单个问题的质量"""
+        try:
+            prompt = f"""
 请评估以下问题的质量（0-1分）：
 
 问题：{question}
@@ -229,80 +433,110 @@ FAQ问题列表：
 3. 简洁性 - 问题是否简洁
 
 请直接输出评分（0-1之间的数字）：
-                """
-                
-                response = self.llm_client.generate_text(prompt)
-                score = self._parse_score(response)
-                
-                if score is not None:
-                    validation.score = score
-                    if score < 0.6:
-                        validation.is_valid = False
-                        validation.reason = f"质量评分过低 ({score:.2f})"
-                        
-            except Exception as e:
-                self.logger.warning(f"问题质量评估失败: {str(e)}")
+            """
             
-            validations.append(validation)
+            response = self.llm_client.generate_text(prompt)
+            return self._parse_score(response)
+            
+        except Exception as e:
+            self.logger.warning(f"问题质量评估失败: {str(e)}")
+            return None
+    
+    def _parse_batch_scores(self, response: str, count: int) -> Optional[List[Optional[float]]]:
+        """解析批量评分响应，数量不符或无法解析时返回None"""
+        data = JSONUtils.extract(response, list)
+        if data is None or len(data) != count:
+            return None
         
-        self.logger.info(f"验证了 {len(validations)} 个问题")
-        return validations
+        return [
+            float(score)
+            if isinstance(score, (int, float)) and not isinstance(score, bool) and 0 <= score <= 1
+            else None
+            for score in data
+        ]
     
-    def _parse_questions(self, response: str) -> List[str]:
-        """解析问题列表"""
-        questions = []
-        lines = response.strip().split('\n')
+    def _cached_generate(
+        self,
+        key: str,
+        scope: str,
+        prompt: str,
+        similarity_threshold: float = None
+    ) -> str:
+        """
+        生成文本，相同或语义相近的输入直接复用缓存的大模型响应
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # 去除序号
-            if line[0].isdigit() and '.' in line:
-                line = line.split('.', 1)[1].strip()
-            elif line[0] == '-' or line[0] == '*':
-                line = line[1:].strip()
+        Args:
+            key (str): 缓存匹配文本（提示词中的可变部分，如主题）
+            scope (str): 缓存作用域（提示词模板及其固定参数）
+            prompt (str): 完整提示词
+            similarity_threshold (float): 语义命中阈值，为空时使用缓存默认阈值
             
-            if line:
-                questions.append(line)
+        Returns:
+            str: 大模型响应文本
+        """
+        return self.cache.get_or_compute(
+            key,
+            scope,
+            lambda: self.llm_client.generate_text(prompt),
+            similarity_threshold=similarity_threshold
+        )
+    
+    def _parse_questions(self, response: str) -> List[str]:
+        """解析问题列表（去除序号和列表符号）"""
+        return [q for q in _LIST_ITEM_RE.findall(response) if q]
+    
+    def _iter_questions(self, chunks: Iterable[str]) -> Iterator[str]:
+        """从流式文本片段中逐行解析问题，规则与 _parse_questions 一致"""
+        buffer = ""
+        for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                question = _LIST_ITEM_RE.match(line).group(1)
+                if question:
+                    yield question
         
-        return questions
+        question = _LIST_ITEM_RE.match(buffer).group(1)
+        if question:
+            yield question
     
     def _parse_score(self, response: str) -> Optional[float]:
-        """解析评分"""
-        import re
-        numbers = re.findall(r'0\.\d+|\d+\.\d+|\d+', response)
-        if numbers:
-            try:
-                score = float(numbers[0])
-                if 0 <= score <= 1:
-                    return score
-            except ValueError:
-                pass
+        """解析评分（只取第一个数字）"""
+        match = _SCORE_RE.search(response)
+        if match:
+            score = float(match.group())
+            if 0 <= score <= 1:
+                return score
         return None
     
     def _filter_similar_questions(
         self,
         original: str,
         questions: List[str],
-        count: int
+        count: int,
+        category: str = None
     ) -> List[str]:
         """过滤相似问题"""
         try:
             results = self.vector_db.query_with_score(
                 query_text=original,
-                n_results=count + 5
+                n_results=count + 5,
+                where={"category": category} if category else None,
+                max_distance=0.9  # 相似度阈值
             )
             
-            # 获取与原问题不太相似的问题
+            # 结果按距离排序，去重后取够数量即停止
+            seen = set()
             filtered = []
             for result in results:
-                if result.get("distance", 1.0) < 0.9:  # 相似度阈值
-                    if result["document"] not in filtered:
-                        filtered.append(result["document"])
+                document = result["document"]
+                if document not in seen:
+                    seen.add(document)
+                    filtered.append(document)
+                    if len(filtered) >= count:
+                        break
             
-            return filtered[:count]
+            return filtered
             
         except Exception as e:
             self.logger.warning(f"相似问题过滤失败: {str(e)}")
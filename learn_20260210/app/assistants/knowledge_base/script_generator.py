@@ -4,35 +4,117 @@
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
 from utils.logger import LoggerMixin
+from config.settings import settings
 from config.constants import PromptTemplates, ScriptTypes, CustomerTypes
+from .intent_cache import IntentCache
 
 logger = logging.getLogger(__name__)
 
 
+def _compile_slot_markers(
+    slots: Sequence[Tuple[str, Sequence[str]]]
+) -> Tuple["re.Pattern", Dict[str, Tuple[int, str]]]:
+    """
+    将各部分的标记编译为一个正则，一次扫描即可找出一行中的全部标记
+    
+    Args:
+        slots (Sequence[Tuple[str, Sequence[str]]]): (部分名称, 标记列表)，按匹配优先级排列；
+            以数字开头的标记（如"1."）只匹配行首
+            
+    Returns:
+        Tuple[re.Pattern, Dict[str, Tuple[int, str]]]: 标记正则，以及标记到(优先级, 部分名称)的映射
+    """
+    ranks = {}
+    alternatives = []
+    for rank, (slot, markers) in enumerate(slots):
+        for marker in markers:
+            ranks[marker] = (rank, slot)
+            alternatives.append(("^" if marker[0].isdigit() else "") + re.escape(marker))
+    return re.compile("|".join(alternatives)), ranks
+
+
+@lru_cache(maxsize=1024)
+def _build_call_script_prompt(scenario: str, customer_type: str) -> str:
+    """构建电话话术生成提示词，热门场景直接复用格式化结果"""
+    return PromptTemplates.SCRIPT_GENERATE.format(scenario=scenario, customer_type=customer_type)
+
+
+# 话术中的 {字段名} 占位符
+_PLACEHOLDER_RE = re.compile(r"\{([^{}]+)\}")
+
+# 话术各部分的标记，按优先级排列：一行同时命中多个部分时取靠前的部分
+_CALL_SLOT_MARKERS = _compile_slot_markers((
+    ("greeting", ("1.", "问候", "开场")),
+    ("main_content", ("2.", "主要", "内容")),
+    ("closing", ("3.", "结束", "结尾"))
+))
+_COLLECTION_SLOT_MARKERS = _compile_slot_markers((
+    ("opening", ("1.", "开场")),
+    ("negotiation", ("2.", "协商", "说明")),
+    ("commitment_request", ("3.", "承诺", "请求"))
+))
+
+
+def _split_blocks(response: str) -> List[List[str]]:
+    """按空行将响应切分为话术块，每块为去除首尾空白后的非空行列表"""
+    blocks = []
+    current = []
+    for line in response.splitlines():
+        line = line.strip()
+        if line:
+            current.append(line)
+        elif current:
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _parse_slots(
+    lines: List[str],
+    markers: Tuple["re.Pattern", Dict[str, Tuple[int, str]]]
+) -> Dict[str, str]:
+    """按标记将话术块的各行归入对应部分，取冒号后的内容"""
+    pattern, ranks = markers
+    slots = {slot: "" for _, slot in ranks.values()}
+    for part in lines:
+        hits = pattern.findall(part)
+        if hits:
+            _, slot = min(ranks[hit] for hit in hits)
+            slots[slot] = part.split(':', 1)[1].strip() if ':' in part else part
+    return slots
+
+
 class CallScript:
     """
     电话话术数据模型
     """
     
+    __slots__ = ("greeting", "main_content", "closing", "scenario", "customer_type", "timestamp")
+    
     def __init__(
         self,
         greeting: str,
         main_content: str,
         closing: str,
         scenario: str,
-        customer_type: str = None
+        customer_type: str = None,
+        timestamp: datetime = None
     ):
         self.greeting = greeting          # 问候语
         self.main_content = main_content  # 主要内容
         self.closing = closing            # 结束语
         self.scenario = scenario          # 适用场景
         self.customer_type = customer_type  # 适用客户类型
-        self.timestamp = datetime.now()   # 创建时间
+        self.timestamp = timestamp or datetime.now()  # 创建时间
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -47,11 +129,7 @@ class CallScript:
     
     def format_full_script(self) -> str:
         """格式化完整话术"""
-        return f"""
-{greeting}
-{main_content}
-{closing}
-        """.strip()
+        return "\n".join(part for part in (self.greeting, self.main_content, self.closing) if part)
 
 
 class CollectionScript:
@@ -59,20 +137,23 @@ class CollectionScript:
     电催话术数据模型
     """
     
+    __slots__ = ("opening", "negotiation", "commitment_request", "risk_level", "overdue_days", "timestamp")
+    
     def __init__(
         self,
         opening: str,
         negotiation: str,
         commitment_request: str,
         risk_level: str = None,
-        overdue_days: int = None
+        overdue_days: int = None,
+        timestamp: datetime = None
     ):
         self.opening = opening                    # 开场白
         self.negotiation = negotiation            # 协商内容
         self.commitment_request = commitment_request  # 承诺请求
         self.risk_level = risk_level              # 风险等级
         self.overdue_days = overdue_days          # 逾期天数
-        self.timestamp = datetime.now()           # 创建时间
+        self.timestamp = timestamp or datetime.now()  # 创建时间
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -87,11 +168,9 @@ class CollectionScript:
     
     def format_full_script(self) -> str:
         """格式化完整话术"""
-        return f"""
-{opening}
-{negotiation}
-{commitment_request}
-        """.strip()
+        return "\n".join(
+            part for part in (self.opening, self.negotiation, self.commitment_request) if part
+        )
 
 
 class ScriptGenerator(LoggerMixin):
@@ -100,14 +179,20 @@ class ScriptGenerator(LoggerMixin):
     生成电话话术和电催话术
     """
     
-    def __init__(self, llm_client: LLMClient):
+    def __init__(self, llm_client: LLMClient, cache: IntentCache = None):
         """
         初始化话术生成器
         
         Args:
             llm_client (LLMClient): 大模型客户端
+            cache (IntentCache): 生成结果缓存，默认使用大模型客户端的向量化接口做语义匹配
         """
         self.llm_client = llm_client
+        self.cache = cache if cache is not None else IntentCache(
+            embed_fn=llm_client.embedding,
+            similarity_threshold=settings.GENERATION_CACHE_SIMILARITY,
+            ttl=settings.GENERATION_CACHE_TTL
+        )
         self.logger.info("话术生成器初始化完成")
     
     def generate_call_scripts(
@@ -130,12 +215,9 @@ class ScriptGenerator(LoggerMixin):
             List[CallScript]: 电话话术列表
         """
         try:
-            prompt = PromptTemplates.SCRIPT_GENERATE.format(
-                scenario=scenario,
-                customer_type=customer_type
-            )
+            prompt = _build_call_script_prompt(scenario, customer_type)
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(scenario, f"script:call:{customer_type}", prompt)
             
             # 解析返回结果
             scripts = self._parse_call_scripts(
@@ -181,7 +263,13 @@ class ScriptGenerator(LoggerMixin):
 请生成{count}个不同风格的话术：
             """
             
-            response = self.llm_client.generate_text(prompt)
+            # 参数均为枚举值，只做精确匹配
+            response = self.cache.get_or_compute(
+                f"{overdue_days}\x1f{customer_risk}",
+                f"script:collection:{count}",
+                lambda: self.llm_client.generate_text(prompt),
+                semantic=False
+            )
             
             # 解析返回结果
             scripts = self._parse_collection_scripts(
@@ -227,7 +315,11 @@ class ScriptGenerator(LoggerMixin):
 请生成{count}个话术：
             """
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(
+                complaint_type,
+                f"script:complaint:{customer_emotion}:{count}",
+                prompt
+            )
             scripts = self._parse_call_scripts(
                 response, complaint_type, customer_emotion
             )
@@ -239,6 +331,34 @@ class ScriptGenerator(LoggerMixin):
             self.logger.error(f"投诉处理话术生成失败: {str(e)}")
             return []
     
+    async def agenerate_call_scripts(
+        self,
+        scenario: str,
+        customer_type: str = CustomerTypes.REGULAR_CUSTOMER,
+        count: int = 3,
+        tone: str = "professional"
+    ) -> List[CallScript]:
+        """异步生成电话话术，在线程池中执行且受全局大模型并发数限制"""
+        return await run_blocking_llm_call(self.generate_call_scripts, scenario, customer_type, count, tone)
+    
+    async def agenerate_collection_scripts(
+        self,
+        overdue_days: int,
+        customer_risk: str = CustomerTypes.LOW_RISK,
+        count: int = 3
+    ) -> List[CollectionScript]:
+        """异步生成电催话术"""
+        return await run_blocking_llm_call(self.generate_collection_scripts, overdue_days, customer_risk, count)
+    
+    async def agenerate_complaint_scripts(
+        self,
+        complaint_type: str,
+        customer_emotion: str,
+        count: int = 3
+    ) -> List[CallScript]:
+        """异步生成投诉处理话术"""
+        return await run_blocking_llm_call(self.generate_complaint_scripts, complaint_type, customer_emotion, count)
+    
     def personalize_script(
         self,
         script: str,
@@ -257,24 +377,37 @@ class ScriptGenerator(LoggerMixin):
             str: 个性化后的话术
         """
         try:
+            customer_info = customer_info or {}
             name = customer_name or customer_info.get("name", "客户")
             
-            personalized = script.replace("{客户姓名}", name)
-            personalized = personalized.replace("{客户}", name)
-            
-            # 根据客户信息进一步个性化
-            if customer_info:
-                for key, value in customer_info.items():
-                    personalized = personalized.replace(
-                        f"{{{key}}}", str(value)
-                    )
+            # 客户信息字段与姓名占位符合并为一张映射表，一次扫描完成全部替换
+            mapping = {key: str(value) for key, value in customer_info.items()}
+            mapping["客户姓名"] = name
+            mapping["客户"] = name
             
-            return personalized
+            return _PLACEHOLDER_RE.sub(
+                lambda m: mapping.get(m.group(1), m.group(0)),
+                script
+            )
             
         except Exception as e:
             self.logger.error(f"话术个性化失败: {str(e)}")
             return script
     
+    def _cached_generate(self, key: str, scope: str, prompt: str) -> str:
+        """
+        生成文本，相同或语义相近的输入直接复用缓存的大模型响应
+        
+        Args:
+            key (str): 缓存匹配文本（提示词中的可变部分，如场景描述）
+            scope (str): 缓存作用域（提示词模板及其固定参数）
+            prompt (str): 完整提示词
+            
+        Returns:
+            str: 大模型响应文本
+        """
+        return self.cache.get_or_compute(key, scope, lambda: self.llm_client.generate_text(prompt))
+    
     def _parse_call_scripts(
         self,
         response: str,
@@ -283,36 +416,16 @@ class ScriptGenerator(LoggerMixin):
     ) -> List[CallScript]:
         """解析电话话术"""
         scripts = []
-        lines = response.strip().split('\n\n')
+        timestamp = datetime.now()
         
-        for block in lines:
-            if not block.strip():
-                continue
-            
-            parts = block.split('\n')
-            greeting = ""
-            main_content = ""
-            closing = ""
-            
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                if '问候' in part or '开场' in part or part.startswith('1.'):
-                    greeting = part.split(':', 1)[1].strip() if ':' in part else part
-                elif '主要' in part or '内容' in part or part.startswith('2.'):
-                    main_content = part.split(':', 1)[1].strip() if ':' in part else part
-                elif '结束' in part or '结尾' in part or part.startswith('3.'):
-                    closing = part.split(':', 1)[1].strip() if ':' in part else part
-            
-            if greeting or main_content:
+        for block in _split_blocks(response):
+            slots = _parse_slots(block, _CALL_SLOT_MARKERS)
+            if slots["greeting"] or slots["main_content"]:
                 scripts.append(CallScript(
-                    greeting=greeting,
-                    main_content=main_content,
-                    closing=closing,
+                    **slots,
                     scenario=scenario,
-                    customer_type=customer_type
+                    customer_type=customer_type,
+                    timestamp=timestamp
                 ))
         
         return scripts
@@ -325,36 +438,16 @@ class ScriptGenerator(LoggerMixin):
     ) -> List[CollectionScript]:
         """解析电催话术"""
         scripts = []
-        blocks = response.strip().split('\n\n')
+        timestamp = datetime.now()
         
-        for block in blocks:
-            if not block.strip():
-                continue
-            
-            parts = block.split('\n')
-            opening = ""
-            negotiation = ""
-            commitment_request = ""
-            
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                if '开场' in part or '开场白' in part or part.startswith('1.'):
-                    opening = part.split(':', 1)[1].strip() if ':' in part else part
-                elif '协商' in part or '说明' in part or part.startswith('2.'):
-                    negotiation = part.split(':', 1)[1].strip() if ':' in part else part
-                elif '承诺' in part or '请求' in part or part.startswith('3.'):
-                    commitment_request = part.split(':', 1)[1].strip() if ':' in part else part
-            
-            if opening or negotiation:
+        for block in _split_blocks(response):
+            slots = _parse_slots(block, _COLLECTION_SLOT_MARKERS)
+            if slots["opening"] or slots["negotiation"]:
                 scripts.append(CollectionScript(
-                    opening=opening,
-                    negotiation=negotiation,
-                    commitment_request=commitment_request,
+                    **slots,
                     risk_level=risk_level,
-                    overdue_days=overdue_days
+                    overdue_days=overdue_days,
+                    timestamp=timestamp
                 ))
         
         return scripts
@@ -5,6 +5,7 @@
 from .conversation_parser import ConversationParser, ParsedConversation, DialogueTurn
 from .speech_to_text import SpeechToTextProcessor, TranscriptionResult
 from .auto_inspector import AutoInspector, InspectionReport, QualityIssue
+from .inspection_cache import InspectionCache
 from .report_generator import ReportGenerator, ReviewWorkflow
 
 __all__ = [
@@ -16,6 +17,7 @@ __all__ = [
     "AutoInspector",
     "InspectionReport",
     "QualityIssue",
+    "InspectionCache",
     "ReportGenerator",
     "ReviewWorkflow"
 ]
@@ -3,22 +3,86 @@
 基于大模型进行客服对话质量检查
 """
 
+import asyncio
+import copy
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from html import escape
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
+from core.response_cache import ResponseCache
+from .inspection_cache import InspectionCache
+from utils.helpers import JSONUtils
 from utils.logger import LoggerMixin
+from config.settings import settings
 from config.constants import PromptTemplates, InspectionDimensions, IssueSeverity
 
 logger = logging.getLogger(__name__)
 
+# 合并质检模板的版本，模板修改后持久化缓存中的旧结果自动失效
+_RUBRIC_VERSION = hashlib.blake2b(
+    PromptTemplates.QUALITY_INSPECT_COMBINED.encode("utf-8"), digest_size=8
+).hexdigest()
+
+# 保留最近质检结果的对话数，供服务态度评估/合规性检查直接复用
+_COMBINED_RESULT_CACHE_SIZE = 256
+
+# 文本质检响应中的各项评分与总结，一次扫描同时匹配
+_SCORE_LABELS = {
+    "总体评分": "overall",
+    "服务态度": "attitude",
+    "专业性": "professionalism",
+    "合规性": "compliance",
+}
+_SCORE_SUMMARY_RE = re.compile(
+    r'(?P<label>总体评分|服务态度|专业性|合规性)[：:\s]*(?P<score>\d+\.?\d*)'
+    r'|总结[：:\s]*(?P<summary>.+?)$',
+    re.MULTILINE
+)
+# 行首带序号的条目，如 "1. 回复不够热情"
+_ISSUE_ITEM_RE = re.compile(r'^\s*\d+\.(?!\d)\s*(.+)', re.MULTILINE)
+
+# 模型未按JSON输出时用于判断是否存在违规的关键词
+_COMPLIANCE_KEYWORDS = ("违规", "不合规")
+
+# HTML报告样式，严重程度通过 _SEVERITY_CSS 映射到对应的样式类
+_REPORT_CSS = """
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        h1 { color: #333; }
+        .score { font-size: 24px; font-weight: bold; }
+        .pass { color: green; }
+        .fail { color: red; }
+        .issue { margin: 10px 0; padding: 10px; border-left: 3px solid #ddd; }
+        .high { border-left-color: red; }
+        .medium { border-left-color: orange; }
+        .low { border-left-color: green; }
+    """
+_SEVERITY_CSS = {
+    IssueSeverity.LOW: "low",
+    IssueSeverity.MEDIUM: "medium",
+    IssueSeverity.HIGH: "high",
+    IssueSeverity.CRITICAL: "high",
+}
+
+_SEVERITIES = frozenset((
+    IssueSeverity.LOW, IssueSeverity.MEDIUM, IssueSeverity.HIGH, IssueSeverity.CRITICAL
+))
+
 
 class QualityIssue:
     """
     质量问题数据模型
     """
     
+    __slots__ = ("issue_type", "description", "severity", "location", "suggestion", "evidence", "detected_at")
+    
     def __init__(
         self,
         issue_type: str,
@@ -54,6 +118,11 @@ class InspectionReport:
     质检报告数据模型
     """
     
+    __slots__ = (
+        "session_id", "overall_score", "attitude_score", "professionalism_score",
+        "compliance_score", "issues", "summary", "generated_at"
+    )
+    
     def __init__(
         self,
         session_id: str,
@@ -88,36 +157,27 @@ class InspectionReport:
     
     def to_html(self) -> str:
         """转换为HTML格式"""
-        issues_html = ""
-        for issue in self.issues:
-            issues_html += f'''
-            <div class="issue {issue.severity}">
-                <strong>{issue.issue_type}</strong> ({issue.severity})
-                <p>{issue.description}</p>
-                <p><em>建议: {issue.suggestion}</em></p>
+        issues_html = "".join([
+            f'''
+            <div class="issue {_SEVERITY_CSS.get(issue.severity, "medium")}">
+                <strong>{escape(str(issue.issue_type))}</strong> ({escape(str(issue.severity))})
+                <p>{escape(str(issue.description))}</p>
+                <p><em>建议: {escape(str(issue.suggestion))}</em></p>
             </div>
             '''
+            for issue in self.issues
+        ])
         
-        html = f"""
+        return f"""
 <!DOCTYPE html>
 <html>
 <head>
-    <title>质检报告 - {self.session_id}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        h1 {{ color: #333; }}
-        .score {{ font-size: 24px; font-weight: bold; }}
-        .pass {{ color: green; }}
-        .fail {{ color: red; }}
-        .issue {{ margin: 10px 0; padding: 10px; border-left: 3px solid #ddd; }}
-        .high {{ border-left-color: red; }}
-        .medium {{ border-left-color: orange; }}
-        .low {{ border-left-color: green; }}
-    </style>
+    <title>质检报告 - {escape(str(self.session_id))}</title>
+    <style>{_REPORT_CSS}</style>
 </head>
 <body>
     <h1>质检报告</h1>
-    <p>会话ID: {self.session_id}</p>
+    <p>会话ID: {escape(str(self.session_id))}</p>
     <p>总体评分: <span class="score {'pass' if self.overall_score >= 60 else 'fail'}">{self.overall_score:.1f}分</span></p>
     <h2>各项评分</h2>
     <ul>
@@ -128,11 +188,10 @@ class InspectionReport:
     <h2>发现问题</h2>
     {issues_html}
     <h2>总结</h2>
-    <p>{self.summary}</p>
+    <p>{escape(str(self.summary))}</p>
 </body>
 </html>
         """
-        return html
 
 
 class AutoInspector(LoggerMixin):
@@ -141,14 +200,44 @@ class AutoInspector(LoggerMixin):
     基于大模型进行客服对话质量检查
     """
     
-    def __init__(self, llm_client: LLMClient):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        response_cache: ResponseCache = None,
+        result_cache: ResponseCache = None,
+        max_workers: int = None,
+        persistent_cache: InspectionCache = None
+    ):
         """
         初始化自动化质检器
         
         Args:
             llm_client (LLMClient): 大模型客户端
+            response_cache (ResponseCache): 大模型原始响应缓存，提示词相同时直接复用响应
+            result_cache (ResponseCache): 合并质检结果缓存，重放或重复的对话直接复用解析结果
+            max_workers (int): 同步批量质检的默认线程数，默认为 settings.LLM_MAX_CONCURRENCY
+            persistent_cache (InspectionCache): 质检结果持久化缓存，
+                为空且配置了 INSPECTION_PERSIST_PATH 时自动创建
         """
         self.llm_client = llm_client
+        self.max_workers = max_workers or settings.LLM_MAX_CONCURRENCY
+        if persistent_cache is None and settings.INSPECTION_PERSIST_PATH:
+            persistent_cache = InspectionCache(settings.INSPECTION_PERSIST_PATH)
+        self.persistent_cache = persistent_cache
+        # 只做精确匹配：整段对话的语义相似度无法区分仅差一句违规话术的对话，
+        # 合规性和服务态度结论不能跨对话复用
+        self.response_cache = response_cache if response_cache is not None else ResponseCache(
+            ttl=settings.INSPECTION_CACHE_TTL,
+            max_size=settings.INSPECTION_CACHE_MAX_SIZE
+        )
+        self.result_cache = result_cache if result_cache is not None else ResponseCache(
+            ttl=settings.INSPECTION_CACHE_TTL,
+            max_size=settings.INSPECTION_CACHE_MAX_SIZE
+        )
+        # (会话ID, 对话文本摘要) -> 最近一次合并质检的原始结果；
+        # 多个对话可能共用同一会话ID（如 "unknown"），必须连同对话内容一起匹配
+        self._last_combined: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
         self.logger.info("自动化质检器初始化完成")
     
     def inspect_conversation(
@@ -158,6 +247,9 @@ class AutoInspector(LoggerMixin):
         """
         检查对话质量
         
+        总体评分、服务态度、专业性、合规性、问题与总结由一次大模型调用合并完成，
+        结果按会话ID和对话内容保留，随后对同一对话的服务态度评估和合规性检查直接复用
+        
         Args:
             conversation (ParsedConversation): 解析后的对话
             
@@ -165,20 +257,8 @@ class AutoInspector(LoggerMixin):
             InspectionReport: 质检报告
         """
         try:
-            # 转换对话为文本
-            conversation_text = self._format_conversation(conversation)
-            
-            # 进行质检
-            prompt = PromptTemplates.QUALITY_INSPECT.format(
-                conversation=conversation_text
-            )
-            
-            response = self.llm_client.generate_text(prompt)
-            
-            # 解析结果
-            report = self._parse_inspection_response(
-                response, conversation.session_id
-            )
+            result = self._inspect_combined(conversation)
+            report = self._build_report(result, conversation.session_id)
             
             self.logger.info(f"质检完成: 会话ID={conversation.session_id}, 评分={report.overall_score:.1f}")
             return report
@@ -192,42 +272,42 @@ class AutoInspector(LoggerMixin):
     
     def evaluate_service_attitude(
         self,
-        agent_responses: List[str]
+        agent_responses: List[str],
+        conversation: "ParsedConversation" = None
     ) -> Dict[str, Any]:
         """
         评估服务态度
         
         Args:
             agent_responses (List[str]): 客服回复列表
+            conversation (ParsedConversation): 回复所在的对话，该对话已质检过且包含全部回复时
+                直接复用质检结果，不再调用大模型
             
         Returns:
             Dict[str, Any]: 评估结果
         """
+        result = None
+        if conversation is not None:
+            conversation_text = conversation.formatted_text
+            if all(r in conversation_text for r in agent_responses):
+                result = self._get_combined(conversation)
+        if result is not None and "raw" not in result:
+            attitude = result.get("attitude")
+            if not isinstance(attitude, dict):
+                attitude = {"score": attitude}
+            return {
+                "score": self._to_score(attitude.get("score")),
+                "strengths": attitude.get("strengths", []),
+                "weaknesses": attitude.get("weaknesses", []),
+                "suggestions": attitude.get("suggestions", [])
+            }
+        
         try:
             responses_text = "\n".join(agent_responses)
             
-            prompt = f"""
-请评估以下客服回复的服务态度：
-
-客服回复：
-{responses_text}
-
-请从以下几个方面进行评估：
-1. 礼貌程度
-2. 热情度
-3. 耐心程度
-4. 同理心
-
-请按照JSON格式输出：
-{{
-    "score": 评分（0-100）,
-    "strengths": ["优点列表"],
-    "weaknesses": ["缺点列表"],
-    "suggestions": ["改进建议"]
-}}
-            """
+            prompt = PromptTemplates.SERVICE_ATTITUDE_EVALUATE.format(responses=responses_text)
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(prompt)
             return self._parse_json_response(response)
             
         except Exception as e:
@@ -241,6 +321,8 @@ class AutoInspector(LoggerMixin):
         """
         合规性检查
         
+        复用该对话最近一次质检的合并结果，尚未质检时发起一次合并质检
+        
         Args:
             conversation (ParsedConversation): 解析后的对话
             
@@ -248,25 +330,25 @@ class AutoInspector(LoggerMixin):
             Dict[str, Any]: 合规报告
         """
         try:
-            conversation_text = self._format_conversation(conversation)
-            
-            prompt = PromptTemplates.COMPLIANCE_CHECK.format(
-                conversation=conversation_text
-            )
-            
-            response = self.llm_client.generate_text(prompt)
-            
-            result = self._parse_json_response(response)
+            result = self._get_combined(conversation)
+            if result is None:
+                result = self._inspect_combined(conversation)
             
-            # 检查具体违规项
-            compliance_issues = []
-            if "违规" in response.lower() or "不合规" in response.lower():
-                compliance_issues.append("存在潜在的合规性问题")
+            if "raw" in result:
+                # 模型未按JSON输出时，沿用关键词判断是否存在违规
+                raw = result["raw"]
+                compliance = {"score": None}
+                violations = ["存在潜在的合规性问题"] if any(k in raw for k in _COMPLIANCE_KEYWORDS) else []
+            else:
+                compliance = result.get("compliance")
+                if not isinstance(compliance, dict):
+                    compliance = {"score": compliance}
+                violations = compliance.get("violations") or []
             
             return {
-                "score": result.get("score", 100),
-                "issues": compliance_issues,
-                "details": result
+                "score": self._to_score(compliance.get("score"), default=100.0),
+                "issues": [str(v) for v in violations] if isinstance(violations, list) else [str(violations)],
+                "details": compliance
             }
             
         except Exception as e:
@@ -295,22 +377,9 @@ class AutoInspector(LoggerMixin):
                 for issue in issues
             ])
             
-            prompt = f"""
-请根据以下客服对话中发现的问题，提供具体的改进建议：
-
-发现问题：
-{issues_text}
-
-请针对每个问题提供具体的改进建议，并按照JSON数组格式输出：
-[
-    {{
-        "issue": "问题类型",
-        "suggestion": "改进建议"
-    }}
-]
-            """
+            prompt = PromptTemplates.IMPROVEMENT_SUGGESTIONS.format(issues=issues_text)
             
-            response = self.llm_client.generate_text(prompt)
+            response = self._cached_generate(prompt)
             results = self._parse_json_array_response(response)
             
             return [
@@ -324,30 +393,195 @@ class AutoInspector(LoggerMixin):
     
     def batch_inspect(
         self,
-        conversations: List["ParsedConversation"]
+        conversations: List["ParsedConversation"],
+        max_concurrency: int = None
     ) -> List[InspectionReport]:
         """
-        批量质检
+        批量质检，各对话在线程池中并发执行
         
         Args:
             conversations (List[ParsedConversation]): 对话列表
+            max_concurrency (int): 最大并发数，默认为 self.max_workers
             
         Returns:
-            List[InspectionReport]: 质检报告列表
+            List[InspectionReport]: 与输入顺序一致的质检报告列表
         """
-        reports = []
-        for i, conversation in enumerate(conversations):
-            self.logger.info(f"质检第 {i+1}/{len(conversations)} 个对话")
-            report = self.inspect_conversation(conversation)
-            reports.append(report)
-        return reports
+        if len(conversations) <= 1:
+            return [self.inspect_conversation(c) for c in conversations]
+        
+        self.logger.info(f"批量质检 {len(conversations)} 个对话")
+        max_workers = min(len(conversations), max_concurrency or self.max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.inspect_conversation, conversations))
     
-    def _format_conversation(self, conversation: "ParsedConversation") -> str:
-        """格式化对话"""
-        return "\n".join([
-            f"{turn.speaker}: {turn.content}"
-            for turn in conversation.turns
-        ])
+    async def ainspect_conversation(
+        self,
+        conversation: "ParsedConversation"
+    ) -> InspectionReport:
+        """
+        异步检查对话质量，在线程池中执行且受全局大模型并发数限制
+        
+        Args:
+            conversation (ParsedConversation): 解析后的对话
+            
+        Returns:
+            InspectionReport: 质检报告
+        """
+        return await run_blocking_llm_call(self.inspect_conversation, conversation)
+    
+    async def abatch_inspect(
+        self,
+        conversations: List["ParsedConversation"],
+        max_concurrency: int = None
+    ) -> List[InspectionReport]:
+        """
+        异步批量质检，各对话并发执行
+        
+        Args:
+            conversations (List[ParsedConversation]): 对话列表
+            max_concurrency (int): 本批次最大并发数，为空时只受全局大模型并发数限制
+            
+        Returns:
+            List[InspectionReport]: 与输入顺序一致的质检报告列表
+        """
+        if not max_concurrency:
+            return list(await asyncio.gather(
+                *(self.ainspect_conversation(c) for c in conversations)
+            ))
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def inspect(conversation: "ParsedConversation") -> InspectionReport:
+            async with semaphore:
+                return await self.ainspect_conversation(conversation)
+        
+        return list(await asyncio.gather(*(inspect(c) for c in conversations)))
+    
+    def _inspect_combined(self, conversation: "ParsedConversation") -> Dict[str, Any]:
+        """
+        调用一次大模型完成全部质检项，并按会话ID和对话内容保留结果
+        
+        对话文本与已质检对话完全相同时直接复用其结果，不再调用大模型；
+        返回缓存结果的副本，调用方修改返回值不影响后续命中
+        
+        Args:
+            conversation (ParsedConversation): 解析后的对话
+            
+        Returns:
+            Dict[str, Any]: 合并质检结果；模型未返回JSON时为 {"raw": 原始响应}
+        """
+        conversation_text = conversation.formatted_text
+        
+        def compute() -> Dict[str, Any]:
+            persist_key = None
+            if self.persistent_cache is not None:
+                persist_key = InspectionCache.make_key(
+                    str(self.llm_client.model_name), _RUBRIC_VERSION, conversation_text
+                )
+                cached = self.persistent_cache.get(persist_key)
+                if cached is not None:
+                    return cached
+            
+            prompt = PromptTemplates.QUALITY_INSPECT_COMBINED.format(
+                conversation=conversation_text
+            )
+            response = self._cached_generate(prompt)
+            parsed = self._parse_json_response(response)
+            if not isinstance(parsed, dict) or "overall" not in parsed:
+                return {"raw": response}
+            
+            if persist_key is not None:
+                self.persistent_cache.set(persist_key, parsed)
+            return parsed
+        
+        result = self.result_cache.get_or_compute(
+            conversation_text,
+            str(self.llm_client.model_name),
+            compute
+        )
+        
+        key = self._combined_key(conversation)
+        with self._lock:
+            self._last_combined[key] = result
+            self._last_combined.move_to_end(key)
+            while len(self._last_combined) > _COMBINED_RESULT_CACHE_SIZE:
+                self._last_combined.popitem(last=False)
+        return copy.deepcopy(result)
+    
+    @staticmethod
+    def _combined_key(conversation: "ParsedConversation") -> Tuple[str, str]:
+        """合并质检结果的保留键：会话ID + 对话文本摘要"""
+        digest = hashlib.blake2b(
+            conversation.formatted_text.encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return conversation.session_id, digest
+    
+    def _get_combined(self, conversation: "ParsedConversation") -> Optional[Dict[str, Any]]:
+        """读取同一对话最近一次合并质检结果的副本"""
+        key = self._combined_key(conversation)
+        with self._lock:
+            result = self._last_combined.get(key)
+        return copy.deepcopy(result) if result is not None else None
+    
+    def _build_report(self, result: Dict[str, Any], session_id: str) -> InspectionReport:
+        """由合并质检结果构建质检报告，非JSON结果退化为文本解析"""
+        if "raw" in result:
+            return self._parse_inspection_response(result["raw"], session_id)
+        
+        attitude = result.get("attitude")
+        compliance = result.get("compliance")
+        issues = []
+        for item in result.get("issues") or []:
+            if not isinstance(item, dict) or not item.get("description"):
+                continue
+            severity = item.get("severity")
+            issues.append(QualityIssue(
+                issue_type=item.get("issue_type") or "服务问题",
+                description=str(item["description"])[:200],
+                severity=severity if severity in _SEVERITIES else IssueSeverity.MEDIUM,
+                location=item.get("location"),
+                suggestion=item.get("suggestion"),
+                evidence=item.get("evidence")
+            ))
+        
+        return InspectionReport(
+            session_id=session_id,
+            overall_score=self._to_score(result.get("overall")),
+            attitude_score=self._to_score(
+                attitude.get("score") if isinstance(attitude, dict) else attitude
+            ),
+            professionalism_score=self._to_score(result.get("professionalism")),
+            compliance_score=self._to_score(
+                compliance.get("score") if isinstance(compliance, dict) else compliance
+            ),
+            issues=issues,
+            summary=result.get("summary") or ""
+        )
+    
+    @staticmethod
+    def _to_score(value: Any, default: float = 0.0) -> float:
+        """将模型返回的评分转换为浮点数"""
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+    
+    def _cached_generate(self, prompt: str) -> str:
+        """
+        生成文本，提示词相同（忽略空白差异）时直接复用缓存的大模型响应
+        
+        Args:
+            prompt (str): 完整提示词
+            
+        Returns:
+            str: 大模型响应文本
+        """
+        key = " ".join(unicodedata.normalize("NFC", prompt).split())
+        return self.response_cache.get_or_compute(
+            key,
+            str(self.llm_client.model_name),
+            lambda: self.llm_client.generate_text(prompt)
+        )
     
     def _parse_inspection_response(
         self,
@@ -355,41 +589,22 @@ class AutoInspector(LoggerMixin):
         session_id: str
     ) -> InspectionReport:
         """解析质检响应"""
-        import re
-        
-        # 提取评分
-        overall_score = 0.0
-        attitude_score = 0.0
-        professionalism_score = 0.0
-        compliance_score = 0.0
-        
-        score_patterns = {
-            "overall": r'总体评分[：:\s]*(\d+\.?\d*)',
-            "attitude": r'服务态度[：:\s]*(\d+\.?\d*)',
-            "professionalism": r'专业性[：:\s]*(\d+\.?\d*)',
-            "compliance": r'合规性[：:\s]*(\d+\.?\d*)',
-        }
-        
-        for key, pattern in score_patterns.items():
-            match = re.search(pattern, response)
-            if match:
-                try:
-                    score = float(match.group(1))
-                    if key == "overall":
-                        overall_score = score
-                    elif key == "attitude":
-                        attitude_score = score
-                    elif key == "professionalism":
-                        professionalism_score = score
-                    elif key == "compliance":
-                        compliance_score = score
-                except ValueError:
-                    pass
+        # 单次扫描提取评分和总结，各项取第一次出现的值
+        scores = {}
+        summary = None
+        for match in _SCORE_SUMMARY_RE.finditer(response):
+            if match.lastgroup == "summary":
+                if summary is None:
+                    summary = match.group("summary").strip()
+                continue
+            key = _SCORE_LABELS[match.group("label")]
+            if key not in scores:
+                scores[key] = self._to_score(match.group("score"))
         
         # 提取问题
         issues = []
-        issue_blocks = re.split(r'\d+\.', response)
-        for block in issue_blocks[1:]:
+        for item in _ISSUE_ITEM_RE.finditer(response):
+            block = item.group(1)
             if "问题" in block or "不足" in block:
                 issue_type = "服务问题"
                 description = block.strip()[:200]
@@ -406,44 +621,20 @@ class AutoInspector(LoggerMixin):
                     severity=severity
                 ))
         
-        # 提取总结
-        summary = ""
-        summary_match = re.search(r'总结[：:\s]*(.+?)$', response, re.MULTILINE)
-        if summary_match:
-            summary = summary_match.group(1).strip()
-        
         return InspectionReport(
             session_id=session_id,
-            overall_score=overall_score,
-            attitude_score=attitude_score,
-            professionalism_score=professionalism_score,
-            compliance_score=compliance_score,
+            overall_score=scores.get("overall", 0.0),
+            attitude_score=scores.get("attitude", 0.0),
+            professionalism_score=scores.get("professionalism", 0.0),
+            compliance_score=scores.get("compliance", 0.0),
             issues=issues,
-            summary=summary
+            summary=summary or ""
         )
     
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """解析JSON响应"""
-        import re
-        import json
-        
-        json_match = re.search(r'\{[\s\S]*\}', response)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
-        return {}
+        return JSONUtils.extract(response) or {}
     
     def _parse_json_array_response(self, response: str) -> List[Dict[str, Any]]:
         """解析JSON数组响应"""
-        import re
-        import json
-        
-        array_match = re.search(r'\[[\s\S]*\]', response)
-        if array_match:
-            try:
-                return json.loads(array_match.group())
-            except json.JSONDecodeError:
-                pass
-        return []
+        return JSONUtils.extract(response, list) or []
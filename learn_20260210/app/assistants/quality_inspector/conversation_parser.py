@@ -3,21 +3,37 @@
 解析和结构化对话内容
 """
 
+import hashlib
+import json
 import logging
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
 from utils.logger import LoggerMixin
 
 logger = logging.getLogger(__name__)
 
+# 行首的发言者标记，支持 "客户：xxx"、"[客服] xxx"、"张三(客户) xxx" 三种格式
+_SPEAKER_PREFIX_RE = re.compile(
+    r'\s*(?:'
+    r'\[([^\[\]\n]{1,20})\]'
+    r'|([^\s:：\[\]()（）]{1,20})\s*[（(][^）)\n]{0,20}[）)]\s*[：:]?'
+    r'|([^\s:：\[\]()（）]{1,20})\s*[：:]'
+    r')\s*'
+)
+_HAS_MARKER_RE = re.compile(r'[：:\-\[\]]')
+# 行内的 "[发言者]" 标记，如 "[客服] 您好 [客户] 我想查账单" 中的第二个发言者
+_INLINE_SPEAKER_RE = re.compile(r'\[([^\[\]\n]{1,20})\]')
+
 
 class DialogueTurn:
     """
     对话轮次数据模型
     """
     
+    __slots__ = ("speaker", "content", "timestamp", "emotion", "intent")
+    
     def __init__(
         self,
         speaker: str,
@@ -48,6 +64,8 @@ class ParsedConversation:
     解析后的对话数据模型
     """
     
+    __slots__ = ("session_id", "participants", "turns", "metadata", "parsed_at")
+    
     def __init__(
         self,
         session_id: str,
@@ -61,6 +79,15 @@ class ParsedConversation:
         self.metadata = metadata or {}                  # 元数据
         self.parsed_at = datetime.now()                 # 解析时间
     
+    @property
+    def formatted_text(self) -> str:
+        """
+        "发言者: 内容" 逐行拼接的对话文本
+        
+        每次访问都按当前轮次生成，轮次被修改或替换后不会返回过期文本
+        """
+        return "\n".join([f"{turn.speaker}: {turn.content}" for turn in self.turns])
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
@@ -84,14 +111,14 @@ class ConversationParser(LoggerMixin):
     
     def parse_conversation(
         self,
-        raw_content: str,
+        raw_content: Union[str, bytes],
         format_type: str = "text"
     ) -> ParsedConversation:
         """
         解析对话内容
         
         Args:
-            raw_content (str): 原始对话内容
+            raw_content (Union[str, bytes]): 原始对话内容，bytes按UTF-8解码
             format_type (str): 内容格式类型
             
         Returns:
@@ -121,62 +148,44 @@ class ConversationParser(LoggerMixin):
             List[DialogueTurn]: 对话轮次列表
         """
         turns = []
+        current_speaker = None
+        current_content = []
         
-        # 匹配常见的对话格式
-        patterns = [
-            # 格式: 客户: xxx 客服: xxx
-            r'(客户|用户|Customer|User)[：:]\s*(.+?)(?=(客户|用户|Customer|User)[：:]|$)',
-            # 格式: [发言者] xxx
-            r'\[(.*?)\]\s*(.+?)(?=\[|$)',
-            # 格式: xxx (xxx)
-            r'(\w+)[（(](.+?)[）)]\s*(.+)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, conversation, re.DOTALL)
-            if matches:
-                for match in matches:
-                    if len(match) >= 2:
-                        speaker = match[0].strip()
-                        content = match[-1].strip()
-                        if content:
-                            turns.append(DialogueTurn(
-                                speaker=speaker,
-                                content=content
-                            ))
-                break
-        
-        # 如果没有匹配到，使用简单分割
-        if not turns:
-            lines = conversation.split('\n')
-            current_speaker = "未知"
-            current_content = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if ':' in line:
-                    if current_content:
-                        turns.append(DialogueTurn(
-                            speaker=current_speaker,
-                            content=' '.join(current_content)
-                        ))
-                        current_content = []
-                    
-                    parts = line.split(':', 1)
-                    current_speaker = parts[0].strip()
-                    current_content.append(parts[1].strip() if len(parts) > 1 else "")
-                else:
-                    current_content.append(line)
-            
+        def flush():
             if current_content:
                 turns.append(DialogueTurn(
                     speaker=current_speaker,
                     content=' '.join(current_content)
                 ))
         
+        # 逐行线性扫描：带发言者标记的行开始新轮次，其余行并入当前轮次；
+        # 行内的 "[发言者]" 标记同样切分出新轮次
+        for line in conversation.splitlines():
+            match = _SPEAKER_PREFIX_RE.match(line)
+            if match:
+                flush()
+                current_speaker = (match.group(1) or match.group(2) or match.group(3)).strip()
+                current_content = []
+                line = line[match.end():]
+            elif current_speaker is None:
+                current_speaker = "未知"
+            
+            pos = 0
+            for inline in _INLINE_SPEAKER_RE.finditer(line):
+                text = line[pos:inline.start()].strip()
+                if text:
+                    current_content.append(text)
+                flush()
+                current_speaker = inline.group(1).strip()
+                current_content = []
+                pos = inline.end()
+            
+            line = line[pos:].strip()
+            if line:
+                current_content.append(line)
+        
+        flush()
+        
         return turns
     
     def validate_conversation_format(self, content: str) -> bool:
@@ -193,7 +202,7 @@ class ConversationParser(LoggerMixin):
             return False
         
         # 检查是否包含对话内容
-        has_speaker_markers = bool(re.search(r'[：:\-\[\]]', content))
+        has_speaker_markers = bool(_HAS_MARKER_RE.search(content))
         has_multiple_lines = content.count('\n') >= 1
         
         return has_speaker_markers or has_multiple_lines
@@ -212,7 +221,6 @@ class ConversationParser(LoggerMixin):
         
         if content.startswith('{') or content.startswith('['):
             try:
-                import json
                 json.loads(content)
                 return "json"
             except json.JSONDecodeError:
@@ -223,16 +231,22 @@ class ConversationParser(LoggerMixin):
         
         return "unknown"
     
-    def _parse_text(self, raw_content: str) -> ParsedConversation:
-        """解析文本格式对话"""
-        turns = self.extract_dialogue_turns(raw_content)
+    def _parse_text(self, raw_content: Union[str, bytes]) -> ParsedConversation:
+        """解析文本格式对话，bytes输入直接参与哈希，只解码一次"""
+        if isinstance(raw_content, (bytes, bytearray)):
+            data = raw_content
+            text = raw_content.decode("utf-8")
+        else:
+            data = raw_content.encode("utf-8")
+            text = raw_content
+        
+        turns = self.extract_dialogue_turns(text)
         
         # 提取参与者
-        participants = list(set(turn.speaker for turn in turns))
+        participants = list(dict.fromkeys(turn.speaker for turn in turns))
         
         # 生成会话ID
-        import hashlib
-        session_id = hashlib.md5(raw_content.encode()).hexdigest()[:12]
+        session_id = hashlib.blake2b(data, digest_size=6).hexdigest()
         
         return ParsedConversation(
             session_id=session_id,
@@ -241,12 +255,11 @@ class ConversationParser(LoggerMixin):
             metadata={"format": "text"}
         )
     
-    def _parse_json(self, raw_content: str) -> ParsedConversation:
-        """解析JSON格式对话"""
-        import json
-        
+    def _parse_json(self, raw_content: Union[str, bytes]) -> ParsedConversation:
+        """解析JSON格式对话，json.loads可直接解析UTF-8 bytes"""
         try:
             data = json.loads(raw_content)
+            session_id = None
             
             # 处理不同格式的JSON
             if isinstance(data, list):
@@ -274,7 +287,7 @@ class ConversationParser(LoggerMixin):
                     metadata={"error": "无效的JSON格式"}
                 )
             
-            participants = list(set(turn.speaker for turn in turns))
+            participants = list(dict.fromkeys(turn.speaker for turn in turns))
             
             return ParsedConversation(
                 session_id=session_id or "json_session",
@@ -0,0 +1,93 @@
+"""
+质检结果持久化缓存
+基于SQLite保存合并质检结果，进程重启或重复评测同一批对话时直接复用
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.logger import LoggerMixin
+
+
+class InspectionCache(LoggerMixin):
+    """
+    质检结果持久化缓存
+
+    键由调用方根据模型名、提示词模板版本和对话文本生成，模板或模型变化后自然失效；
+    读写失败时只记录日志，不影响质检流程。
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化持久化缓存
+
+        Args:
+            path (str): SQLite数据库文件路径，支持 ~ 展开
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS inspection_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+        self.logger.info(f"质检结果持久化缓存初始化完成: {self.path}")
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """由模型名、模板版本、对话文本等组成缓存键"""
+        return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的质检结果
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[Dict[str, Any]]: 质检结果，未命中或读取失败时返回None
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM inspection_cache WHERE key = ?", (key,)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.warning(f"读取质检结果缓存失败: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        写入质检结果
+
+        Args:
+            key (str): 缓存键
+            value (Dict[str, Any]): 质检结果
+        """
+        try:
+            data = json.dumps(value, ensure_ascii=False)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO inspection_cache (key, value) VALUES (?, ?)", (key, data)
+                )
+                self._conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.logger.warning(f"写入质检结果缓存失败: {str(e)}")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM inspection_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM inspection_cache").fetchone()[0]
@@ -3,15 +3,106 @@
 生成质检报告和统计分析
 """
 
+import itertools
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import tempfile
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
+from html import escape
 from pathlib import Path
 
+from pydantic_core import to_json
+
 from utils.logger import LoggerMixin
 
 logger = logging.getLogger(__name__)
 
+# 分数分布区间，按分数从高到低排列；_SCORE_THRESHOLDS 为从低到高的区间下限
+_SCORE_BINS = ("优秀(90-100)", "良好(80-89)", "合格(60-79)", "不合格(<60)")
+_SCORE_THRESHOLDS = (60, 80, 90)
+
+# 报告写入缓冲区大小，常见报告一次系统调用即可写完
+_WRITE_BUFFER_SIZE = 1 << 17
+
+# 报告文件权限：与直接open()新建文件一致（0666去掉umask），mkstemp默认只给0600
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_REPORT_FILE_MODE = 0o666 & ~_UMASK
+
+# 详细报告模板，各段只在生成报告时format一次
+_DETAILED_HEADER = """
+================================================================================
+                          客服对话质检报告
+================================================================================
+
+会话ID: {session_id}
+生成时间: {generated_at}
+
+--------------------------------------------------------------------------------
+                              总体评分
+--------------------------------------------------------------------------------
+总体评分: {overall_score:.1f}分
+服务态度: {attitude_score:.1f}分
+专业性: {professionalism_score:.1f}分
+合规性: {compliance_score:.1f}分
+
+--------------------------------------------------------------------------------
+                              发现问题
+--------------------------------------------------------------------------------
+"""
+_DETAILED_ISSUE = """
+问题{index}: [{severity}] {issue_type}
+描述: {description}
+位置: {location}
+建议: {suggestion}
+"""
+_DETAILED_FOOTER = """
+--------------------------------------------------------------------------------
+                                总结
+--------------------------------------------------------------------------------
+{summary}
+
+================================================================================
+                              报告结束
+================================================================================
+        """
+
+# 汇总报告模板
+_SUMMARY_HEADER = """
+================================================================================
+                          质检汇总报告
+================================================================================
+
+报告周期: {report_period}
+生成时间: {generated_at}
+
+--------------------------------------------------------------------------------
+                              统计概览
+--------------------------------------------------------------------------------
+总会话数: {total_sessions}
+平均分: {avg_score:.1f}分
+
+分数分布:
+"""
+_SUMMARY_ISSUES_HEADER = """
+--------------------------------------------------------------------------------
+                              主要问题
+--------------------------------------------------------------------------------
+"""
+_SUMMARY_RECOMMENDATIONS_HEADER = """
+--------------------------------------------------------------------------------
+                              改进建议
+--------------------------------------------------------------------------------
+"""
+_SUMMARY_FOOTER = """
+================================================================================
+                            报告结束
+================================================================================
+        """
+
 
 class SummaryReport:
     """
@@ -25,7 +116,8 @@ class SummaryReport:
         avg_score: float = 0.0,
         score_distribution: Dict[str, int] = None,
         top_issues: List[Dict[str, Any]] = None,
-        recommendations: List[str] = None
+        recommendations: List[str] = None,
+        generated_at: datetime = None
     ):
         self.report_period = report_period                  # 报告周期
         self.total_sessions = total_sessions                 # 总会话数
@@ -33,7 +125,7 @@ class SummaryReport:
         self.score_distribution = score_distribution or {}   # 分数分布
         self.top_issues = top_issues or []                   # 主要问题
         self.recommendations = recommendations or []         # 建议
-        self.generated_at = datetime.now()                   # 生成时间
+        self.generated_at = generated_at or datetime.now()   # 生成时间
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -80,11 +172,12 @@ class ReportGenerator(LoggerMixin):
         """
         try:
             # 生成报告内容
-            report_content = self._build_detailed_report(inspection_result)
+            # 内容需要作为返回值，整体拼接一次后写入
+            report_content = "".join(self._iter_detailed_report(inspection_result))
             
             # 保存报告
             report_path = self.output_dir / f"report_{inspection_result.session_id}.txt"
-            self._save_report(report_path, report_content)
+            self._save_report(report_path, (report_content,))
             
             return report_content
             
@@ -97,7 +190,7 @@ class ReportGenerator(LoggerMixin):
         results: List["InspectionReport"]
     ) -> SummaryReport:
         """
-        生成汇总报告
+        生成汇总报告并保存为文本文件
         
         Args:
             results (List[InspectionReport]): 质检结果列表
@@ -109,58 +202,11 @@ class ReportGenerator(LoggerMixin):
             if not results:
                 return SummaryReport()
             
-            # 计算统计数据
-            total_sessions = len(results)
-            avg_score = sum(r.overall_score for r in results) / total_sessions
-            
-            # 分数分布
-            score_distribution = {
-                "优秀(90-100)": 0,
-                "良好(80-89)": 0,
-                "合格(60-79)": 0,
-                "不合格(<60)": 0
-            }
-            
-            for r in results:
-                if r.overall_score >= 90:
-                    score_distribution["优秀(90-100)"] += 1
-                elif r.overall_score >= 80:
-                    score_distribution["良好(80-89)"] += 1
-                elif r.overall_score >= 60:
-                    score_distribution["合格(60-79)"] += 1
-                else:
-                    score_distribution["不合格(<60)"] += 1
-            
-            # 主要问题统计
-            issue_stats = {}
-            for r in results:
-                for issue in r.issues:
-                    issue_type = issue.issue_type
-                    if issue_type not in issue_stats:
-                        issue_stats[issue_type] = 0
-                    issue_stats[issue_type] += 1
-            
-            top_issues = [
-                {"type": k, "count": v}
-                for k, v in sorted(issue_stats.items(), key=lambda x: -x[1])[:5]
-            ]
-            
-            # 生成建议
-            recommendations = self._generate_recommendations(results)
-            
-            report = SummaryReport(
-                report_period="最近7天",
-                total_sessions=total_sessions,
-                avg_score=avg_score,
-                score_distribution=score_distribution,
-                top_issues=top_issues,
-                recommendations=recommendations
-            )
+            report = self.build_summary_report(results)
             
             # 保存汇总报告
             summary_path = self.output_dir / "summary_report.txt"
-            summary_content = self._build_summary_report(report)
-            self._save_report(summary_path, summary_content)
+            self._save_report(summary_path, self._iter_summary_report(report))
             
             return report
             
@@ -168,6 +214,64 @@ class ReportGenerator(LoggerMixin):
             self.logger.error(f"汇总报告生成失败: {str(e)}")
             return SummaryReport()
     
+    def build_summary_report(
+        self,
+        results: List["InspectionReport"]
+    ) -> SummaryReport:
+        """
+        统计质检结果生成汇总报告，不写文件
+        
+        Args:
+            results (List[InspectionReport]): 质检结果列表
+            
+        Returns:
+            SummaryReport: 汇总报告
+        """
+        if not results:
+            return SummaryReport()
+        
+        # 单次遍历累计各项评分、分数分布和问题类型
+        total_sessions = len(results)
+        total_score = total_attitude = total_professional = total_compliance = 0.0
+        bins = [0, 0, 0, 0]
+        issue_stats = Counter()
+        
+        for r in results:
+            score = r.overall_score
+            total_score += score
+            total_attitude += r.attitude_score
+            total_professional += r.professionalism_score
+            total_compliance += r.compliance_score
+            bins[bisect_right(_SCORE_THRESHOLDS, score)] += 1
+            issue_stats.update(issue.issue_type for issue in r.issues)
+        
+        avg_score = total_score / total_sessions
+        
+        # 分数分布
+        score_distribution = dict(zip(_SCORE_BINS, reversed(bins)))
+        
+        # 主要问题统计
+        top_issues = [
+            {"type": k, "count": v}
+            for k, v in issue_stats.most_common(5)
+        ]
+        
+        # 生成建议
+        recommendations = self._generate_recommendations(
+            total_attitude / total_sessions,
+            total_professional / total_sessions,
+            total_compliance / total_sessions
+        )
+        
+        return SummaryReport(
+            report_period="最近7天",
+            total_sessions=total_sessions,
+            avg_score=avg_score,
+            score_distribution=score_distribution,
+            top_issues=top_issues,
+            recommendations=recommendations
+        )
+    
     def export_report(
         self,
         report: "InspectionReport",
@@ -185,8 +289,8 @@ class ReportGenerator(LoggerMixin):
         """
         try:
             if format_type == "json":
-                import json
-                return json.dumps(report.to_dict(), ensure_ascii=False, indent=2).encode()
+                # pydantic-core直接输出UTF-8 bytes，不转义中文，无需再encode
+                return to_json(report.to_dict(), indent=2, serialize_unknown=True)
             
             elif format_type == "html":
                 return report.to_html().encode()
@@ -201,113 +305,141 @@ class ReportGenerator(LoggerMixin):
             self.logger.error(f"报告导出失败: {str(e)}")
             return b""
     
-    def _build_detailed_report(
+    def render_report(
         self,
-        inspection_result: "InspectionReport"
+        inspection_result: "InspectionReport",
+        format_type: str = "text"
     ) -> str:
-        """构建详细报告"""
-        report = f"""
-================================================================================
-                          客服对话质检报告
-================================================================================
-
-会话ID: {inspection_result.session_id}
-生成时间: {inspection_result.generated_at.strftime('%Y-%m-%d %H:%M:%S')}
-
---------------------------------------------------------------------------------
-                              总体评分
---------------------------------------------------------------------------------
-总体评分: {inspection_result.overall_score:.1f}分
-服务态度: {inspection_result.attitude_score:.1f}分
-专业性: {inspection_result.professionalism_score:.1f}分
-合规性: {inspection_result.compliance_score:.1f}分
-
---------------------------------------------------------------------------------
-                              发现问题
---------------------------------------------------------------------------------
-"""
-        for i, issue in enumerate(inspection_result.issues, 1):
-            report += f"""
-问题{i}: [{issue.severity}] {issue.issue_type}
-描述: {issue.description}
-位置: {issue.location or "未指定"}
-建议: {issue.suggestion or "无"}
-"""
+        """
+        按格式渲染单个质检报告，不写文件
         
-        report += f"""
---------------------------------------------------------------------------------
-                                总结
---------------------------------------------------------------------------------
-{inspection_result.summary or "无"}
-
-================================================================================
-                              报告结束
-================================================================================
+        Args:
+            inspection_result (InspectionReport): 质检结果
+            format_type (str): 渲染格式（json/text/html）
+            
+        Returns:
+            str: 报告内容
         """
-        return report
+        if format_type == "json":
+            return to_json(inspection_result.to_dict(), indent=2, serialize_unknown=True).decode()
+        if format_type == "html":
+            return inspection_result.to_html()
+        if format_type == "text":
+            return "".join(self._iter_detailed_report(inspection_result))
+        raise ValueError(f"不支持的格式: {format_type}")
     
-    def _build_summary_report(self, summary: SummaryReport) -> str:
-        """构建汇总报告"""
-        report = f"""
-================================================================================
-                          质检汇总报告
-================================================================================
-
-报告周期: {summary.report_period}
-生成时间: {summary.generated_at.strftime('%Y-%m-%d %H:%M:%S')}
-
---------------------------------------------------------------------------------
-                              统计概览
---------------------------------------------------------------------------------
-总会话数: {summary.total_sessions}
-平均分: {summary.avg_score:.1f}分
-
-分数分布:
-"""
+    def render_summary_report(
+        self,
+        summary: SummaryReport,
+        format_type: str = "text"
+    ) -> str:
+        """
+        按格式渲染汇总报告，不写文件
+        
+        Args:
+            summary (SummaryReport): 汇总报告
+            format_type (str): 渲染格式（json/text/html）
+            
+        Returns:
+            str: 报告内容
+        """
+        if format_type == "json":
+            return to_json(summary.to_dict(), indent=2).decode()
+        if format_type == "html":
+            return f"<html><body><pre>{escape(''.join(self._iter_summary_report(summary)))}</pre></body></html>"
+        if format_type == "text":
+            return "".join(self._iter_summary_report(summary))
+        raise ValueError(f"不支持的格式: {format_type}")
+    
+    def save_report(self, filename: str, content: str) -> Path:
+        """
+        将已渲染的报告内容保存到输出目录
+        
+        Args:
+            filename (str): 文件名
+            content (str): 报告内容
+            
+        Returns:
+            Path: 报告文件路径
+        """
+        path = self.output_dir / filename
+        self._save_report(path, (content,))
+        return path
+    
+    def _iter_detailed_report(
+        self,
+        inspection_result: "InspectionReport"
+    ) -> Iterator[str]:
+        """逐段生成详细报告：报告头、每个问题一段、报告尾"""
+        yield _DETAILED_HEADER.format(
+            session_id=inspection_result.session_id,
+            generated_at=inspection_result.generated_at.isoformat(sep=' ', timespec='seconds'),
+            overall_score=inspection_result.overall_score,
+            attitude_score=inspection_result.attitude_score,
+            professionalism_score=inspection_result.professionalism_score,
+            compliance_score=inspection_result.compliance_score
+        )
+        for i, issue in enumerate(inspection_result.issues, 1):
+            yield _DETAILED_ISSUE.format(
+                index=i,
+                severity=issue.severity,
+                issue_type=issue.issue_type,
+                description=issue.description,
+                location=issue.location or "未指定",
+                suggestion=issue.suggestion or "无"
+            )
+        yield _DETAILED_FOOTER.format(summary=inspection_result.summary or "无")
+    
+    def _iter_summary_report(self, summary: SummaryReport) -> Iterator[str]:
+        """逐行生成汇总报告"""
+        total = summary.total_sessions
+        yield _SUMMARY_HEADER.format(
+            report_period=summary.report_period,
+            generated_at=summary.generated_at.isoformat(sep=' ', timespec='seconds'),
+            total_sessions=total,
+            avg_score=summary.avg_score
+        )
         for category, count in summary.score_distribution.items():
-            percentage = (count / summary.total_sessions * 100) if summary.total_sessions > 0 else 0
-            report += f"  {category}: {count} ({percentage:.1f}%)\n"
+            percentage = (count / total * 100) if total > 0 else 0
+            yield f"  {category}: {count} ({percentage:.1f}%)\n"
         
-        report += """
---------------------------------------------------------------------------------
-                              主要问题
---------------------------------------------------------------------------------
-"""
+        yield _SUMMARY_ISSUES_HEADER
         for i, issue in enumerate(summary.top_issues, 1):
-            report += f"{i}. {issue['type']}: {issue['count']}次\n"
+            yield f"{i}. {issue['type']}: {issue['count']}次\n"
         
-        report += """
---------------------------------------------------------------------------------
-                              改进建议
---------------------------------------------------------------------------------
-"""
+        yield _SUMMARY_RECOMMENDATIONS_HEADER
         for i, rec in enumerate(summary.recommendations, 1):
-            report += f"{i}. {rec}\n"
+            yield f"{i}. {rec}\n"
         
-        report += """
-================================================================================
-                            报告结束
-================================================================================
-        """
-        return report
+        yield _SUMMARY_FOOTER
     
-    def _save_report(self, path: Path, content: str):
-        """保存报告"""
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    def _save_report(self, path: Path, chunks: Iterable[str]):
+        """
+        保存报告，逐段写入临时文件后原子替换目标文件
+        
+        生成内容的过程中出错时删除临时文件，不会留下不完整的报告
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with open(fd, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                f.writelines(chunks)
+            os.chmod(tmp_path, _REPORT_FILE_MODE)
+            os.replace(tmp_path, path)
+        finally:
+            # 替换成功后临时文件已不存在
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
         self.logger.info(f"报告已保存: {path}")
     
     def _generate_recommendations(
         self,
-        results: List["InspectionReport"]
+        avg_attitude: float,
+        avg_professional: float,
+        avg_compliance: float
     ) -> List[str]:
-        """生成改进建议"""
+        """根据各项平均分生成改进建议"""
         recommendations = []
         
-        avg_attitude = sum(r.attitude_score for r in results) / len(results)
-        avg_professional = sum(r.professionalism_score for r in results) / len(results)
-        avg_compliance = sum(r.compliance_score for r in results) / len(results)
-        
         if avg_attitude < 80:
             recommendations.append("加强客服人员服务态度培训，提高客户满意度")
         if avg_professional < 80:
@@ -322,23 +454,69 @@ class ReportGenerator(LoggerMixin):
         return recommendations
 
 
+class Review:
+    """
+    复核记录数据模型
+    """
+    
+    __slots__ = (
+        "review_id", "report", "reviewer", "submitted_at", "status",
+        "approved_by", "approved_at", "comments",
+        "rejected_by", "rejected_at", "reasons", "summary"
+    )
+    
+    def __init__(
+        self,
+        review_id: str,
+        report: "InspectionReport",
+        reviewer: str,
+        submitted_at: datetime = None
+    ):
+        self.review_id = review_id                        # 复核ID
+        self.report = report                              # 质检报告
+        self.reviewer = reviewer                          # 复核人
+        self.submitted_at = submitted_at or datetime.now()  # 提交时间
+        self.status = "pending"                           # 复核状态
+        self.approved_by = None                           # 批准人
+        self.approved_at = None                           # 批准时间
+        self.comments = None                              # 批准意见
+        self.rejected_by = None                           # 拒绝人
+        self.rejected_at = None                           # 拒绝时间
+        self.reasons = None                               # 拒绝原因
+        # 待复核列表中的展示行，提交后不再变化，提交时生成一次
+        self.summary = {
+            "review_id": review_id,
+            "session_id": report.session_id,
+            "score": report.overall_score,
+            "reviewer": reviewer,
+            "submitted_at": self.submitted_at.isoformat()
+        }
+
+
 class ReviewWorkflow(LoggerMixin):
     """
     复核工作流
     管理质检结果的复核流程
     """
     
-    def __init__(self):
-        """初始化复核工作流"""
-        self.pending_reviews = {}
-        self.completed_reviews = {}
+    def __init__(self, max_completed: int = 10000):
+        """
+        初始化复核工作流
+        
+        Args:
+            max_completed (int): 最多保留的已完成复核记录数，超出后淘汰最早完成的记录
+        """
+        self.pending_reviews: Dict[str, Review] = {}
+        self.completed_reviews: "OrderedDict[str, Review]" = OrderedDict()
+        self._max_completed = max_completed
+        self._seq = itertools.count(1)
         self.logger.info("复核工作流初始化完成")
     
     def submit_for_review(
         self,
         report: "InspectionReport",
         reviewer: str
-    ) -> bool:
+    ) -> Optional[str]:
         """
         提交复核
         
@@ -347,24 +525,20 @@ class ReviewWorkflow(LoggerMixin):
             reviewer (str): 复核人
             
         Returns:
-            bool: 提交是否成功
+            Optional[str]: 生成的复核ID，用于后续批准/拒绝；提交失败时返回None
         """
         try:
-            review_id = f"review_{report.session_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            # 自增序号保证同一会话在同一秒内多次提交也不会冲突
+            review_id = f"review_{report.session_id}_{next(self._seq):010d}"
             
-            self.pending_reviews[review_id] = {
-                "report": report,
-                "reviewer": reviewer,
-                "submitted_at": datetime.now(),
-                "status": "pending"
-            }
+            self.pending_reviews[review_id] = Review(review_id, report, reviewer)
             
             self.logger.info(f"复核已提交: {review_id}")
-            return True
+            return review_id
             
         except Exception as e:
             self.logger.error(f"复核提交失败: {str(e)}")
-            return False
+            return None
     
     def approve_report(
         self,
@@ -387,14 +561,13 @@ class ReviewWorkflow(LoggerMixin):
             if review_id not in self.pending_reviews:
                 raise ValueError(f"复核ID不存在: {review_id}")
             
-            review = self.pending_reviews[review_id]
-            review["status"] = "approved"
-            review["approved_by"] = approver
-            review["approved_at"] = datetime.now()
-            review["comments"] = comments
+            review = self.pending_reviews.pop(review_id)
+            review.status = "approved"
+            review.approved_by = approver
+            review.approved_at = datetime.now()
+            review.comments = comments
             
-            self.completed_reviews[review_id] = review
-            del self.pending_reviews[review_id]
+            self._complete(review)
             
             self.logger.info(f"报告已批准: {review_id}")
             return True
@@ -424,14 +597,13 @@ class ReviewWorkflow(LoggerMixin):
             if review_id not in self.pending_reviews:
                 raise ValueError(f"复核ID不存在: {review_id}")
             
-            review = self.pending_reviews[review_id]
-            review["status"] = "rejected"
-            review["rejected_by"] = rejector
-            review["rejected_at"] = datetime.now()
-            review["reasons"] = reasons
+            review = self.pending_reviews.pop(review_id)
+            review.status = "rejected"
+            review.rejected_by = rejector
+            review.rejected_at = datetime.now()
+            review.reasons = reasons
             
-            self.completed_reviews[review_id] = review
-            del self.pending_reviews[review_id]
+            self._complete(review)
             
             self.logger.info(f"报告已拒绝: {review_id}")
             return True
@@ -440,15 +612,12 @@ class ReviewWorkflow(LoggerMixin):
             self.logger.error(f"报告拒绝失败: {str(e)}")
             return False
     
+    def _complete(self, review: Review):
+        """记录已完成的复核，超出容量时淘汰最早完成的记录，避免长期运行时内存无限增长"""
+        self.completed_reviews[review.review_id] = review
+        while len(self.completed_reviews) > self._max_completed:
+            self.completed_reviews.popitem(last=False)
+    
     def get_pending_reviews(self) -> List[Dict[str, Any]]:
-        """获取待复核列表"""
-        return [
-            {
-                "review_id": k,
-                "session_id": v["report"].session_id,
-                "score": v["report"].overall_score,
-                "reviewer": v["reviewer"],
-                "submitted_at": v["submitted_at"].isoformat()
-            }
-            for k, v in self.pending_reviews.items()
-        ]
+        """获取待复核列表，直接复用提交时生成的展示行"""
+        return [dict(review.summary) for review in self.pending_reviews.values()]
@@ -7,6 +7,8 @@ import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+import numpy as np
+
 from utils.logger import LoggerMixin
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,8 @@ class AudioSegment:
     音频片段数据模型
     """
     
+    __slots__ = ("text", "start_time", "end_time", "confidence")
+    
     def __init__(
         self,
         text: str,
@@ -44,6 +48,8 @@ class TranscriptionResult:
     转录结果数据模型
     """
     
+    __slots__ = ("text", "confidence", "segments", "language", "duration", "transcribed_at")
+    
     def __init__(
         self,
         text: str,
@@ -64,11 +70,65 @@ class TranscriptionResult:
         return {
             "text": self.text,
             "confidence": self.confidence,
-            "segments": [seg.to_dict() for seg in self.segments],
+            "segments": [
+                {
+                    "text": seg.text,
+                    "start_time": seg.start_time,
+                    "end_time": seg.end_time,
+                    "confidence": seg.confidence
+                }
+                for seg in self.segments
+            ],
             "language": self.language,
             "duration": self.duration,
             "transcribed_at": self.transcribed_at.isoformat()
         }
+    
+    def stats_fast(self) -> Dict[str, float]:
+        """
+        统计片段级指标：按时长加权的置信度和总语音时长
+        
+        片段一次性展开为numpy数组后做向量化计算，片段数量很多时避免逐个对象循环
+        
+        Returns:
+            Dict[str, float]: 包含 segment_count、speech_duration、weighted_confidence
+        """
+        count = len(self.segments)
+        if not count:
+            return {"segment_count": 0, "speech_duration": 0.0, "weighted_confidence": 0.0}
+        
+        starts = np.fromiter((seg.start_time for seg in self.segments), dtype=np.float64, count=count)
+        ends = np.fromiter((seg.end_time for seg in self.segments), dtype=np.float64, count=count)
+        confs = np.fromiter((seg.confidence for seg in self.segments), dtype=np.float64, count=count)
+        
+        durations = ends - starts
+        speech_duration = float(durations.sum())
+        weighted_confidence = float(durations @ confs) / speech_duration if speech_duration > 0 else 0.0
+        
+        return {
+            "segment_count": count,
+            "speech_duration": speech_duration,
+            "weighted_confidence": weighted_confidence
+        }
+
+
+# 模拟转录文本，模块加载时构造一次
+_MOCK_TEXT = """
+客户：您好，我想查询一下我的信用卡账单。
+客服：好的，请问您想查询什么时候的账单？
+客户：我想查一下上个月的账单。
+客服：好的，我帮您查一下。请稍等。
+客户：好的，谢谢。
+客服：不客气。您上个月的账单总额是5000元，最低还款额是500元。
+客户：明白了，谢谢。
+""".strip()
+
+# 模拟片段参数 (文本, 开始时间, 结束时间, 置信度)；AudioSegment可变，每次转录重新构造
+_MOCK_SEGMENTS = (
+    ("客户：您好，我想查询一下我的信用卡账单。", 0.0, 5.0, 0.95),
+    ("客服：好的，请问您想查询什么时候的账单？", 5.0, 8.0, 0.93),
+    ("客户：我想查一下上个月的账单。", 8.0, 11.0, 0.91),
+)
 
 
 class SpeechToTextProcessor(LoggerMixin):
@@ -201,37 +261,10 @@ class SpeechToTextProcessor(LoggerMixin):
         self.logger.info(f"模拟转录音频文件: {audio_file_path}")
         
         return TranscriptionResult(
-            text="""
-客户：您好，我想查询一下我的信用卡账单。
-客服：好的，请问您想查询什么时候的账单？
-客户：我想查一下上个月的账单。
-客服：好的，我帮您查一下。请稍等。
-客户：好的，谢谢。
-客服：不客气。您上个月的账单总额是5000元，最低还款额是500元。
-客户：明白了，谢谢。
-            """.strip(),
+            text=_MOCK_TEXT,
             confidence=0.92,
             language=language,
-            segments=[
-                AudioSegment(
-                    text="客户：您好，我想查询一下我的信用卡账单。",
-                    start_time=0.0,
-                    end_time=5.0,
-                    confidence=0.95
-                ),
-                AudioSegment(
-                    text="客服：好的，请问您想查询什么时候的账单？",
-                    start_time=5.0,
-                    end_time=8.0,
-                    confidence=0.93
-                ),
-                AudioSegment(
-                    text="客户：我想查一下上个月的账单。",
-                    start_time=8.0,
-                    end_time=11.0,
-                    confidence=0.91
-                )
-            ],
+            segments=[AudioSegment(*seg) for seg in _MOCK_SEGMENTS],
             duration=11.0
         )
     
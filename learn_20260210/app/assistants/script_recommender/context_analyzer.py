@@ -4,10 +4,12 @@
 """
 
 import logging
+import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
+from utils.helpers import JSONUtils
 from utils.logger import LoggerMixin
 from config.constants import PromptTemplates, ConversationStages, CustomerEmotions
 
@@ -130,6 +132,21 @@ class ContextAnalyzer(LoggerMixin):
                 stage=ConversationStages.MAIN_TOPIC
             )
     
+    async def aanalyze_context(
+        self,
+        conversation_history: List[Dict[str, str]]
+    ) -> ConversationContext:
+        """
+        异步分析对话情境，在线程池中执行且受全局大模型并发数限制
+        
+        Args:
+            conversation_history (List[Dict[str, str]]): 对话历史
+            
+        Returns:
+            ConversationContext: 对话情境分析结果
+        """
+        return await run_blocking_llm_call(self.analyze_context, conversation_history)
+    
     def extract_emotion(self, text: str) -> EmotionAnalysis:
         """
         提取文本情绪
@@ -271,8 +288,6 @@ class ContextAnalyzer(LoggerMixin):
         response: str
     ) -> ConversationContext:
         """解析情境分析响应"""
-        import re
-        
         topic = "未知"
         stage = ConversationStages.MAIN_TOPIC
         satisfaction = 0.5
@@ -317,13 +332,4 @@ class ContextAnalyzer(LoggerMixin):
     
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """解析JSON响应"""
-        import re
-        import json
-        
-        json_match = re.search(r'\{[\s\S]*\}', response)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
-        return {}
+        return JSONUtils.extract(response) or {}
@@ -7,7 +7,8 @@ import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, run_blocking_llm_call
+from utils.helpers import JSONUtils
 from utils.logger import LoggerMixin
 from config.constants import PromptTemplates
 
@@ -122,6 +123,23 @@ class IntentRecognizer(LoggerMixin):
                 confidence=0.0
             )
     
+    async def arecognize_intent(
+        self,
+        current_query: str,
+        context: "ConversationContext" = None
+    ) -> UserIntent:
+        """
+        异步识别用户意图，在线程池中执行且受全局大模型并发数限制
+        
+        Args:
+            current_query (str): 当前用户查询
+            context (ConversationContext): 对话情境
+            
+        Returns:
+            UserIntent: 用户意图识别结果
+        """
+        return await run_blocking_llm_call(self.recognize_intent, current_query, context)
+    
     def predict_next_intent(
         self,
         conversation_history: List[Dict[str, str]],
@@ -199,26 +217,8 @@ class IntentRecognizer(LoggerMixin):
     
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """解析JSON响应"""
-        import re
-        import json
-        
-        json_match = re.search(r'\{[\s\S]*\}', response)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
-        return {}
+        return JSONUtils.extract(response) or {}
     
     def _parse_json_array_response(self, response: str) -> List[Dict[str, Any]]:
         """解析JSON数组响应"""
-        import re
-        import json
-        
-        array_match = re.search(r'\[[\s\S]*\]', response)
-        if array_match:
-            try:
-                return json.loads(array_match.group())
-            except json.JSONDecodeError:
-                pass
-        return []
+        return JSONUtils.extract(response, list) or []
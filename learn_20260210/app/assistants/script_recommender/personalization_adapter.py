@@ -8,6 +8,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from core.llm_client import LLMClient
+from utils.helpers import JSONUtils
 from utils.logger import LoggerMixin
 from config.constants import CustomerTypes
 
@@ -199,17 +200,7 @@ class PersonalizationAdapter(LoggerMixin):
             response = self.llm_client.generate_text(prompt)
             
             # 解析JSON结果
-            import re
-            import json
-            
-            json_match = re.search(r'\{[\s\S]*\}', response)
-            if json_match:
-                try:
-                    return json.loads(json_match.group())
-                except json.JSONDecodeError:
-                    pass
-            
-            return {}
+            return JSONUtils.extract(response) or {}
             
         except Exception as e:
             self.logger.error(f"客户偏好分析失败: {str(e)}")
@@ -4,6 +4,7 @@
 """
 
 import logging
+import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -200,7 +201,6 @@ class ScriptRecommender(LoggerMixin):
             response = self.llm_client.generate_text(prompt)
             
             # 解析排序结果
-            import re
             numbers = re.findall(r'\d+', response)
             
             if numbers:
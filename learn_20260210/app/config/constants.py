@@ -74,6 +74,12 @@ class QuestionTypes:
     SIMILAR = "similar_question"       # 相似问题
     FAQ = "faq"                        # 常见问题
 
+# 批量问题抽取时单个提示词最多合并的对话数
+BULK_EXTRACT_BATCH_SIZE = 8
+
+# 问题质量评估时单个提示词最多合并的问题数
+VALIDATE_QUESTIONS_BATCH_SIZE = 20
+
 # 意图分类
 class IntentCategories:
     ACCOUNT_QUERY = "账户查询"
@@ -163,16 +169,62 @@ class PromptTemplates:
 1. 主要问题：
 2. 相关信息：
 3. 客户情绪：
+"""
+    
+    KNOWLEDGE_BASE_EXTRACT_BULK = """
+请从以下{count}段客户对话中分别提取关键问题（每段最多{max_questions}个）：
+
+{conversations}
+
+请按照以下JSON数组格式输出，数组下标与对话编号一一对应（0到{last_index}）：
+[
+    {{
+        "index": 0,
+        "questions": [
+            {{"question": "主要问题", "context": "相关信息", "emotion": "客户情绪"}}
+        ]
+    }}
+]
+"""
+    
+    QUESTION_VALIDATE_BATCH = """
+请评估以下{count}个问题的质量，每个问题给出0-1之间的评分：
+
+主题：{topic}
+
+评估维度：
+1. 清晰度 - 问题表达是否清晰明确
+2. 完整性 - 问题是否包含必要信息
+3. 简洁性 - 问题是否简洁
+
+{questions}
+
+请直接输出JSON数组，按问题编号顺序（0到{last_index}）给出评分，例如：[0.9, 0.75]
 """
     
     INTENT_CLASSIFY = """
-请对以下客户查询进行意图分类：
+请对客户查询进行意图分类，返回分类结果和置信度。
+
+可选类别：{categories}
 
 查询内容：{query}
+"""
+    
+    # 固定指令在前、动态查询在末尾，便于命中服务端前缀缓存
+    INTENT_CLASSIFY_REWRITE = """
+请对客户查询进行意图分类，并将其改写为更清晰、更准确的表达。
+
+改写要求：
+1. 保持原意不变
+2. 使表达更加简洁明确
+3. 去除口语化和无关内容
+
+请以JSON格式返回，不要输出其他内容：
+{{"intent": "所属类别", "confidence": 0.0到1.0之间的置信度, "rewritten": "改写后的查询"}}
 
 可选类别：{categories}
 
-请返回分类结果和置信度。
+查询内容：{query}
 """
     
     QUESTION_GENERATE = """
@@ -182,6 +234,23 @@ class PromptTemplates:
 数量：{count}
 
 请生成{count}个标准问题。
+"""
+    
+    # 生成问题的同时给出质量评分，省去单独的验证调用
+    QUESTION_GENERATE_SCORED = """
+请生成关于以下主题的{count}个标准问题，并评估每个问题的质量（0-1分）：
+
+主题：{topic}
+
+评估维度：
+1. 清晰度 - 问题表达是否清晰明确
+2. 完整性 - 问题是否包含必要信息
+3. 简洁性 - 问题是否简洁
+
+请直接输出JSON数组：
+[
+    {{"question": "标准问题", "score": 0.9, "reason": "评分理由"}}
+]
 """
     
     SCRIPT_GENERATE = """
@@ -218,28 +287,80 @@ class PromptTemplates:
 """
     
     # 质检模块
-    QUALITY_INSPECT = """
-请对以下客服对话进行质量检查：
+    # 质检类模板统一把固定的检查要求和输出格式放在前面、对话等可变内容放在最后，
+    # 同一模板的请求共享相同前缀，便于服务端复用前缀缓存
+    QUALITY_INSPECT_COMBINED = """
+请对客服对话进行质量检查，一次性完成以下检查，各项评分满分100分：
+1. 总体评分
+2. 服务态度（礼貌程度、热情度、耐心程度、同理心）
+3. 专业性
+4. 合规性（是否存在违规内容）
+5. 发现的问题及改进建议
+6. 总结
+
+请严格按照以下JSON格式输出，不要输出其他内容：
+{{
+    "overall": 总体评分,
+    "attitude": {{
+        "score": 服务态度评分,
+        "strengths": ["优点列表"],
+        "weaknesses": ["缺点列表"],
+        "suggestions": ["改进建议"]
+    }},
+    "professionalism": 专业性评分,
+    "compliance": {{
+        "score": 合规性评分,
+        "violations": ["违规项列表，无违规时为空数组"]
+    }},
+    "issues": [
+        {{
+            "issue_type": "问题类型",
+            "description": "问题描述",
+            "severity": "低/中/高/严重",
+            "location": "问题位置",
+            "suggestion": "改进建议",
+            "evidence": "对话原文证据"
+        }}
+    ],
+    "summary": "总结"
+}}
 
 对话内容：
 {conversation}
 
-检查要点：
-1. 服务态度
-2. 问题解决能力
-3. 专业性
-4. 合规性
-
-请给出评分（满分100分）和改进建议。
+请按上述JSON格式输出质检结果。
 """
     
-    COMPLIANCE_CHECK = """
-请检查以下客服对话的合规性：
-
-对话内容：
-{conversation}
-
-请检查是否存在违规内容，并给出评分。
+    SERVICE_ATTITUDE_EVALUATE = """
+请评估客服回复的服务态度，从以下几个方面进行评估：
+1. 礼貌程度
+2. 热情度
+3. 耐心程度
+4. 同理心
+
+请按照JSON格式输出：
+{{
+    "score": 评分（0-100）,
+    "strengths": ["优点列表"],
+    "weaknesses": ["缺点列表"],
+    "suggestions": ["改进建议"]
+}}
+
+客服回复：
+{responses}
+"""
+    
+    IMPROVEMENT_SUGGESTIONS = """
+请根据客服对话中发现的问题，针对每个问题提供具体的改进建议，并按照JSON数组格式输出：
+[
+    {{
+        "issue": "问题类型",
+        "suggestion": "改进建议"
+    }}
+]
+
+发现问题：
+{issues}
 """
 
 
@@ -25,6 +25,7 @@ class Settings(BaseSettings):
     # 服务器配置
     APP_HOST: str = Field(default="0.0.0.0", validation_alias="APP_HOST")
     APP_PORT: int = Field(default=8000, validation_alias="APP_PORT")
+    WEB_CONCURRENCY: int = Field(default=1, validation_alias="WEB_CONCURRENCY")
     
     # 通义千问大模型配置
     DASHSCOPE_API_KEY: str = Field(..., validation_alias="DASHSCOPE_API_KEY")
@@ -65,6 +66,29 @@ class Settings(BaseSettings):
     DEFAULT_TEMPERATURE: float = Field(default=0.7, validation_alias="DEFAULT_TEMPERATURE")
     DEFAULT_MAX_TOKENS: int = Field(default=2048, validation_alias="DEFAULT_MAX_TOKENS")
     DEFAULT_TOP_P: float = Field(default=0.9, validation_alias="DEFAULT_TOP_P")
+    LLM_MAX_CONCURRENCY: int = Field(default=32, validation_alias="LLM_MAX_CONCURRENCY")
+    LLM_RATE_LIMIT_RPS: float = Field(default=0, validation_alias="LLM_RATE_LIMIT_RPS")
+    LLM_RATE_LIMIT_BURST: int = Field(default=1, validation_alias="LLM_RATE_LIMIT_BURST")
+    LLM_MAX_PENDING: int = Field(default=256, validation_alias="LLM_MAX_PENDING")
+    
+    # 意图语义缓存配置
+    INTENT_CACHE_TTL: int = Field(default=604800, validation_alias="INTENT_CACHE_TTL")
+    INTENT_CACHE_MAX_SIZE: int = Field(default=4096, validation_alias="INTENT_CACHE_MAX_SIZE")
+    INTENT_CACHE_SIMILARITY: float = Field(default=0.92, validation_alias="INTENT_CACHE_SIMILARITY")
+    
+    # 问题/话术生成结果语义缓存配置
+    GENERATION_CACHE_TTL: int = Field(default=86400, validation_alias="GENERATION_CACHE_TTL")
+    GENERATION_CACHE_SIMILARITY: float = Field(default=0.95, validation_alias="GENERATION_CACHE_SIMILARITY")
+    
+    # 质检结果缓存配置（提示词与对话文本精确匹配）
+    INSPECTION_CACHE_TTL: int = Field(default=3600, validation_alias="INSPECTION_CACHE_TTL")
+    INSPECTION_CACHE_MAX_SIZE: int = Field(default=1024, validation_alias="INSPECTION_CACHE_MAX_SIZE")
+    # 质检结果持久化缓存（SQLite文件路径），为空时不启用
+    INSPECTION_PERSIST_PATH: Optional[str] = Field(default=None, validation_alias="INSPECTION_PERSIST_PATH")
+    
+    # 向量库查询向量缓存配置
+    EMBEDDING_CACHE_TTL: int = Field(default=86400, validation_alias="EMBEDDING_CACHE_TTL")
+    EMBEDDING_CACHE_MAX_SIZE: int = Field(default=2048, validation_alias="EMBEDDING_CACHE_MAX_SIZE")
     
     class Config:
         env_file = ".env"
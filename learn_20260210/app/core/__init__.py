@@ -2,14 +2,17 @@
 核心模块初始化
 """
 
-from .llm_client import LLMClient, get_llm_client, LLMException
+from .llm_client import LLMClient, get_llm_client, LLMException, run_blocking_llm_call
 from .vector_db import VectorDBClient, get_vector_db_client, Document
+from .response_cache import ResponseCache
 
 __all__ = [
     "LLMClient",
     "get_llm_client",
     "LLMException",
+    "run_blocking_llm_call",
     "VectorDBClient",
     "get_vector_db_client",
-    "Document"
+    "Document",
+    "ResponseCache"
 ]
@@ -3,8 +3,10 @@
 提供与通义千问大模型的统一交互接口
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Callable, Iterator, TypeVar
 from datetime import datetime
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
@@ -18,6 +20,18 @@ from config.constants import (
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 单次向量化请求最多提交的文本条数
+_EMBEDDING_BATCH_SIZE = 25
+
+# 限制同时在线程池中执行的大模型调用数量
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+# 限制每秒发起的大模型调用数量
+_llm_rate_limiter: Optional["AsyncRateLimiter"] = None
+# 已提交但尚未完成的大模型调用数量（含排队中的调用）
+_llm_pending = 0
+
 
 class LLMException(Exception):
     """大模型异常基类"""
@@ -44,6 +58,51 @@ class InvalidRequestError(LLMException):
     pass
 
 
+class AsyncRateLimiter:
+    """
+    异步令牌桶限流器
+    
+    令牌按固定速率补充，桶容量允许短时突发；令牌不足时等待到下一个令牌可用
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        初始化限流器
+        
+        Args:
+            rate (float): 每秒补充的令牌数
+            capacity (float): 桶容量（最大突发数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """获取一个令牌，令牌不足时等待"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._updated_at is not None:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            
+            if self._tokens < 1:
+                # 持锁等待，保证排队的调用按先后顺序获得令牌
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1
+                self._updated_at = loop.time()
+            self._tokens -= 1
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
 class LLMClient:
     """
     通义千问大模型客户端
@@ -127,6 +186,62 @@ class LLMClient:
                 raise
             raise APIConnectionError(f"文本生成异常: {str(e)}")
     
+    def stream_text(
+        self,
+        prompt: str,
+        temperature: float = LLMDefaultParams.TEMPERATURE,
+        max_tokens: int = LLMDefaultParams.MAX_TOKENS,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        流式文本生成接口，逐段返回新生成的文本
+        
+        流式输出无法整体重试，调用方需自行处理中途失败
+        
+        Args:
+            prompt (str): 输入提示词
+            temperature (float): 温度参数，控制随机性
+            max_tokens (int): 最大生成token数
+            **kwargs: 其他参数
+            
+        Yields:
+            str: 新生成的文本片段
+        """
+        if self._client is None:
+            yield self._mock_generate(prompt)
+            return
+        
+        from dashscope import Generation
+        
+        try:
+            responses = Generation.call(
+                model=self.model_name,
+                prompt=prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                api_key=self.api_key,
+                stream=True,
+                incremental_output=True,
+                **kwargs
+            )
+            
+            for response in responses:
+                if response.status_code == 200:
+                    if response.output.text:
+                        yield response.output.text
+                elif response.status_code == 429:
+                    raise RateLimitError(ErrorMessages.LLM_RATE_LIMIT_ERROR)
+                elif response.status_code >= 400:
+                    raise InvalidRequestError(f"请求失败: {response.message}")
+                else:
+                    raise APIConnectionError(f"API返回错误: {response.status_code}")
+                    
+        except Exception as e:
+            logger.error(f"流式文本生成失败: {str(e)}")
+            if isinstance(e, LLMException):
+                raise
+            raise APIConnectionError(f"流式文本生成异常: {str(e)}")
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -224,6 +339,49 @@ class LLMClient:
             logger.error(f"文本向量化失败: {str(e)}")
             raise APIConnectionError(f"向量化异常: {str(e)}")
     
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=60),
+        retry=retry_if_exception_type((APIConnectionError, APITimeoutError))
+    )
+    def batch_embedding(self, texts: List[str]) -> List[List[float]]:
+        """
+        批量文本向量化接口，每次请求提交多条文本
+        
+        Args:
+            texts (List[str]): 输入文本列表
+            
+        Returns:
+            List[List[float]]: 与输入顺序一致的文本向量列表
+        """
+        try:
+            if self._client is None:
+                return [self._mock_embedding(text) for text in texts]
+            
+            from dashscope import TextEmbedding
+            
+            vectors = []
+            for start in range(0, len(texts), _EMBEDDING_BATCH_SIZE):
+                response = TextEmbedding.call(
+                    model=settings.EMBEDDING_MODEL if hasattr(settings, 'EMBEDDING_MODEL') else "text-embedding-v1",
+                    input=texts[start:start + _EMBEDDING_BATCH_SIZE],
+                    api_key=self.api_key
+                )
+                
+                if response.status_code != 200:
+                    raise APIConnectionError(f"批量向量化失败: {response.message}")
+                
+                embeddings = sorted(response.output["embeddings"], key=lambda item: item["text_index"])
+                vectors.extend(item["embedding"] for item in embeddings)
+            
+            return vectors
+                
+        except Exception as e:
+            logger.error(f"批量文本向量化失败: {str(e)}")
+            if isinstance(e, LLMException):
+                raise
+            raise APIConnectionError(f"批量向量化异常: {str(e)}")
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -369,9 +527,10 @@ class LLMClient:
 
 
 # 便捷函数
+@lru_cache(maxsize=None)
 def get_llm_client(model_name: str = LLMModels.QWEN_PLUS) -> LLMClient:
     """
-    获取大模型客户端实例
+    获取大模型客户端实例（按模型名称缓存，进程内共享）
     
     Args:
         model_name (str): 模型名称
@@ -380,3 +539,43 @@ def get_llm_client(model_name: str = LLMModels.QWEN_PLUS) -> LLMClient:
         LLMClient: 大模型客户端实例
     """
     return LLMClient(model_name=model_name)
+
+
+async def run_blocking_llm_call(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    在线程池中执行阻塞的大模型调用，避免阻塞事件循环
+    
+    并发数受 settings.LLM_MAX_CONCURRENCY 限制，调用速率受 settings.LLM_RATE_LIMIT_RPS
+    限制（为0时不限速），防止对上游大模型服务过度扇出而触发429
+    
+    Args:
+        func (Callable): 同步调用函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+        
+    Returns:
+        调用结果
+    """
+    global _llm_semaphore, _llm_rate_limiter, _llm_pending
+    if _llm_semaphore is None:
+        # 在事件循环内部创建，保证绑定到正在运行的循环
+        _llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        if settings.LLM_RATE_LIMIT_RPS > 0:
+            _llm_rate_limiter = AsyncRateLimiter(
+                settings.LLM_RATE_LIMIT_RPS,
+                max(1.0, float(settings.LLM_RATE_LIMIT_BURST))
+            )
+    
+    _llm_pending += 1
+    try:
+        if _llm_rate_limiter is not None:
+            await _llm_rate_limiter.acquire()
+        async with _llm_semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+    finally:
+        _llm_pending -= 1
+
+
+def llm_overloaded() -> bool:
+    """排队中的大模型调用是否已超过 settings.LLM_MAX_PENDING"""
+    return _llm_pending >= settings.LLM_MAX_PENDING
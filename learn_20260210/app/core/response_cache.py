@@ -0,0 +1,90 @@
+"""
+精确匹配响应缓存模块
+按文本哈希缓存大模型响应或其解析结果，条目按TTL过期并按LRU淘汰
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ResponseCache:
+    """
+    精确匹配响应缓存
+
+    键由命名空间（如模型名）和文本共同决定，只有文本完全相同时才命中；
+    条目按TTL过期，超出容量时淘汰最久未使用的条目。缓存值按原对象返回，
+    可变对象需由调用方自行复制后再交给外部。
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        """
+        初始化响应缓存
+
+        Args:
+            ttl (int): 条目有效期（秒）
+            max_size (int): 最大条目数
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        # key -> (过期时间, 缓存值)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str, namespace: str) -> str:
+        """生成缓存键"""
+        return hashlib.sha256(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_or_compute(
+        self,
+        text: str,
+        namespace: str,
+        compute: Callable[[], T],
+        should_cache: Callable[[T], bool] = None
+    ) -> T:
+        """
+        读取缓存，未命中时调用compute计算并写入缓存
+
+        Args:
+            text (str): 缓存文本（如完整提示词）
+            namespace (str): 命名空间，不同命名空间互不命中
+            compute (Callable[[], T]): 未命中时的计算函数，抛出异常时不写入缓存
+            should_cache (Callable[[T], bool]): 判断计算结果是否写入缓存，为空时总是写入
+
+        Returns:
+            T: 缓存值或新计算的结果
+        """
+        key = self._key(text, namespace)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        value = compute()
+        if should_cache is not None and not should_cache(value):
+            return value
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
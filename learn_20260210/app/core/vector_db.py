@@ -4,7 +4,11 @@
 """
 
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Callable, Tuple
 from datetime import datetime
 import uuid
 import hashlib
@@ -40,6 +44,80 @@ class StorageError(VectorDBException):
     pass
 
 
+class EmbeddingCache:
+    """
+    查询向量缓存
+    按查询文本的SHA-256精确匹配，条目按TTL过期，超出容量时淘汰最久未使用的条目
+    """
+    
+    def __init__(self, max_size: int, ttl: int):
+        """
+        初始化查询向量缓存
+        
+        Args:
+            max_size (int): 最大条目数
+            ttl (int): 条目有效期（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> (过期时间, 向量)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, text: str, embed_fn: Callable[[str], Any]) -> Any:
+        """
+        读取缓存的查询向量，未命中时调用embed_fn计算并写入缓存
+        
+        Args:
+            text (str): 查询文本
+            embed_fn (Callable[[str], Any]): 向量化函数
+            
+        Returns:
+            Any: 查询向量
+        """
+        # 缓存键与实际向量化的文本一致，只差首尾空白的查询共享同一向量
+        text = text.strip()
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        
+        vector = embed_fn(text)
+        
+        with self._lock:
+            self._entries[key] = (now + self.ttl, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return vector
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 进程内共享的查询向量缓存，所有集合使用同一个向量化函数
+_query_embedding_cache = EmbeddingCache(
+    max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+    ttl=settings.EMBEDDING_CACHE_TTL
+)
+
+
+@lru_cache(maxsize=1)
+def _get_embedding_function():
+    """获取Chroma默认向量化函数（进程内共享，避免重复加载模型）"""
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
 class Document:
     """
     文档数据模型
@@ -121,7 +199,8 @@ class VectorDBClient:
             # 获取或创建集合
             self._collection = self._client.get_or_create_collection(
                 name=self.collection_name,
-                metadata={"description": "客服知识库向量数据"}
+                metadata={"description": "客服知识库向量数据"},
+                embedding_function=_get_embedding_function()
             )
             
             logger.info(f"向量数据库客户端初始化成功，集合: {self.collection_name}")
@@ -144,7 +223,8 @@ class VectorDBClient:
             ))
             self._collection = self._client.get_or_create_collection(
                 name=self.collection_name,
-                metadata={"description": "客服知识库向量数据"}
+                metadata={"description": "客服知识库向量数据"},
+                embedding_function=_get_embedding_function()
             )
         except ImportError:
             logger.error("Chroma库未安装，请先安装chromadb")
@@ -193,11 +273,27 @@ class VectorDBClient:
             logger.error(f"添加文档失败: {str(e)}")
             raise StorageError(f"添加文档失败: {str(e)}")
     
+    def embed_query(self, query_text: str) -> Any:
+        """
+        计算查询文本的向量，相同文本直接复用缓存结果
+        
+        Args:
+            query_text (str): 查询文本
+            
+        Returns:
+            Any: 查询向量
+        """
+        return _query_embedding_cache.get_or_compute(
+            query_text,
+            lambda text: _get_embedding_function()([text])[0]
+        )
+    
     def query(
         self,
-        query_texts: List[str],
+        query_texts: List[str] = None,
         n_results: int = DEFAULT_TOP_K,
-        where: Dict[str, Any] = None
+        where: Dict[str, Any] = None,
+        query_embeddings: List[Any] = None
     ) -> Dict[str, Any]:
         """
         查询相似文档
@@ -206,6 +302,7 @@ class VectorDBClient:
             query_texts (List[str]): 查询文本列表
             n_results (int): 返回结果数量
             where (Dict[str, Any]): 过滤条件
+            query_embeddings (List[Any]): 预先计算的查询向量列表，提供时忽略query_texts
             
         Returns:
             Dict[str, Any]: 查询结果
@@ -215,11 +312,18 @@ class VectorDBClient:
             n_results = min(n_results, MAX_TOP_K)
             
             # 执行查询
-            results = self._collection.query(
-                query_texts=query_texts,
-                n_results=n_results,
-                where=where
-            )
+            if query_embeddings is not None:
+                results = self._collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=n_results,
+                    where=where
+                )
+            else:
+                results = self._collection.query(
+                    query_texts=query_texts,
+                    n_results=n_results,
+                    where=where
+                )
             
             logger.info(f"查询完成，返回 {len(results.get('documents', []))} 条结果")
             return results
@@ -232,7 +336,8 @@ class VectorDBClient:
         self,
         query_text: str,
         n_results: int = DEFAULT_TOP_K,
-        where: Dict[str, Any] = None
+        where: Dict[str, Any] = None,
+        max_distance: float = None
     ) -> List[Dict[str, Any]]:
         """
         带分数的相似性搜索
@@ -241,13 +346,15 @@ class VectorDBClient:
             query_text (str): 查询文本
             n_results (int): 返回结果数量
             where (Dict[str, Any]): 过滤条件
+            max_distance (float): 只返回距离小于该值的结果，为空时不过滤
             
         Returns:
             List[Dict[str, Any]]: 带分数的查询结果
         """
         try:
+            # 使用缓存的查询向量，热门查询无需重复向量化
             results = self.query(
-                query_texts=[query_text],
+                query_embeddings=[self.embed_query(query_text)],
                 n_results=n_results,
                 where=where
             )
@@ -256,11 +363,15 @@ class VectorDBClient:
             formatted_results = []
             if results.get("documents") and results["documents"]:
                 for i, doc in enumerate(results["documents"][0]):
+                    distance = results.get("distances", [[]])[0][i] if results.get("distances") else None
+                    # Chroma不支持按距离阈值查询，在格式化时直接丢弃超出阈值的结果
+                    if max_distance is not None and (distance is None or distance >= max_distance):
+                        continue
                     result = {
                         "document": doc,
                         "metadata": results["metadatas"][0][i] if results.get("metadatas") else {},
                         "id": results["ids"][0][i] if results.get("ids") else None,
-                        "distance": results.get("distances", [[]])[0][i] if results.get("distances") else None
+                        "distance": distance
                     }
                     formatted_results.append(result)
             
@@ -409,11 +520,12 @@ class VectorDBClient:
 
 
 # 便捷函数
+@lru_cache(maxsize=32)
 def get_vector_db_client(
     collection_name: str = VECTOR_DB_COLLECTION
 ) -> VectorDBClient:
     """
-    获取向量数据库客户端实例
+    获取向量数据库客户端实例（按集合名称缓存，进程内共享）
     
     Args:
         collection_name (str): 集合名称
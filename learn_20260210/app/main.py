@@ -128,5 +128,6 @@ if __name__ == "__main__":
         host=settings.APP_HOST,
         port=settings.APP_PORT,
         reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else settings.WEB_CONCURRENCY,
         log_level=settings.LOG_LEVEL.lower()
     )
@@ -2,6 +2,8 @@
 测试模块
 """
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -65,6 +67,20 @@ class TestKnowledgeBaseAPI:
         assert "questions" in data
         assert "key_info" in data
     
+    def test_extract_questions_bulk(self, client, sample_conversation):
+        """测试批量问题抽取"""
+        response = client.post(
+            "/api/v1/knowledge-base/extract-questions/bulk",
+            json={
+                "conversations": [sample_conversation, sample_conversation],
+                "max_questions": 3
+            }
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert len(data["results"]) == 2
+    
     def test_classify_intent(self, client):
         """测试意图分类"""
         response = client.post(
@@ -109,6 +125,31 @@ class TestKnowledgeBaseAPI:
         assert response.status_code == 200
         data = response.json()
         assert "scripts" in data
+    
+    def test_extract_questions_keeps_raw_key_info(self, client, sample_conversation):
+        """测试大模型返回的关键信息原样返回，不做类型校验"""
+        from unittest.mock import Mock
+        from main import app
+        from api.routers.knowledge_base import get_question_extractor
+        
+        extractor = Mock()
+        extractor.extract_questions.return_value = []
+        extractor.extract_key_info.return_value = {
+            "customer_id": 12345,
+            "key_entities": ["账单", 2],
+            "account_type": "信用卡"
+        }
+        app.dependency_overrides[get_question_extractor] = lambda: extractor
+        try:
+            response = client.post(
+                "/api/v1/knowledge-base/extract-questions",
+                json={"conversation": sample_conversation}
+            )
+        finally:
+            app.dependency_overrides.pop(get_question_extractor, None)
+        
+        assert response.status_code == 200
+        assert response.json()["key_info"] == extractor.extract_key_info.return_value
 
 
 class TestScriptRecommenderAPI:
@@ -181,6 +222,18 @@ class TestScriptRecommenderAPI:
         assert response.status_code == 200
         data = response.json()
         assert "personalized_script" in data
+    
+    def test_personalize_script_numeric_id(self, client):
+        """测试客户画像接受数字ID和额外字段"""
+        response = client.post(
+            "/api/v1/script-recommender/personalize-script",
+            json={
+                "script": "您好，请问有什么可以帮助您的？",
+                "customer_profile": {"customer_id": 123, "vip_level": 3}
+            }
+        )
+        assert response.status_code == 200
+        assert response.json()["customer_id"] == "123"
 
 
 class TestQualityInspectorAPI:
@@ -220,6 +273,103 @@ class TestQualityInspectorAPI:
         data = response.json()
         assert "overall_score" in data
         assert "issues" in data
+    
+    def test_inspect_rejects_malformed_model_output(self, client):
+        """测试模型返回字段类型错误时明确报错，而不是输出不合法的响应"""
+        from unittest.mock import Mock
+        from main import app
+        from api.routers.quality_inspector import get_auto_inspector
+        from assistants.quality_inspector import AutoInspector
+        
+        llm_client = Mock()
+        llm_client.model_name = "qwen-plus"
+        llm_client.generate_text.return_value = json.dumps({
+            "overall": 80,
+            "issues": [{"description": "未核实身份", "location": {"turn": 2}}]
+        }, ensure_ascii=False)
+        app.dependency_overrides[get_auto_inspector] = lambda: AutoInspector(llm_client)
+        try:
+            response = client.post(
+                "/api/v1/quality-inspector/inspect",
+                json={"conversation": {"turns": [{"speaker": "客服", "content": "您好"}]}}
+            )
+        finally:
+            app.dependency_overrides.pop(get_auto_inspector, None)
+        
+        assert response.status_code == 500
+        assert "location" in response.json()["detail"]
+    
+    def test_generate_report_cached(self, client, tmp_path):
+        """测试报告按格式和类型渲染，重复请求复用缓存结果且仍保存文件"""
+        from main import app
+        from api.routers.quality_inspector import get_report_generator, _render_report
+        from assistants.quality_inspector import ReportGenerator
+        
+        generator = ReportGenerator(output_dir=str(tmp_path))
+        app.dependency_overrides[get_report_generator] = lambda: generator
+        
+        def generate(**payload):
+            return client.post(
+                "/api/v1/quality-inspector/generate-report",
+                json={"report_id": "test_001", **payload}
+            )
+        
+        try:
+            text = generate(format="text")
+            html = generate(format="html")
+            summary = generate(format="text", report_type="summary")
+            (tmp_path / "report_test_001.txt").unlink()
+            hits = _render_report.cache_info().hits
+            repeated = generate(format="text")
+        finally:
+            app.dependency_overrides.pop(get_report_generator, None)
+        
+        assert text.status_code == 200
+        assert text.json()["report_id"] == "test_001"
+        assert "客服对话质检报告" in text.json()["content"]
+        assert html.json()["format"] == "html"
+        assert "<!DOCTYPE html>" in html.json()["content"]
+        assert "质检汇总报告" in summary.json()["content"]
+        assert repeated.json()["content"] == text.json()["content"]
+        assert _render_report.cache_info().hits == hits + 1
+        assert (tmp_path / "report_test_001.txt").exists()
+        assert (tmp_path / "report_test_001.html").exists()
+        assert (tmp_path / "summary_test_001.txt").exists()
+    
+    def test_pending_reviews_ndjson(self, client):
+        """测试待复核列表NDJSON流式响应"""
+        submitted = client.post(
+            "/api/v1/quality-inspector/submit-review",
+            json={"report_id": "ndjson_001", "reviewer": "张三"}
+        )
+        assert submitted.status_code == 200
+        
+        response = client.get(
+            "/api/v1/quality-inspector/pending-reviews",
+            headers={"Accept": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows
+        assert all("review_id" in row for row in rows)
+        assert "ndjson_001" in {row["session_id"] for row in rows}
+        assert submitted.json()["review_id"] in {row["review_id"] for row in rows}
+
+    def test_reject_when_llm_overloaded(self, client, monkeypatch):
+        """测试大模型调用排队已满时返回429"""
+        from config.settings import settings
+
+        monkeypatch.setattr(settings, "LLM_MAX_PENDING", 0)
+        response = client.post(
+            "/api/v1/quality-inspector/inspect",
+            json={"conversation": {"turns": [{"speaker": "客户", "content": "我想查账单"}]}}
+        )
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+        
+        # 不调用大模型的接口不受排队限制
+        assert client.get("/api/v1/quality-inspector/pending-reviews").status_code == 200
 
 
 class TestValidation:
@@ -233,6 +383,30 @@ class TestValidation:
         )
         assert response.status_code == 422  # Validation Error
     
+    def test_invalid_conversation_history(self, client):
+        """测试无效的对话历史"""
+        response = client.post(
+            "/api/v1/script-recommender/analyze-context",
+            json={"conversation_history": [{"role": "customer"}]}  # 缺少content字段
+        )
+        assert response.status_code == 422
+
+    def test_invalid_script_tone(self, client):
+        """测试不支持的话术风格"""
+        response = client.post(
+            "/api/v1/knowledge-base/generate-scripts",
+            json={"script_type": "call", "parameters": {}, "tone": "casual"}
+        )
+        assert response.status_code == 422
+
+    def test_invalid_inspect_turn(self, client):
+        """测试质检请求中缺少内容的对话轮次"""
+        response = client.post(
+            "/api/v1/quality-inspector/inspect",
+            json={"conversation": {"turns": [{"speaker": "客户"}]}}  # 缺少content字段
+        )
+        assert response.status_code == 422
+
     def test_invalid_conversation_format(self, client):
         """测试无效的对话格式"""
         response = client.post(
@@ -41,6 +41,60 @@ class TestHelpers:
         result = StringUtils.truncate("hello world", 5, "...")
         assert result == "hello..."
     
+    def test_json_utils_extract(self):
+        """测试从文本中提取JSON"""
+        from utils.helpers import JSONUtils
+
+        text = '结果如下：{"intent": "账户查询"} 如需更多帮助{请告知}'
+        assert JSONUtils.extract(text) == {"intent": "账户查询"}
+        assert JSONUtils.extract('输出：[{"index": 0}]', list) == [{"index": 0}]
+        assert JSONUtils.extract("无法解析") is None
+        # 大量无法解析的括号只尝试有限次数
+        assert JSONUtils.extract("{" * 100000) is None
+
+    async def test_async_rate_limiter(self):
+        """测试令牌桶限流器"""
+        import asyncio
+        from core.llm_client import AsyncRateLimiter
+
+        limiter = AsyncRateLimiter(rate=20, capacity=2)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(4):
+            async with limiter:
+                pass
+        # 突发2个不等待，其余2个各等待约1/20秒
+        assert loop.time() - start >= 0.09
+
+    def test_embedding_cache(self):
+        """测试查询向量缓存"""
+        from core.vector_db import EmbeddingCache
+        
+        cache = EmbeddingCache(max_size=1, ttl=60)
+        embed_fn = Mock(side_effect=lambda text: [float(len(text))])
+        
+        assert cache.get_or_compute("查账单", embed_fn) == [3.0]
+        assert cache.get_or_compute(" 查账单 ", embed_fn) == [3.0]
+        cache.get_or_compute("办信用卡", embed_fn)
+        assert len(cache) == 1
+        assert embed_fn.call_count == 2
+        assert embed_fn.call_args_list[0].args == ("查账单",)
+    
+    def test_response_cache(self):
+        """测试精确匹配响应缓存"""
+        from core.response_cache import ResponseCache
+        
+        cache = ResponseCache(ttl=60, max_size=1)
+        compute = Mock(return_value="ok")
+        
+        assert cache.get_or_compute("提示词", "qwen-plus", compute) == "ok"
+        assert cache.get_or_compute("提示词", "qwen-plus", compute) == "ok"
+        cache.get_or_compute("提示词", "qwen-max", compute)
+        assert compute.call_count == 2
+        assert len(cache) == 1
+        cache.get_or_compute("其他", "qwen-plus", compute, should_cache=lambda value: False)
+        assert len(cache) == 1
+    
     def test_crypto_utils_md5(self):
         """测试MD5加密"""
         from utils.helpers import CryptoUtils
@@ -80,6 +134,257 @@ class TestDataModels:
         data = q.to_dict()
         assert "question" in data
     
+    def test_parse_extraction_response(self):
+        """测试抽取结果解析"""
+        from assistants.knowledge_base.question_extractor import QuestionExtractor
+
+        extractor = QuestionExtractor(Mock())
+        response = """
+1. 主要问题：如何申请信用卡？
+2. 相关信息：客户首次办卡
+3. 客户情绪：积极
+
+1. 主要问题: 年费多少？
+"""
+        questions = extractor._parse_extraction_response(response)
+        assert [q.question for q in questions] == ["如何申请信用卡？", "年费多少？"]
+        assert questions[0].context == "客户首次办卡"
+        assert questions[0].emotion == "积极"
+        assert questions[1].emotion == "中立"
+
+    def test_parse_bulk_extraction(self):
+        """测试批量抽取结果解析"""
+        from assistants.knowledge_base.question_extractor import QuestionExtractor
+        
+        extractor = QuestionExtractor(Mock())
+        response = """
+[
+    {"index": 1, "questions": [{"question": "如何还款？", "context": "账单", "emotion": "焦虑"}]},
+    {"index": 0, "questions": [{"question": "如何申请信用卡？"}]}
+]
+"""
+        rows = extractor._parse_bulk_response(response, 2, 5)
+        assert [q.question for q in rows[0]] == ["如何申请信用卡？"]
+        assert rows[1][0].emotion == "焦虑"
+        assert extractor._parse_bulk_response("无法解析", 2, 5) is None
+    
+    def test_validate_questions_batched(self):
+        """测试问题质量评估合并为一次大模型调用"""
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = "[0.9, 0.4]"
+        generator = QuestionGenerator(llm_client)
+        
+        results = generator.validate_questions(["如何申请信用卡？", "卡", "", "长" * 201])
+        assert [r.is_valid for r in results] == [True, False, False, False]
+        assert results[1].score == 0.4
+        assert results[2].reason == "问题为空"
+        assert results[3].score == 0.5
+        assert llm_client.generate_text.call_count == 1
+        assert "长" * 201 not in llm_client.generate_text.call_args.args[0]
+    
+    def test_parse_questions(self):
+        """测试问题列表解析"""
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        
+        generator = QuestionGenerator(Mock())
+        response = "1. 如何申请信用卡？\r\n\n2) 年费多少？\n- 额度如何提升？\n* \n0.5%的手续费怎么算？\n3."
+        assert generator._parse_questions(response) == [
+            "如何申请信用卡？", "年费多少？", "额度如何提升？", "0.5%的手续费怎么算？"
+        ]
+    
+    def test_parse_call_scripts(self):
+        """测试电话话术解析"""
+        from assistants.knowledge_base.script_generator import ScriptGenerator
+        
+        generator = ScriptGenerator(Mock())
+        response = "1. 问候语: 您好\n2. 主要内容: 为您查询账单\n3. 结束语: 感谢来电\n\n开场: 早上好\n主要内容: 开场后说明来意"
+        scripts = generator._parse_call_scripts(response, "账单查询", "普通客户")
+        assert [(s.greeting, s.main_content, s.closing) for s in scripts] == [
+            ("您好", "为您查询账单", "感谢来电"),
+            ("开场后说明来意", "", "")
+        ]
+    
+    def test_format_full_script(self):
+        """测试完整话术格式化"""
+        from assistants.knowledge_base.script_generator import CallScript, CollectionScript
+        
+        call = CallScript(greeting="您好", main_content="为您查询账单", closing="", scenario="账单查询")
+        assert call.format_full_script() == "您好\n为您查询账单"
+        collection = CollectionScript(opening="您好", negotiation="请尽快还款", commitment_request="今天能还吗？")
+        assert collection.format_full_script() == "您好\n请尽快还款\n今天能还吗？"
+    
+    def test_personalize_script(self):
+        """测试话术占位符替换"""
+        from assistants.knowledge_base.script_generator import ScriptGenerator
+        
+        generator = ScriptGenerator(Mock())
+        script = "{客户姓名}您好，您的{卡种}账单为{金额}元，{未知字段}"
+        assert generator.personalize_script(script, customer_info={"name": "张三", "卡种": "白金卡", "金额": 1200}) == (
+            "张三您好，您的白金卡账单为1200元，{未知字段}"
+        )
+        assert generator.personalize_script("{客户}您好") == "客户您好"
+    
+    def test_generate_questions_with_scores(self):
+        """测试生成问题的同时评分"""
+        from assistants.knowledge_base.intent_cache import IntentCache
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = (
+            '[{"question": "如何申请信用卡？", "score": 0.9, "reason": "清晰"},'
+            ' {"question": "卡", "score": 0.3, "reason": "不完整"}]'
+        )
+        generator = QuestionGenerator(llm_client, cache=IntentCache())
+        
+        validations = generator.generate_standard_questions_with_scores("信用卡申请", 2)
+        assert [(v.question, v.is_valid, v.score) for v in validations] == [
+            ("如何申请信用卡？", True, 0.9),
+            ("卡", False, 0.3)
+        ]
+        assert llm_client.generate_text.call_count == 1
+    
+    def test_filter_similar_questions(self):
+        """测试相似问过滤的距离阈值与分类条件"""
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        from core.vector_db import VectorDBClient
+        
+        vector_db = VectorDBClient.__new__(VectorDBClient)
+        vector_db.embed_query = Mock(return_value=[0.1, 0.2])
+        vector_db.query = Mock(return_value={
+            "documents": [["如何还款？", "如何还款？", "账单日是哪天？", "怎么开卡？"]],
+            "distances": [[0.2, 0.3, 0.5, 0.95]]
+        })
+        generator = QuestionGenerator(Mock(), vector_db)
+        
+        assert generator._filter_similar_questions("怎么还款", [], 5, "还款") == ["如何还款？", "账单日是哪天？"]
+        assert vector_db.query.call_args.kwargs["where"] == {"category": "还款"}
+    
+    def test_iter_faq_questions(self):
+        """测试流式逐行解析FAQ问题"""
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        
+        llm_client = Mock()
+        llm_client.stream_text.return_value = iter(["1. 如何申", "请信用卡？\n2) 年费", "多少？\n", "- 额度如何提升？"])
+        generator = QuestionGenerator(llm_client)
+        
+        assert list(generator.iter_faq_questions("信用卡", 3)) == ["如何申请信用卡？", "年费多少？", "额度如何提升？"]
+    
+    def test_parse_score(self):
+        """测试单题评分解析"""
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        
+        generator = QuestionGenerator(Mock())
+        assert generator._parse_score("评分：0.85") == 0.85
+        assert generator._parse_score("8分，满分10分") is None
+        assert generator._parse_score("无法评估") is None
+    
+    async def test_agenerate_question_set(self):
+        """测试并发生成同一主题的多类问题"""
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        from config.constants import QuestionTypes
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = "1. 如何申请信用卡？\n2. 申请需要哪些材料？"
+        generator = QuestionGenerator(llm_client)
+        
+        result = await generator.agenerate_question_set("信用卡申请", 2)
+        assert result[QuestionTypes.STANDARD] == ["如何申请信用卡？", "申请需要哪些材料？"]
+        assert result[QuestionTypes.FAQ] == result[QuestionTypes.STANDARD]
+        assert llm_client.generate_text.call_count == 2
+    
+    def test_generation_cache(self):
+        """测试相同主题的问题生成复用缓存响应"""
+        from assistants.knowledge_base.intent_cache import IntentCache
+        from assistants.knowledge_base.question_generator import QuestionGenerator
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = "1. 如何申请信用卡？"
+        generator = QuestionGenerator(llm_client, cache=IntentCache())
+        
+        first = generator.generate_standard_questions("信用卡申请", 1)
+        second = generator.generate_standard_questions("信用卡申请", 1)
+        generator.generate_standard_questions("信用卡申请", 2)
+        assert first == second == ["如何申请信用卡？"]
+        assert llm_client.generate_text.call_count == 2
+    
+    def test_intent_cache(self):
+        """测试意图缓存精确匹配与语义匹配"""
+        from assistants.knowledge_base.intent_cache import IntentCache
+        
+        vectors = {"查账单": [1.0, 0.0], "查一下账单": [0.99, 0.05], "办信用卡": [0.0, 1.0]}
+        cache = IntentCache(embed_fn=vectors.get, similarity_threshold=0.92, ttl=60, max_size=8)
+        compute = Mock(side_effect=["账户查询", "业务办理"])
+        
+        assert cache.get_or_compute("查账单", "intent", compute) == "账户查询"
+        assert cache.get_or_compute("查账单", "intent", compute) == "账户查询"
+        assert cache.get_or_compute("查一下账单", "intent", compute) == "账户查询"
+        assert cache.get_or_compute("办信用卡", "intent", compute) == "业务办理"
+        assert compute.call_count == 2
+    
+    def test_intent_cache_embed_many(self):
+        """测试批量预计算查询向量"""
+        from assistants.knowledge_base.intent_cache import IntentCache
+        
+        embed_fn = Mock(side_effect=AssertionError("不应逐条向量化"))
+        embed_batch_fn = Mock(return_value=[[1.0, 0.0], [0.99, 0.05]])
+        cache = IntentCache(embed_fn=embed_fn, embed_batch_fn=embed_batch_fn, similarity_threshold=0.92)
+        compute = Mock(return_value="账户查询")
+        
+        cache.embed_many(["查账单", "查一下账单"])
+        assert cache.get_or_compute("查账单", "intent", compute) == "账户查询"
+        assert cache.get_or_compute("查一下账单", "intent", compute) == "账户查询"
+        assert compute.call_count == 1
+        embed_batch_fn.assert_called_once_with(["查账单", "查一下账单"])
+    
+    async def test_batch_classify_fused_prompt(self):
+        """测试批量意图分类（分类与改写合并为一次调用）"""
+        from assistants.knowledge_base.intent_cache import IntentCache
+        from assistants.knowledge_base.intent_classifier import IntentClassifier
+
+        llm_client = Mock()
+        llm_client.generate_text.return_value = (
+            '{"intent": "账户查询", "confidence": 0.9, "rewritten": "查询本月账单"}'
+        )
+        classifier = IntentClassifier(llm_client, cache=IntentCache())
+
+        results = await classifier.abatch_classify(["我想查账单", "帮我看下账单", "我想查账单"])
+        assert [r.primary_intent for r in results] == ["账户查询", "账户查询", "账户查询"]
+        assert results[0].rewritten_query == "查询本月账单"
+        assert results[2] is not results[0]
+        assert llm_client.generate_text.call_count == 2
+        llm_client.classify_intent.assert_not_called()
+
+    def test_classify_intent_semantic_hit_rewrites_query(self):
+        """测试语义命中只复用意图标签，改写按查询计算，降级结果不缓存"""
+        from assistants.knowledge_base.intent_cache import IntentCache
+        from assistants.knowledge_base.intent_classifier import IntentClassifier
+
+        vectors = {"查账单": [1.0, 0.0], "查一下账单": [0.99, 0.05], "办信用卡": [0.0, 1.0]}
+        llm_client = Mock()
+        llm_client.generate_text.side_effect = [
+            '{"intent": "账户查询", "confidence": 0.9, "rewritten": "查询账单"}',
+            "查询一下账单",
+            "无法解析",
+            ""
+        ]
+        llm_client.classify_intent.return_value = {"intent": "业务办理", "confidence": 0.6}
+        classifier = IntentClassifier(
+            llm_client,
+            cache=IntentCache(embed_fn=vectors.get, similarity_threshold=0.92, ttl=60)
+        )
+
+        first = classifier.classify_intent("查账单")
+        second = classifier.classify_intent("查一下账单")
+        assert (first.primary_intent, first.rewritten_query) == ("账户查询", "查询账单")
+        assert (second.primary_intent, second.rewritten_query) == ("账户查询", "查询一下账单")
+
+        # 改写失败时回退为原查询，该结果不写入缓存
+        degraded = classifier.classify_intent("办信用卡")
+        assert (degraded.primary_intent, degraded.rewritten_query) == ("业务办理", "办信用卡")
+        assert len(classifier.cache) == 3
+
     def test_intent_classification(self):
         """测试意图分类模型"""
         from assistants.knowledge_base.intent_classifier import IntentClassification
@@ -113,6 +418,27 @@ class TestDataModels:
         assert intent.intent_type == "查询"
         assert intent.confidence == 0.9
     
+    def test_recommend_request_accepts_intent_response(self):
+        """测试意图识别响应可直接作为话术推荐请求的意图"""
+        from api.models.script_recommender import (
+            RecognizeIntentResponse,
+            RecommendScriptsRequest
+        )
+        
+        intent = RecognizeIntentResponse(
+            intent_type="查询",
+            confidence=0.9,
+            required_info=["账单月份"],
+            suggested_actions=["查询账单"]
+        )
+        request = RecommendScriptsRequest(
+            context={"topic": "账单查询", "channel": "电话"},
+            intent=intent.model_dump()
+        )
+        
+        assert request.intent["required_info"] == ["账单月份"]
+        assert request.context["channel"] == "电话"
+    
     def test_quality_issue(self):
         """测试质量问题模型"""
         from assistants.quality_inspector.auto_inspector import QualityIssue
@@ -125,6 +451,162 @@ class TestDataModels:
         assert issue.issue_type == "服务态度"
         assert issue.severity == "中"
     
+    def test_extract_dialogue_turns(self):
+        """测试逐行解析对话轮次，无标记的行并入上一轮"""
+        from assistants.quality_inspector import ConversationParser
+        
+        turns = ConversationParser().extract_dialogue_turns(
+            "客户：我想查账单\n客服：好的，请问\n您想查哪个月的？\n[客户] 上个月"
+        )
+        assert [(t.speaker, t.content) for t in turns] == [
+            ("客户", "我想查账单"),
+            ("客服", "好的，请问 您想查哪个月的？"),
+            ("客户", "上个月")
+        ]
+        
+        # 同一行内的多个 "[发言者]" 标记各自成为一轮
+        turns = ConversationParser().extract_dialogue_turns("[客服] 您好 [客户] 我想查账单")
+        assert [(t.speaker, t.content) for t in turns] == [("客服", "您好"), ("客户", "我想查账单")]
+    
+    def test_parse_text_bytes(self):
+        """测试bytes与str输入解析出相同的会话"""
+        from assistants.quality_inspector import ConversationParser
+        
+        parser = ConversationParser()
+        content = "客户：我想查账单\n客服：好的"
+        from_str = parser.parse_conversation(content)
+        from_bytes = parser.parse_conversation(content.encode("utf-8"))
+        assert from_bytes.session_id == from_str.session_id
+        assert [t.content for t in from_bytes.turns] == ["我想查账单", "好的"]
+        assert from_str.participants == ["客户", "客服"]
+    
+    def test_conversation_formatted_text(self):
+        """测试对话文本随轮次新增、修改而更新"""
+        from assistants.quality_inspector import ParsedConversation, DialogueTurn
+        
+        conversation = ParsedConversation(session_id="s1", turns=[DialogueTurn("客户", "我想查账单")])
+        assert conversation.formatted_text == "客户: 我想查账单"
+        conversation.turns.append(DialogueTurn("客服", "好的"))
+        assert conversation.formatted_text == "客户: 我想查账单\n客服: 好的"
+        conversation.turns[1].content = "请稍等"
+        assert conversation.formatted_text == "客户: 我想查账单\n客服: 请稍等"
+    
+    async def test_abatch_inspect(self):
+        """测试异步批量质检"""
+        from assistants.quality_inspector import AutoInspector, ParsedConversation, DialogueTurn
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = '{"overall_score": 88}'
+        inspector = AutoInspector(llm_client)
+        conversations = [
+            ParsedConversation(session_id=f"s{i}", turns=[DialogueTurn("客户", f"我想查第{i}期账单")])
+            for i in range(3)
+        ]
+        
+        reports = await inspector.abatch_inspect(conversations)
+        assert [r.session_id for r in reports] == ["s0", "s1", "s2"]
+        reports = await inspector.abatch_inspect(conversations, max_concurrency=2)
+        assert [r.session_id for r in reports] == ["s0", "s1", "s2"]
+        assert [r.session_id for r in inspector.batch_inspect(conversations)] == ["s0", "s1", "s2"]
+        # 重复质检相同对话时复用缓存的大模型响应
+        assert llm_client.generate_text.call_count == 3
+    
+    def test_inspect_combined_single_call(self):
+        """测试合并质检只调用一次大模型，服务态度与合规性复用质检结果"""
+        import json
+        from assistants.quality_inspector import AutoInspector, ParsedConversation, DialogueTurn
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = json.dumps({
+            "overall": 82,
+            "attitude": {"score": 90, "strengths": ["礼貌"], "weaknesses": [], "suggestions": []},
+            "professionalism": 80,
+            "compliance": {"score": 70, "violations": ["未核实身份"]},
+            "issues": [{"issue_type": "合规性", "description": "未核实客户身份", "severity": "高"}],
+            "summary": "整体良好"
+        }, ensure_ascii=False)
+        inspector = AutoInspector(llm_client)
+        conversation = ParsedConversation(session_id="s1", turns=[DialogueTurn("客户", "我想查账单")])
+        
+        report = inspector.inspect_conversation(conversation)
+        assert (report.overall_score, report.attitude_score) == (82.0, 90.0)
+        assert (report.professionalism_score, report.compliance_score) == (80.0, 70.0)
+        assert report.issues[0].severity == "高"
+        assert report.summary == "整体良好"
+        
+        assert inspector.evaluate_service_attitude([], conversation=conversation)["strengths"] == ["礼貌"]
+        compliance = inspector.check_compliance(conversation)
+        assert compliance["score"] == 70.0
+        assert compliance["issues"] == ["未核实身份"]
+        assert llm_client.generate_text.call_count == 1
+        
+        # 修改返回值不影响后续命中
+        compliance["details"]["violations"].clear()
+        assert inspector.check_compliance(conversation)["issues"] == ["未核实身份"]
+        
+        # 会话ID相同但内容不同的对话不能复用上一次的质检结果
+        other = ParsedConversation(session_id="s1", turns=[DialogueTurn("客服", "你是傻子")])
+        inspector.check_compliance(other)
+        assert llm_client.generate_text.call_count == 2
+    
+    def test_parse_inspection_response(self):
+        """测试非JSON质检响应的文本解析"""
+        from assistants.quality_inspector import AutoInspector
+        
+        report = AutoInspector(Mock())._parse_inspection_response(
+            "总体评分：85\n服务态度: 90分\n专业性 80\n合规性：95\n"
+            "1. 问题：回复不够热情，较严重\n2. 开场问候规范\n总结：整体良好",
+            "s1"
+        )
+        assert [(i.description, i.severity) for i in report.issues] == [("问题：回复不够热情，较严重", "高")]
+        assert (report.overall_score, report.attitude_score) == (85.0, 90.0)
+        assert (report.professionalism_score, report.compliance_score) == (80.0, 95.0)
+        assert report.summary == "整体良好"
+    
+    def test_inspect_result_cache(self):
+        """测试相同对话复用已有质检结果并替换会话ID，措辞相近的对话重新质检"""
+        from assistants.quality_inspector import AutoInspector, ParsedConversation, DialogueTurn
+        
+        llm_client = Mock()
+        llm_client.generate_text.return_value = '{"overall": 75, "summary": "一般"}'
+        llm_client.embedding.return_value = [1.0, 0.0, 0.0]
+        inspector = AutoInspector(llm_client)
+        
+        first = inspector.inspect_conversation(
+            ParsedConversation(session_id="s1", turns=[DialogueTurn("客服", "您好")])
+        )
+        second = inspector.inspect_conversation(
+            ParsedConversation(session_id="s2", turns=[DialogueTurn("客服", "您好")])
+        )
+        assert (first.session_id, second.session_id) == ("s1", "s2")
+        assert second.overall_score == 75.0
+        assert llm_client.generate_text.call_count == 1
+        
+        inspector.inspect_conversation(
+            ParsedConversation(session_id="s3", turns=[DialogueTurn("客服", "您好，你是傻子")])
+        )
+        assert llm_client.generate_text.call_count == 2
+        llm_client.embedding.assert_not_called()
+    
+    def test_inspection_persistent_cache(self, tmp_path):
+        """测试持久化缓存跨质检器实例复用质检结果"""
+        from assistants.quality_inspector import (
+            AutoInspector, InspectionCache, ParsedConversation, DialogueTurn
+        )
+        
+        llm_client = Mock()
+        llm_client.model_name = "qwen-plus"
+        llm_client.generate_text.return_value = '{"overall": 66, "summary": "需改进"}'
+        conversation = ParsedConversation(session_id="s1", turns=[DialogueTurn("客户", "我想查账单")])
+        
+        path = str(tmp_path / "qi_cache.sqlite3")
+        AutoInspector(llm_client, persistent_cache=InspectionCache(path)).inspect_conversation(conversation)
+        report = AutoInspector(
+            llm_client, persistent_cache=InspectionCache(path)
+        ).inspect_conversation(conversation)
+        assert report.overall_score == 66.0
+        assert llm_client.generate_text.call_count == 1
+    
     def test_inspection_report(self):
         """测试质检报告模型"""
         from assistants.quality_inspector.auto_inspector import InspectionReport
@@ -136,6 +618,120 @@ class TestDataModels:
         assert report.session_id == "test_001"
         assert report.overall_score == 85.0
     
+    def test_inspection_report_html(self):
+        """测试HTML报告转义问题内容"""
+        from assistants.quality_inspector.auto_inspector import InspectionReport, QualityIssue
+        
+        report = InspectionReport(
+            session_id="test_001",
+            issues=[QualityIssue("合规性", "承诺<保证收益>", severity="高")],
+            summary="a & b"
+        )
+        html = report.to_html()
+        assert '<div class="issue high">' in html
+        assert "承诺&lt;保证收益&gt;" in html
+        assert "a &amp; b" in html
+    
+    def test_export_report_json(self, tmp_path):
+        """测试JSON格式导出报告"""
+        import json
+        from assistants.quality_inspector import ReportGenerator
+        from assistants.quality_inspector.auto_inspector import InspectionReport
+        
+        report = InspectionReport(session_id="test_001", overall_score=85.0, summary="客服表现良好")
+        data = ReportGenerator(output_dir=str(tmp_path)).export_report(report, "json")
+        assert "客服表现良好".encode("utf-8") in data
+        assert json.loads(data)["overall_score"] == 85.0
+    
+    def test_generate_summary_report(self, tmp_path):
+        """测试汇总报告统计"""
+        from assistants.quality_inspector import ReportGenerator
+        from assistants.quality_inspector.auto_inspector import InspectionReport, QualityIssue
+        
+        results = [
+            InspectionReport("s1", overall_score=95, attitude_score=70, professionalism_score=90,
+                             compliance_score=90, issues=[QualityIssue("服务态度", "不够热情")]),
+            InspectionReport("s2", overall_score=50, attitude_score=70, professionalism_score=90,
+                             compliance_score=90, issues=[QualityIssue("服务态度", "语气生硬"),
+                                                          QualityIssue("合规性", "未核实身份")])
+        ]
+        summary = ReportGenerator(output_dir=str(tmp_path)).generate_summary_report(results)
+        assert summary.avg_score == 72.5
+        assert summary.score_distribution["优秀(90-100)"] == 1
+        assert list(summary.score_distribution.values()) == [1, 0, 0, 1]
+        assert summary.top_issues == [{"type": "服务态度", "count": 2}, {"type": "合规性", "count": 1}]
+        assert summary.recommendations == ["加强客服人员服务态度培训，提高客户满意度"]
+        saved = (tmp_path / "summary_report.txt").read_text(encoding="utf-8")
+        assert "1. 服务态度: 2次" in saved
+    
+    def test_save_report_atomic(self, tmp_path):
+        """测试报告内容生成中途出错时不留下不完整的文件"""
+        from assistants.quality_inspector import ReportGenerator
+        
+        def chunks():
+            yield "第一段\n"
+            raise RuntimeError("生成失败")
+        
+        generator = ReportGenerator(output_dir=str(tmp_path))
+        with pytest.raises(RuntimeError):
+            generator._save_report(tmp_path / "summary_report.txt", chunks())
+        assert list(tmp_path.iterdir()) == []
+        
+        # 新报告的权限与直接open()创建的文件一致
+        import os
+        report_path = tmp_path / "summary_report.txt"
+        generator._save_report(report_path, iter(["完成\n"]))
+        umask = os.umask(0)
+        os.umask(umask)
+        assert report_path.stat().st_mode & 0o777 == 0o666 & ~umask
+        assert list(tmp_path.iterdir()) == [report_path]
+    
+    def test_review_workflow(self):
+        """测试复核提交、待复核列表与批准"""
+        from assistants.quality_inspector import ReviewWorkflow
+        from assistants.quality_inspector.auto_inspector import InspectionReport
+        
+        workflow = ReviewWorkflow(max_completed=1)
+        assert workflow.submit_for_review(InspectionReport("s1", overall_score=80.0), "张三")
+        assert workflow.submit_for_review(InspectionReport("s1", overall_score=80.0), "王五")
+        pending = workflow.get_pending_reviews()
+        assert [(r["session_id"], r["reviewer"]) for r in pending] == [("s1", "张三"), ("s1", "王五")]
+
+        assert workflow.approve_report(pending[0]["review_id"], "李四")
+        assert [r["reviewer"] for r in workflow.get_pending_reviews()] == ["王五"]
+        assert workflow.completed_reviews[pending[0]["review_id"]].status == "approved"
+
+        # 超出容量时淘汰最早完成的记录
+        assert workflow.reject_report(pending[1]["review_id"], "李四", ["评分偏高"])
+        assert list(workflow.completed_reviews) == [pending[1]["review_id"]]
+    
+    def test_transcription_stats_fast(self):
+        """测试转录结果的片段统计"""
+        from assistants.quality_inspector.speech_to_text import AudioSegment, TranscriptionResult
+    
+        result = TranscriptionResult(
+            text="",
+            segments=[
+                AudioSegment("a", start_time=0.0, end_time=3.0, confidence=0.9),
+                AudioSegment("b", start_time=3.0, end_time=4.0, confidence=0.5)
+            ]
+        )
+        stats = result.stats_fast()
+        assert stats["segment_count"] == 2
+        assert stats["speech_duration"] == pytest.approx(4.0)
+        assert stats["weighted_confidence"] == pytest.approx(0.8)
+        assert TranscriptionResult(text="").stats_fast()["weighted_confidence"] == 0.0
+    
+    def test_mock_transcription_segments_not_shared(self):
+        """测试模拟转录每次返回新的片段对象"""
+        from assistants.quality_inspector import SpeechToTextProcessor
+        
+        processor = SpeechToTextProcessor()
+        first = processor._mock_transcribe("a.wav", "zh-CN")
+        first.segments[0].text = "已修改"
+        second = processor._mock_transcribe("a.wav", "zh-CN")
+        assert second.segments[0].text == "客户：您好，我想查询一下我的信用卡账单。"
+    
     def test_customer_profile(self):
         """测试客户画像模型"""
         from assistants.script_recommender.personalization_adapter import CustomerProfile
@@ -171,8 +767,11 @@ class TestPromptTemplates:
         """测试质检模板"""
         from config.constants import PromptTemplates
         
-        template = PromptTemplates.QUALITY_INSPECT
+        template = PromptTemplates.QUALITY_INSPECT_COMBINED
         assert "{conversation}" in template
+        # 对话内容位于固定要求之后，同一模板的请求共享相同前缀
+        prompt = template.format(conversation="客户: 你好")
+        assert prompt.index('"summary"') < prompt.index("客户: 你好")
 
 
 class TestSettings:
@@ -12,6 +12,10 @@ from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 import aiofiles
 
+_JSON_DECODER = json.JSONDecoder()
+# JSONUtils.extract 最多尝试解析的起始位置数，避免大量无法解析的括号导致平方级耗时
+_JSON_EXTRACT_MAX_ATTEMPTS = 32
+
 
 class DateTimeUtils:
     """日期时间工具类"""
@@ -300,6 +304,36 @@ class JSONUtils:
         """
         return json.loads(json_str)
     
+    @staticmethod
+    def extract(text: str, expected_type: type = dict) -> Optional[Any]:
+        """
+        从文本（如大模型输出）中提取第一个指定类型的JSON值
+        
+        从每个候选起始符处用raw_decode解析恰好一个JSON值，
+        避免贪婪正则扫描整段文本，也不受JSON之后多余文本的影响；
+        最多尝试 _JSON_EXTRACT_MAX_ATTEMPTS 个起始位置，总耗时与文本长度成线性
+        
+        Args:
+            text (str): 包含JSON的文本
+            expected_type (type): 期望的类型（dict或list）
+            
+        Returns:
+            Optional[Any]: 解析后的对象，未找到时返回None
+        """
+        opening = "[" if expected_type is list else "{"
+        start = text.find(opening)
+        for _ in range(_JSON_EXTRACT_MAX_ATTEMPTS):
+            if start == -1:
+                break
+            try:
+                value = _JSON_DECODER.raw_decode(text, start)[0]
+                if isinstance(value, expected_type):
+                    return value
+            except (json.JSONDecodeError, RecursionError):
+                pass
+            start = text.find(opening, start + 1)
+        return None
+    
     @staticmethod
     def to_dict(obj: Any) -> Dict[str, Any]:
         """